@@ -0,0 +1,64 @@
+"""
+Measures the throughput of CWT verification with ProcessPoolVerifier
+for an increasing number of worker processes.
+
+Usage:
+
+    $ python benchmarks/process_pool_verifier.py [num_tokens]
+"""
+import os
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import cwt
+from cwt import COSEKey, ProcessPoolVerifier
+
+
+def main(num_tokens: int):
+    pk = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_key = COSEKey.from_pem(
+        pk.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ),
+        alg="PS256",
+        kid="01",
+    )
+    public_key = COSEKey.from_pem(
+        pk.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ),
+        alg="PS256",
+        kid="01",
+    )
+    tokens = [
+        cwt.encode({"iss": "coaps://as.example", "sub": str(i)}, private_key)
+        for i in range(num_tokens)
+    ]
+
+    start = time.perf_counter()
+    for t in tokens:
+        cwt.decode(t, public_key)
+    elapsed = time.perf_counter() - start
+    print(f"in-process: {num_tokens / elapsed:10.1f} tokens/s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        with ProcessPoolVerifier.new(public_key, max_workers=workers) as verifier:
+            # Warm up the worker processes.
+            verifier.decode_batch(tokens[:workers], chunk_size=1)
+            start = time.perf_counter()
+            res = verifier.decode_batch(tokens)
+            elapsed = time.perf_counter() - start
+        assert not any(isinstance(r, Exception) for r in res)
+        print(f"workers={workers:3d}: {num_tokens / elapsed:10.1f} tokens/s")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,79 @@
+"""
+Measures the time to build COSE_Encrypt messages for a large number of
+recipients with RecipientInterface.apply() and Recipient.apply_batch().
+
+Usage:
+
+    $ python benchmarks/recipients.py [num_recipients ...]
+"""
+import sys
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from cwt import COSE, COSEKey, Recipient
+
+
+def _measure(name: str, f):
+    start = time.perf_counter()
+    res = f()
+    print(f"  {name:28s}: {time.perf_counter() - start:8.3f} s")
+    return res
+
+
+def main(num_recipients: int):
+    print(f"recipients={num_recipients}")
+    ctx = COSE.new(alg_auto_inclusion=True)
+    enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+
+    # A128KW
+    rs = [
+        Recipient.from_jwk({"alg": "A128KW", "kid": str(i), "kty": "oct"})
+        for i in range(num_recipients)
+    ]
+    _measure("A128KW apply()", lambda: [r.apply(enc_key) for r in rs])
+    _measure("A128KW apply_batch()", lambda: Recipient.apply_batch(rs, enc_key))
+    _measure(
+        "A128KW encode_and_encrypt()",
+        lambda: ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=rs),
+    )
+
+    # ECDH-ES+A128KW
+    public_keys = [
+        COSEKey.from_pem(
+            ec.generate_private_key(ec.SECP256R1())
+            .public_key()
+            .public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            ),
+            kid=str(i),
+        )
+        for i in range(num_recipients)
+    ]
+    rs = [
+        Recipient.from_jwk({"kty": "EC", "crv": "P-256", "alg": "ECDH-ES+A128KW"})
+        for _ in range(num_recipients)
+    ]
+    context = {"alg": "A128GCM"}
+    _measure(
+        "ECDH-ES+A128KW apply()",
+        lambda: [
+            r.apply(enc_key, recipient_key=k, context=context)
+            for r, k in zip(rs, public_keys)
+        ],
+    )
+    _measure(
+        "ECDH-ES+A128KW apply_batch()",
+        lambda: Recipient.apply_batch(rs, enc_key, public_keys, context=context),
+    )
+    _measure(
+        "ECDH-ES+A128KW encode()",
+        lambda: ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=rs),
+    )
+
+
+if __name__ == "__main__":
+    for n in [int(v) for v in sys.argv[1:]] or [1000, 10000]:
+        main(n)
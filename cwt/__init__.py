@@ -1,19 +1,41 @@
+from .cbor_profile import CBORProfile
 from .claims import Claims
 from .cose import COSE
+from .cose_encoder import COSEEncoder
 from .cose_key import COSEKey
+from .cose_key_ring import COSEKeyRing
+from .cose_message_info import COSEMessageInfo
+from .cose_stream import (
+    Encrypt0StreamDecoder,
+    Encrypt0StreamEncoder,
+    Sign1StreamSigner,
+    Sign1StreamVerifier,
+)
 from .cwt import (
     CWT,
+    CWTIssuer,
     decode,
+    decode_batch,
+    decode_stream,
     encode,
     encode_and_encrypt,
     encode_and_mac,
     encode_and_sign,
+    encode_stream,
     set_private_claim_names,
 )
 from .encrypted_cose_key import EncryptedCOSEKey
-from .exceptions import CWTError, DecodeError, EncodeError, VerifyError
+from .exceptions import (
+    CWTError,
+    DecodeError,
+    DecodeLimitError,
+    EncodeError,
+    VerifyError,
+)
 from .helpers.hcert import load_pem_hcert_dsc
+from .process_pool_verifier import ProcessPoolVerifier
 from .recipient import Recipient
+from .signature_policy import SignaturePolicy
 from .signer import Signer
 
 __version__ = "1.3.2"
@@ -31,18 +53,33 @@ __all__ = [
     "encode_and_mac",
     "encode_and_sign",
     "encode_and_encrypt",
+    "encode_stream",
     "decode",
+    "decode_batch",
+    "decode_stream",
     "set_private_claim_names",
     "CWT",
+    "CWTIssuer",
+    "CBORProfile",
     "COSE",
+    "COSEEncoder",
     "COSEKey",
+    "COSEKeyRing",
+    "COSEMessageInfo",
+    "Encrypt0StreamDecoder",
+    "Encrypt0StreamEncoder",
+    "Sign1StreamSigner",
+    "Sign1StreamVerifier",
     "EncryptedCOSEKey",
     "Claims",
     "Recipient",
+    "SignaturePolicy",
     "Signer",
+    "ProcessPoolVerifier",
     "load_pem_hcert_dsc",
     "CWTError",
     "EncodeError",
     "DecodeError",
+    "DecodeLimitError",
     "VerifyError",
 ]
@@ -0,0 +1,330 @@
+import asyncio
+import os
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from cbor2 import CBORTag
+
+from .claims import Claims
+from .cose import COSE
+from .cose_key_interface import COSEKeyInterface
+from .cose_key_ring import COSEKeyRing
+from .cwt import CWT
+from .recipient_interface import RecipientInterface
+from .signer import Signer
+
+
+class _AsyncRunner:
+    """
+    A base class to run the blocking functions on an executor with a limit on the
+    number of the concurrent executions.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_concurrency: int = 0):
+        if not isinstance(max_concurrency, int):
+            raise ValueError("max_concurrency should be int.")
+        if max_concurrency < 0:
+            raise ValueError("max_concurrency should not be negative number.")
+        self._max_concurrency = (
+            max_concurrency if max_concurrency else min(32, (os.cpu_count() or 1) + 4)
+        )
+        self._executor = executor
+        self._own_executor = executor is None
+        self._sem: Optional[asyncio.Semaphore] = None
+        return
+
+    @property
+    def max_concurrency(self) -> int:
+        """
+        The maximum number of the operations executed concurrently. The callers
+        beyond this number wait until one of the running operations is completed.
+        """
+        return self._max_concurrency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+        return
+
+    def close(self):
+        """
+        Shuts down the executor if it was created by this object. The executor
+        given by the caller is not shut down.
+        """
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        return
+
+    async def _run(self, func: Callable, *args) -> Any:
+        loop = asyncio.get_event_loop()
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._max_concurrency)
+        sem = self._sem
+        await sem.acquire()
+        try:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency)
+            f = self._executor.submit(func, *args)
+        except BaseException:
+            sem.release()
+            raise
+
+        def _release(_: Future):
+            # The slot is returned when the function has actually finished (or has
+            # been cancelled before starting), even if the awaiting task is gone.
+            try:
+                loop.call_soon_threadsafe(sem.release)
+            except RuntimeError:  # The event loop is closed.
+                pass
+
+        f.add_done_callback(_release)
+        # Cancelling the awaiting task cancels the pending function as well.
+        return await asyncio.wrap_future(f)
+
+
+class AsyncCOSE(_AsyncRunner):
+    """
+    An asyncio interface of :class:`COSE <cwt.COSE>`. The COSE operations are
+    offloaded to an executor so that they do not block the event loop.
+    """
+
+    def __init__(
+        self,
+        cose: Optional[COSE] = None,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 0,
+    ):
+        super().__init__(executor, max_concurrency)
+        self._cose = cose if cose else COSE()
+        return
+
+    @classmethod
+    def new(
+        cls,
+        cose: Optional[COSE] = None,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 0,
+    ):
+        """
+        Constructor.
+
+        Args:
+            cose (Optional[COSE]): A COSE object used for the operations. If it is
+                not specified, ``COSE()`` is used.
+            executor (Optional[Executor]): An executor on which the COSE operations
+                are run. If it is not specified, a ``ThreadPoolExecutor`` owned by
+                this object is used.
+            max_concurrency (int): The maximum number of the operations executed
+                concurrently. ``0`` means ``min(32, os.cpu_count() + 4)``
+                (default value: ``0``).
+        Returns:
+            AsyncCOSE: An AsyncCOSE object.
+        Raises:
+            ValueError: Invalid arguments.
+        """
+        return cls(cose, executor, max_concurrency)
+
+    @property
+    def cose(self) -> COSE:
+        """
+        The COSE object used for the operations.
+        """
+        return self._cose
+
+    async def encode_and_mac(
+        self,
+        payload: bytes,
+        key: COSEKeyInterface,
+        protected: Optional[Union[dict, bytes]] = None,
+        unprotected: Optional[dict] = None,
+        recipients: Optional[List[RecipientInterface]] = None,
+        external_aad: bytes = b"",
+        out: str = "",
+    ) -> Union[bytes, CBORTag]:
+        """
+        Encodes data with MAC. See :func:`COSE.encode_and_mac
+        <cwt.COSE.encode_and_mac>`.
+        """
+        return await self._run(
+            self._cose.encode_and_mac,
+            payload,
+            key,
+            protected,
+            unprotected,
+            recipients,
+            external_aad,
+            out,
+        )
+
+    async def encode_and_sign(
+        self,
+        payload: bytes,
+        key: Optional[COSEKeyInterface] = None,
+        protected: Optional[Union[dict, bytes]] = None,
+        unprotected: Optional[dict] = None,
+        signers: List[Signer] = [],
+        external_aad: bytes = b"",
+        out: str = "",
+    ) -> Union[bytes, CBORTag]:
+        """
+        Encodes data with signing. See :func:`COSE.encode_and_sign
+        <cwt.COSE.encode_and_sign>`.
+        """
+        return await self._run(
+            self._cose.encode_and_sign,
+            payload,
+            key,
+            protected,
+            unprotected,
+            signers,
+            external_aad,
+            out,
+        )
+
+    async def encode_and_encrypt(
+        self,
+        payload: bytes,
+        key: COSEKeyInterface,
+        protected: Optional[Union[dict, bytes]] = None,
+        unprotected: Optional[dict] = None,
+        nonce: bytes = b"",
+        recipients: Optional[List[RecipientInterface]] = None,
+        external_aad: bytes = b"",
+        out: str = "",
+    ) -> bytes:
+        """
+        Encodes data with encryption. See :func:`COSE.encode_and_encrypt
+        <cwt.COSE.encode_and_encrypt>`.
+        """
+        return await self._run(
+            self._cose.encode_and_encrypt,
+            payload,
+            key,
+            protected,
+            unprotected,
+            nonce,
+            recipients,
+            external_aad,
+            out,
+        )
+
+    async def decode(
+        self,
+        data: Union[bytes, CBORTag],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        context: Optional[Union[Dict[str, Any], List[Any]]] = None,
+        external_aad: bytes = b"",
+    ) -> bytes:
+        """
+        Verifies and decodes COSE data. See :func:`COSE.decode <cwt.COSE.decode>`.
+
+        Examples:
+
+            >>> import asyncio
+            >>> from cwt import COSE, COSEKey
+            >>> from cwt.aio import AsyncCOSE
+            >>> mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+            >>> encoded = COSE.new().encode_and_mac(b"Hello world!", mac_key)
+            >>> async def main():
+            ...     async with AsyncCOSE.new(max_concurrency=4) as ctx:
+            ...         return await ctx.decode(encoded, mac_key)
+            ...
+            >>> asyncio.run(main())
+            b'Hello world!'
+        """
+        return await self._run(self._cose.decode, data, keys, context, external_aad)
+
+
+class AsyncCWT(_AsyncRunner):
+    """
+    An asyncio interface of :class:`CWT <cwt.CWT>`. The CWT operations are
+    offloaded to an executor so that they do not block the event loop.
+    """
+
+    def __init__(
+        self,
+        cwt: Optional[CWT] = None,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 0,
+    ):
+        super().__init__(executor, max_concurrency)
+        self._cwt = cwt if cwt else CWT()
+        return
+
+    @classmethod
+    def new(
+        cls,
+        cwt: Optional[CWT] = None,
+        executor: Optional[Executor] = None,
+        max_concurrency: int = 0,
+    ):
+        """
+        Constructor.
+
+        Args:
+            cwt (Optional[CWT]): A CWT object used for the operations. If it is
+                not specified, ``CWT()`` is used.
+            executor (Optional[Executor]): An executor on which the CWT operations
+                are run. If it is not specified, a ``ThreadPoolExecutor`` owned by
+                this object is used.
+            max_concurrency (int): The maximum number of the operations executed
+                concurrently. ``0`` means ``min(32, os.cpu_count() + 4)``
+                (default value: ``0``).
+        Returns:
+            AsyncCWT: An AsyncCWT object.
+        Raises:
+            ValueError: Invalid arguments.
+
+        Examples:
+
+            >>> import asyncio
+            >>> from cwt import COSEKey
+            >>> from cwt.aio import AsyncCWT
+            >>> key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+            >>> async def main():
+            ...     async with AsyncCWT.new(max_concurrency=4) as ctx:
+            ...         token = await ctx.encode({"iss": "coaps://as.example"}, key)
+            ...         return await ctx.decode(token, key)
+            ...
+            >>> asyncio.run(main())[1]
+            'coaps://as.example'
+        """
+        return cls(cwt, executor, max_concurrency)
+
+    @property
+    def cwt(self) -> CWT:
+        """
+        The CWT object used for the operations.
+        """
+        return self._cwt
+
+    async def encode(
+        self,
+        claims: Union[Claims, Dict[str, Any], Dict[int, Any], bytes],
+        key: COSEKeyInterface,
+        nonce: bytes = b"",
+        recipients: Optional[List[RecipientInterface]] = None,
+        signers: List[Signer] = [],
+        tagged: bool = False,
+    ) -> bytes:
+        """
+        Encodes CWT with MAC, signing or encryption. See :func:`CWT.encode
+        <cwt.CWT.encode>`.
+        """
+        return await self._run(
+            self._cwt.encode, claims, key, nonce, recipients, signers, tagged
+        )
+
+    async def decode(
+        self,
+        data: bytes,
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        no_verify: bool = False,
+    ) -> Union[Dict[int, Any], bytes]:
+        """
+        Verifies and decodes CWT. See :func:`CWT.decode <cwt.CWT.decode>`.
+        """
+        return await self._run(self._cwt.decode, data, keys, no_verify)
@@ -8,6 +8,7 @@ from cryptography.hazmat.primitives.asymmetric.ec import (
     EllipticCurvePublicKey,
 )
 from cryptography.hazmat.primitives.asymmetric.utils import (
+    Prehashed,
     decode_dss_signature,
     encode_dss_signature,
 )
@@ -23,7 +24,7 @@ from ..const import (
 )
 from ..cose_key_interface import COSEKeyInterface
 from ..exceptions import EncodeError, VerifyError
-from ..utils import i2osp, os2ip, to_cis
+from ..utils import i2osp, os2ip, to_bytes, to_cis
 from .symmetric import AESCCMKey, AESGCMKey, ChaCha20Key, HMACKey
 
 
@@ -275,11 +276,57 @@ class EC2Key(COSEKeyInterface):
             if self._private_key:
                 der_sig = self._os_to_der(self._private_key.curve.key_size, sig)
                 self._private_key.public_key().verify(
-                    der_sig, msg, ec.ECDSA(self._hash_alg())
+                    der_sig, to_bytes(msg), ec.ECDSA(self._hash_alg())
                 )
             else:
                 der_sig = self._os_to_der(self._public_key.curve.key_size, sig)
-                self._public_key.verify(der_sig, msg, ec.ECDSA(self._hash_alg()))
+                self._public_key.verify(
+                    der_sig, to_bytes(msg), ec.ECDSA(self._hash_alg())
+                )
+        except cryptography.exceptions.InvalidSignature as err:
+            raise VerifyError("Failed to verify.") from err
+        except ValueError as err:
+            raise VerifyError("Invalid signature.") from err
+
+    def try_verify(self, msg: bytes, sig: bytes) -> bool:
+        try:
+            if self._private_key:
+                der_sig = self._os_to_der(self._private_key.curve.key_size, sig)
+                self._private_key.public_key().verify(
+                    der_sig, to_bytes(msg), ec.ECDSA(self._hash_alg())
+                )
+            else:
+                der_sig = self._os_to_der(self._public_key.curve.key_size, sig)
+                self._public_key.verify(
+                    der_sig, to_bytes(msg), ec.ECDSA(self._hash_alg())
+                )
+            return True
+        except cryptography.exceptions.InvalidSignature:
+            return False
+        except ValueError as err:
+            raise VerifyError("Invalid signature.") from err
+
+    def new_hash(self) -> Any:
+        return hashes.Hash(self._hash_alg())
+
+    def sign_prehashed(self, digest: bytes) -> bytes:
+        if self._public_key:
+            raise ValueError("Public key cannot be used for signing.")
+        try:
+            sig = self._private_key.sign(digest, ec.ECDSA(Prehashed(self._hash_alg())))
+            return self._der_to_os(self._private_key.curve.key_size, sig)
+        except Exception as err:
+            raise EncodeError("Failed to sign.") from err
+
+    def verify_prehashed(self, digest: bytes, sig: bytes):
+        try:
+            public_key = (
+                self._private_key.public_key()
+                if self._private_key
+                else self._public_key
+            )
+            der_sig = self._os_to_der(public_key.curve.key_size, sig)
+            public_key.verify(der_sig, digest, ec.ECDSA(Prehashed(self._hash_alg())))
         except cryptography.exceptions.InvalidSignature as err:
             raise VerifyError("Failed to verify.") from err
         except ValueError as err:
@@ -33,7 +33,7 @@ from ..const import (  # COSE_KEY_LEN,
 )
 from ..cose_key_interface import COSEKeyInterface
 from ..exceptions import EncodeError, VerifyError
-from ..utils import to_cis
+from ..utils import to_bytes, to_cis
 from .symmetric import AESCCMKey, AESGCMKey, ChaCha20Key, HMACKey
 
 
@@ -286,12 +286,22 @@ class OKPKey(COSEKeyInterface):
     def verify(self, msg: bytes, sig: bytes):
         try:
             if self._private_key:
-                self._private_key.public_key().verify(sig, msg)
+                self._private_key.public_key().verify(to_bytes(sig), to_bytes(msg))
             else:
-                self._public_key.verify(sig, msg)
+                self._public_key.verify(to_bytes(sig), to_bytes(msg))
         except cryptography.exceptions.InvalidSignature as err:
             raise VerifyError("Failed to verify.") from err
 
+    def try_verify(self, msg: bytes, sig: bytes) -> bool:
+        try:
+            if self._private_key:
+                self._private_key.public_key().verify(to_bytes(sig), to_bytes(msg))
+            else:
+                self._public_key.verify(to_bytes(sig), to_bytes(msg))
+            return True
+        except cryptography.exceptions.InvalidSignature:
+            return False
+
     def derive_key(
         self,
         context: Union[List[Any], Dict[str, Any]],
@@ -1,5 +1,6 @@
 from typing import Any, Dict
 
+from cryptography.exceptions import InvalidSignature
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.asymmetric.rsa import (
@@ -7,10 +8,12 @@ from cryptography.hazmat.primitives.asymmetric.rsa import (
     RSAPublicKey,
     RSAPublicNumbers,
 )
+from cryptography.hazmat.primitives.asymmetric.utils import Prehashed
 
 from ..const import COSE_ALGORITHMS_RSA, COSE_KEY_OPERATION_VALUES
 from ..cose_key_interface import COSEKeyInterface
 from ..exceptions import EncodeError, VerifyError
+from ..utils import to_bytes
 
 
 class RSAKey(COSEKeyInterface):
@@ -140,6 +143,8 @@ class RSAKey(COSEKeyInterface):
             raise EncodeError("Failed to sign.") from err
 
     def verify(self, msg: bytes, sig: bytes):
+        msg = to_bytes(msg)
+        sig = to_bytes(sig)
         try:
             if isinstance(self._key, RSAPublicKey):
                 self._key.verify(sig, msg, self._padding, self._hash())
@@ -147,3 +152,40 @@ class RSAKey(COSEKeyInterface):
                 self._key.public_key().verify(sig, msg, self._padding, self._hash())
         except Exception as err:
             raise VerifyError("Failed to verify.") from err
+
+    def try_verify(self, msg: bytes, sig: bytes) -> bool:
+        msg = to_bytes(msg)
+        sig = to_bytes(sig)
+        try:
+            if isinstance(self._key, RSAPublicKey):
+                self._key.verify(sig, msg, self._padding, self._hash())
+            else:
+                self._key.public_key().verify(sig, msg, self._padding, self._hash())
+            return True
+        except InvalidSignature:
+            return False
+        except Exception as err:
+            raise VerifyError("Failed to verify.") from err
+
+    def new_hash(self) -> Any:
+        return hashes.Hash(self._hash())
+
+    def sign_prehashed(self, digest: bytes) -> bytes:
+        if isinstance(self._key, RSAPublicKey):
+            raise ValueError("Public key cannot be used for signing.")
+        try:
+            return self._key.sign(digest, self._padding, Prehashed(self._hash()))
+        except Exception as err:
+            raise EncodeError("Failed to sign.") from err
+
+    def verify_prehashed(self, digest: bytes, sig: bytes):
+        sig = to_bytes(sig)
+        try:
+            public_key = (
+                self._key
+                if isinstance(self._key, RSAPublicKey)
+                else self._key.public_key()
+            )
+            public_key.verify(sig, digest, self._padding, Prehashed(self._hash()))
+        except Exception as err:
+            raise VerifyError("Failed to verify.") from err
@@ -3,12 +3,15 @@ import hmac
 from secrets import token_bytes
 from typing import Any, Dict, Optional
 
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESCCM, AESGCM, ChaCha20Poly1305
 from cryptography.hazmat.primitives.keywrap import aes_key_unwrap, aes_key_wrap
 
 from ..const import COSE_KEY_OPERATION_VALUES
 from ..cose_key_interface import COSEKeyInterface
 from ..exceptions import DecodeError, EncodeError, VerifyError
+from ..utils import to_bytes
 
 _CWT_DEFAULT_KEY_SIZE_HMAC256 = 32  # bytes
 _CWT_DEFAULT_KEY_SIZE_HMAC384 = 48
@@ -17,6 +20,23 @@ _CWT_NONCE_SIZE_AESGCM = 12
 _CWT_NONCE_SIZE_CHACHA20_POLY1305 = 12
 
 
+def _try_decrypt(
+    cipher: Any, msg: bytes, nonce: bytes, aad: Optional[bytes]
+) -> Optional[bytes]:
+    # Decrypts with an AEAD cipher and returns None if the message cannot be
+    # authenticated.
+    try:
+        return cipher.decrypt(
+            to_bytes(nonce),
+            to_bytes(msg),
+            to_bytes(aad) if aad is not None else None,
+        )
+    except InvalidTag:
+        return None
+    except Exception as err:
+        raise DecodeError("Failed to decrypt.") from err
+
+
 class SymmetricKey(COSEKeyInterface):
     def __init__(self, params: Dict[int, Any]):
         super().__init__(params)
@@ -140,9 +160,19 @@ class HMACKey(MACAuthenticationKey):
 
     def verify(self, msg: bytes, sig: bytes):
         """ """
-        if hmac.compare_digest(sig, self.sign(msg)):
-            return
-        raise VerifyError("Failed to compare digest.")
+        err = self.verification_error(msg, sig)
+        if err is not None:
+            raise err
+
+    def verification_error(self, msg: bytes, sig: bytes) -> Optional[VerifyError]:
+        """ """
+        if self.try_verify(msg, sig):
+            return None
+        return VerifyError("Failed to compare digest.")
+
+    def try_verify(self, msg: bytes, sig: bytes) -> bool:
+        """ """
+        return hmac.compare_digest(sig, self.sign(msg))
 
 
 class AESCCMKey(ContentEncryptionKey):
@@ -246,15 +276,21 @@ class AESCCMKey(ContentEncryptionKey):
             raise EncodeError("Failed to encrypt.") from err
 
     def decrypt(self, msg: bytes, nonce: bytes, aad: Optional[bytes] = None) -> bytes:
+        """ """
+        res = self.try_decrypt(msg, nonce, aad)
+        if res is None:
+            raise DecodeError("Failed to decrypt.")
+        return res
+
+    def try_decrypt(
+        self, msg: bytes, nonce: bytes, aad: Optional[bytes] = None
+    ) -> Optional[bytes]:
         """ """
         if len(nonce) != self._nonce_len:
             raise ValueError(
                 "The length of nonce should be %d bytes." % self._nonce_len
             )
-        try:
-            return self._cipher.decrypt(nonce, msg, aad)
-        except Exception as err:
-            raise DecodeError("Failed to decrypt.") from err
+        return _try_decrypt(self._cipher, msg, nonce, aad)
 
 
 class AESGCMKey(ContentEncryptionKey):
@@ -299,9 +335,35 @@ class AESGCMKey(ContentEncryptionKey):
             raise EncodeError("Failed to encrypt.") from err
 
     def decrypt(self, msg: bytes, nonce: bytes, aad: Optional[bytes] = None) -> bytes:
+        """ """
+        res = self.try_decrypt(msg, nonce, aad)
+        if res is None:
+            raise DecodeError("Failed to decrypt.")
+        return res
+
+    def try_decrypt(
+        self, msg: bytes, nonce: bytes, aad: Optional[bytes] = None
+    ) -> Optional[bytes]:
+        """ """
+        return _try_decrypt(self._cipher, msg, nonce, aad)
+
+    def new_encryptor(self, nonce: bytes, aad: bytes) -> Any:
+        """ """
+        try:
+            ctx = Cipher(algorithms.AES(self._key), modes.GCM(nonce)).encryptor()
+            ctx.authenticate_additional_data(aad)
+            return ctx
+        except Exception as err:
+            raise EncodeError("Failed to encrypt.") from err
+
+    def new_decryptor(self, nonce: bytes, aad: bytes) -> Any:
         """ """
         try:
-            return self._cipher.decrypt(nonce, msg, aad)
+            ctx = Cipher(
+                algorithms.AES(self._key), modes.GCM(to_bytes(nonce))
+            ).decryptor()
+            ctx.authenticate_additional_data(to_bytes(aad))
+            return ctx
         except Exception as err:
             raise DecodeError("Failed to decrypt.") from err
 
@@ -333,10 +395,15 @@ class ChaCha20Key(ContentEncryptionKey):
             raise EncodeError("Failed to encrypt.") from err
 
     def decrypt(self, msg: bytes, nonce: bytes, aad: Optional[bytes] = None) -> bytes:
-        try:
-            return self._cipher.decrypt(nonce, msg, aad)
-        except Exception as err:
-            raise DecodeError("Failed to decrypt.") from err
+        res = self.try_decrypt(msg, nonce, aad)
+        if res is None:
+            raise DecodeError("Failed to decrypt.")
+        return res
+
+    def try_decrypt(
+        self, msg: bytes, nonce: bytes, aad: Optional[bytes] = None
+    ) -> Optional[bytes]:
+        return _try_decrypt(self._cipher, msg, nonce, aad)
 
 
 class AESKeyWrap(SymmetricKey):
@@ -0,0 +1,129 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    A thread-safe LRU cache whose entries have their own expiration time. The
+    expired entries are removed (and passed to ``on_evict``) on every access to
+    the cache, not only when they are looked up again.
+    """
+
+    def __init__(self, max_size: int, on_evict: Optional[Callable[[Any], None]] = None):
+        """
+        Constructor.
+
+        Args:
+            max_size (int): The maximum number of entries.
+            on_evict (Optional[Callable[[Any], None]]): A function called with the
+                value of an entry when the entry is evicted or expired.
+        """
+        if not isinstance(max_size, int):
+            raise ValueError("max_size should be int.")
+        if max_size <= 0:
+            raise ValueError("max_size should be positive number.")
+        self._max_size = max_size
+        self._on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        # The expiration times of the entries in ascending order. The records of
+        # the entries which have already been removed are skipped on purging.
+        self._expiry: List[Tuple[float, int, Hashable]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        return
+
+    @property
+    def max_size(self) -> int:
+        """
+        The maximum number of entries.
+        """
+        return self._max_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Returns the value of the entry which is not expired yet.
+
+        Args:
+            key (Hashable): The key of the entry.
+        Returns:
+            Any: The value of the entry or ``None`` if it is not found.
+        """
+        with self._lock:
+            self._purge(time.time())
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, expires_at: float):
+        """
+        Adds an entry. The least recently used entry is evicted if the number
+        of entries exceeds the maximum.
+
+        Args:
+            key (Hashable): The key of the entry.
+            value (Any): The value of the entry.
+            expires_at (float): The expiration time of the entry as seconds since
+                the epoch.
+        """
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            if expires_at <= now:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None and old[0] is not value:
+                self._evicted(old[0])
+            self._entries[key] = (value, expires_at)
+            heapq.heappush(self._expiry, (expires_at, next(self._seq), key))
+            while len(self._entries) > self._max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._evicted(evicted[0])
+            # Drops the records of the entries removed before their expiration.
+            if len(self._expiry) > 2 * self._max_size:
+                self._expiry = [
+                    (e[1], next(self._seq), k) for k, e in self._entries.items()
+                ]
+                heapq.heapify(self._expiry)
+        return
+
+    def purge(self):
+        """
+        Removes all of the expired entries.
+        """
+        with self._lock:
+            self._purge(time.time())
+        return
+
+    def clear(self):
+        """
+        Removes all of the entries.
+        """
+        with self._lock:
+            self._expiry = []
+            while self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._evicted(evicted[0])
+        return
+
+    def _purge(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, _, key = heapq.heappop(self._expiry)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self._entries[key]
+                self._evicted(entry[0])
+        return
+
+    def _evicted(self, value: Any):
+        if self._on_evict:
+            self._on_evict(value)
+        return
@@ -1,19 +1,67 @@
-from typing import Any, Dict, List
+import struct
+from typing import Any, Dict, List, Optional
 
 from cbor2 import dumps, loads
 
+from .cbor_profile import CBORProfile
 from .const import COSE_ALGORITHMS_SYMMETRIC
 from .exceptions import DecodeError, EncodeError
 
 
 class CBORProcessor:
+    _cbor_profile: Optional[CBORProfile] = None
+
     def _dumps(self, obj: Any) -> bytes:
         try:
             return dumps(obj)
         except Exception as err:
             raise EncodeError("Failed to encode.") from err
 
+    def _dumps_structure(self, items: List[Any]) -> bytes:
+        return b"".join(self._structure_chunks(items))
+
+    def _structure_chunks(self, items: List[Any]) -> List[Any]:
+        """
+        Returns the chunks of a CBOR-encoded Sig_structure, MAC_structure or
+        Enc_structure (a context string followed by byte strings). The headers
+        are written directly and the byte strings given are used as they are
+        without being copied, so that the chunks can be joined or fed to a hash
+        function one by one.
+        """
+        if not isinstance(items[0], str) or not all(
+            isinstance(v, (bytes, bytearray, memoryview)) for v in items[1:]
+        ):
+            return [self._dumps(items)]
+        ctx = items[0].encode("utf-8")
+        chunks: List[Any] = [
+            self._dumps_head(4, len(items)),
+            self._dumps_head(3, len(ctx)),
+            ctx,
+        ]
+        for v in items[1:]:
+            chunks.append(
+                self._dumps_head(
+                    2, len(v) if not isinstance(v, memoryview) else v.nbytes
+                )
+            )
+            chunks.append(v)
+        return chunks
+
+    def _dumps_head(self, major: int, n: int) -> bytes:
+        mt = major << 5
+        if n < 24:
+            return bytes([mt | n])
+        if n < 0x100:
+            return bytes([mt | 24, n])
+        if n < 0x10000:
+            return struct.pack(">BH", mt | 25, n)
+        if n < 0x100000000:
+            return struct.pack(">BI", mt | 26, n)
+        return struct.pack(">BQ", mt | 27, n)
+
     def _loads(self, s: bytes) -> Dict[int, Any]:
+        if self._cbor_profile:
+            self._cbor_profile.check(s)
         try:
             return loads(s)
         except Exception as err:
@@ -0,0 +1,113 @@
+from typing import Any, Optional
+
+from .cbor_reader import check_item
+from .exceptions import DecodeLimitError
+
+
+class CBORProfile:
+    """
+    A resource limit profile for decoding CBOR data.
+
+    CBOR data is checked against the profile by walking through its encoded
+    form before being decoded with cbor2, so that the data which declares
+    huge lengths or deep nesting is rejected without allocating the declared
+    sizes. ``None`` for each of the limits means no limit.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_items: Optional[int] = None,
+        max_bstr_length: Optional[int] = None,
+    ):
+        self._max_bytes = self._validate("max_bytes", max_bytes)
+        self._max_depth = self._validate("max_depth", max_depth)
+        self._max_items = self._validate("max_items", max_items)
+        self._max_bstr_length = self._validate("max_bstr_length", max_bstr_length)
+        return
+
+    @classmethod
+    def new(
+        cls,
+        max_bytes: Optional[int] = None,
+        max_depth: Optional[int] = None,
+        max_items: Optional[int] = None,
+        max_bstr_length: Optional[int] = None,
+    ):
+        """
+        Creates a resource limit profile for decoding CBOR data.
+
+        Args:
+            max_bytes (Optional[int]): The maximum size in bytes of encoded data.
+            max_depth (Optional[int]): The maximum nesting depth of arrays, maps
+                and tags. The top-level data item is at depth ``0``.
+            max_items (Optional[int]): The maximum number of the data items
+                (including the ones nested in arrays, maps and tags).
+            max_bstr_length (Optional[int]): The maximum length of a byte string.
+        Returns:
+            CBORProfile: A resource limit profile.
+        Raises:
+            ValueError: Invalid arguments.
+
+        Examples:
+
+            >>> from cwt import COSE, CBORProfile
+            >>> ctx = COSE.new(
+            ...     cbor_profile=CBORProfile.new(max_bytes=4096, max_depth=8)
+            ... )
+        """
+        return cls(max_bytes, max_depth, max_items, max_bstr_length)
+
+    @property
+    def max_bytes(self) -> Optional[int]:
+        """
+        The maximum size in bytes of encoded data.
+        """
+        return self._max_bytes
+
+    @property
+    def max_depth(self) -> Optional[int]:
+        """
+        The maximum nesting depth of arrays, maps and tags.
+        """
+        return self._max_depth
+
+    @property
+    def max_items(self) -> Optional[int]:
+        """
+        The maximum number of the data items.
+        """
+        return self._max_items
+
+    @property
+    def max_bstr_length(self) -> Optional[int]:
+        """
+        The maximum length of a byte string.
+        """
+        return self._max_bstr_length
+
+    def check(self, data: Any):
+        """
+        Checks encoded CBOR data against the profile.
+
+        Args:
+            data (Any): CBOR-encoded data (bytes or a bytes-like object).
+        Raises:
+            DecodeError: Failed to decode.
+            DecodeLimitError: The data exceeds one of the limits.
+        """
+        if self._max_bytes is not None and len(data) > self._max_bytes:
+            raise DecodeLimitError("The size of CBOR data exceeds the limit.")
+        check_item(data, 0, self._max_depth, self._max_items, self._max_bstr_length)
+        return
+
+    @staticmethod
+    def _validate(name: str, limit: Optional[int]) -> Optional[int]:
+        if limit is None:
+            return None
+        if not isinstance(limit, int) or isinstance(limit, bool):
+            raise ValueError(f"{name} should be int.")
+        if limit < 0:
+            raise ValueError(f"{name} should not be negative number.")
+        return limit
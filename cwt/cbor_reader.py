@@ -0,0 +1,290 @@
+from typing import Any, List, Optional, Tuple
+
+from .exceptions import DecodeError, DecodeLimitError
+
+# The number of the bytes of the argument following the initial byte.
+_ARG_SIZES = {24: 1, 25: 2, 26: 4, 27: 8}
+
+_MAX_DEPTH = 256
+
+_CHUNK_SIZE = 65536
+
+
+def read_head(data: Any, pos: int) -> Tuple[int, int, int]:
+    """
+    Reads the head of a CBOR data item.
+
+    Args:
+        data (Any): A buffer of CBOR-encoded data.
+        pos (int): The offset of the data item.
+    Returns:
+        Tuple[int, int, int]: The major type, the argument (``-1`` for the
+            indefinite length) and the offset next to the head.
+    Raises:
+        DecodeError: Failed to decode.
+    """
+    try:
+        ib = data[pos]
+    except IndexError:
+        raise DecodeError("Failed to decode.")
+    major = ib >> 5
+    info = ib & 0x1F
+    pos += 1
+    if info < 24:
+        return major, info, pos
+    if info in _ARG_SIZES:
+        end = pos + _ARG_SIZES[info]
+        if end > len(data):
+            raise DecodeError("Failed to decode.")
+        return major, int.from_bytes(data[pos:end], "big"), end
+    if info == 31 and major in (2, 3, 4, 5, 7):
+        return major, -1, pos
+    raise DecodeError("Failed to decode.")
+
+
+def skip_item(data: Any, pos: int, depth: int = 0) -> int:
+    """
+    Skips a CBOR data item without decoding it.
+
+    Args:
+        data (Any): A buffer of CBOR-encoded data.
+        pos (int): The offset of the data item.
+        depth (int): The nesting depth of the data item.
+    Returns:
+        int: The offset next to the data item.
+    Raises:
+        DecodeError: Failed to decode.
+    """
+    if depth > _MAX_DEPTH:
+        raise DecodeError("Failed to decode.")
+    major, arg, pos = read_head(data, pos)
+    if major in (0, 1):
+        return pos
+    if major in (2, 3):
+        if arg >= 0:
+            return _forward(data, pos, arg)
+        while not _is_break(data, pos):
+            m, n, pos = read_head(data, pos)
+            if m != major or n < 0:
+                raise DecodeError("Failed to decode.")
+            pos = _forward(data, pos, n)
+        return pos + 1
+    if major == 6:
+        return skip_item(data, pos, depth + 1)
+    if major == 7:
+        if arg < 0:
+            # A break outside of indefinite-length items.
+            raise DecodeError("Failed to decode.")
+        return pos
+    # Arrays and maps.
+    n = arg * 2 if major == 5 and arg >= 0 else arg
+    if n >= 0:
+        for _ in range(n):
+            pos = skip_item(data, pos, depth + 1)
+        return pos
+    while not _is_break(data, pos):
+        pos = skip_item(data, pos, depth + 1)
+    return pos + 1
+
+
+def check_item(
+    data: Any,
+    pos: int,
+    max_depth: Optional[int] = None,
+    max_items: Optional[int] = None,
+    max_bstr_length: Optional[int] = None,
+) -> int:
+    """
+    Walks through a CBOR data item without decoding it and checks it against
+    the limits. The declared lengths are compared with the size of the buffer
+    and the limits before being followed, so that nothing is allocated for them.
+
+    Args:
+        data (Any): A buffer of CBOR-encoded data.
+        pos (int): The offset of the data item.
+        max_depth (Optional[int]): The maximum nesting depth.
+        max_items (Optional[int]): The maximum number of the data items.
+        max_bstr_length (Optional[int]): The maximum length of a byte string.
+    Returns:
+        int: The offset next to the data item.
+    Raises:
+        DecodeError: Failed to decode.
+        DecodeLimitError: The data item exceeds one of the limits.
+    """
+    return _check_item(data, pos, 0, [0], max_depth, max_items, max_bstr_length)
+
+
+def _check_item(
+    data: Any,
+    pos: int,
+    depth: int,
+    count: List[int],
+    max_depth: Optional[int],
+    max_items: Optional[int],
+    max_bstr_length: Optional[int],
+) -> int:
+    if max_depth is not None and depth > max_depth:
+        raise DecodeLimitError("The nesting depth of CBOR data exceeds the limit.")
+    if depth > _MAX_DEPTH:
+        raise DecodeError("Failed to decode.")
+    count[0] += 1
+    if max_items is not None and count[0] > max_items:
+        raise DecodeLimitError("The number of CBOR data items exceeds the limit.")
+    major, arg, pos = read_head(data, pos)
+    if major in (0, 1):
+        return pos
+    if major in (2, 3):
+        if arg >= 0:
+            if major == 2 and max_bstr_length is not None and arg > max_bstr_length:
+                raise DecodeLimitError("The length of byte string exceeds the limit.")
+            return _forward(data, pos, arg)
+        length = 0
+        while not _is_break(data, pos):
+            m, n, pos = read_head(data, pos)
+            if m != major or n < 0:
+                raise DecodeError("Failed to decode.")
+            length += n
+            if major == 2 and max_bstr_length is not None and length > max_bstr_length:
+                raise DecodeLimitError("The length of byte string exceeds the limit.")
+            pos = _forward(data, pos, n)
+        return pos + 1
+    args = (count, max_depth, max_items, max_bstr_length)
+    if major == 6:
+        return _check_item(data, pos, depth + 1, *args)
+    if major == 7:
+        if arg < 0:
+            raise DecodeError("Failed to decode.")
+        return pos
+    # Arrays and maps.
+    n = arg * 2 if major == 5 and arg >= 0 else arg
+    if n >= 0:
+        # Each of the items takes one byte at least.
+        if n > len(data) - pos:
+            raise DecodeError("Failed to decode.")
+        if max_items is not None and count[0] + n > max_items:
+            raise DecodeLimitError("The number of CBOR data items exceeds the limit.")
+        for _ in range(n):
+            pos = _check_item(data, pos, depth + 1, *args)
+        return pos
+    while not _is_break(data, pos):
+        pos = _check_item(data, pos, depth + 1, *args)
+    return pos + 1
+
+
+def read_item(fp: Any, max_bytes: Optional[int] = None) -> Optional[bytes]:
+    """
+    Reads a CBOR data item from a file-like object without decoding it. Only the
+    bytes of the data item are consumed, so that the following data items of a
+    CBOR Sequence can be read with the subsequent calls.
+
+    Args:
+        fp (Any): A file-like object which has ``read()``.
+        max_bytes (Optional[int]): The maximum size in bytes of the data item.
+    Returns:
+        Optional[bytes]: The encoded data item, or ``None`` if the object is at
+            the end of the stream.
+    Raises:
+        DecodeError: Failed to decode.
+        DecodeLimitError: The data item exceeds the limit.
+    """
+    ib = fp.read(1)
+    if not ib:
+        return None
+    buf = bytearray(ib)
+    _read_rest(fp, buf, ib[0], 0, max_bytes)
+    return bytes(buf)
+
+
+def _read_rest(fp: Any, buf: bytearray, ib: int, depth: int, max_bytes: Optional[int]):
+    if depth > _MAX_DEPTH:
+        raise DecodeError("Failed to decode.")
+    major = ib >> 5
+    info = ib & 0x1F
+    if info < 24:
+        arg = info
+    elif info in _ARG_SIZES:
+        size = _ARG_SIZES[info]
+        _read_into(fp, buf, size, max_bytes)
+        arg = int.from_bytes(buf[-size:], "big")
+    elif info == 31 and major in (2, 3, 4, 5, 7):
+        arg = -1
+    else:
+        raise DecodeError("Failed to decode.")
+    if major in (0, 1):
+        return
+    if major in (2, 3):
+        if arg >= 0:
+            _read_into(fp, buf, arg, max_bytes)
+            return
+        while True:
+            ib = _read_byte(fp, buf, max_bytes)
+            if ib == 0xFF:
+                return
+            if ib >> 5 != major or ib & 0x1F == 31:
+                raise DecodeError("Failed to decode.")
+            _read_rest(fp, buf, ib, depth, max_bytes)
+    if major == 7:
+        if arg < 0:
+            raise DecodeError("Failed to decode.")
+        return
+    n = 1 if major == 6 else arg * 2 if major == 5 and arg >= 0 else arg
+    if n >= 0:
+        for _ in range(n):
+            ib = _read_byte(fp, buf, max_bytes)
+            _read_rest(fp, buf, ib, depth + 1, max_bytes)
+        return
+    while True:
+        ib = _read_byte(fp, buf, max_bytes)
+        if ib == 0xFF:
+            return
+        _read_rest(fp, buf, ib, depth + 1, max_bytes)
+
+
+def _read_byte(fp: Any, buf: bytearray, max_bytes: Optional[int]) -> int:
+    _read_into(fp, buf, 1, max_bytes)
+    return buf[-1]
+
+
+def _read_into(fp: Any, buf: bytearray, n: int, max_bytes: Optional[int]):
+    if max_bytes is not None and len(buf) + n > max_bytes:
+        raise DecodeLimitError("The size of CBOR data exceeds the limit.")
+    # The declared length is not trusted, so the content is read in chunks
+    # instead of being allocated at once.
+    while n > 0:
+        chunk = fp.read(min(n, _CHUNK_SIZE))
+        if not chunk:
+            raise DecodeError("Failed to decode.")
+        buf += chunk
+        n -= len(chunk)
+
+
+def bstr_range(data: Any, pos: int) -> Optional[Tuple[int, int]]:
+    """
+    Returns the range of the content of a definite-length byte string.
+
+    Args:
+        data (Any): A buffer of CBOR-encoded data.
+        pos (int): The offset of the data item.
+    Returns:
+        Optional[Tuple[int, int]]: The start and end offsets of the content, or
+            ``None`` if the data item is not a definite-length byte string.
+    Raises:
+        DecodeError: Failed to decode.
+    """
+    major, arg, pos = read_head(data, pos)
+    if major != 2 or arg < 0:
+        return None
+    return pos, _forward(data, pos, arg)
+
+
+def _forward(data: Any, pos: int, n: int) -> int:
+    if pos + n > len(data):
+        raise DecodeError("Failed to decode.")
+    return pos + n
+
+
+def _is_break(data: Any, pos: int) -> bool:
+    try:
+        return data[pos] == 0xFF
+    except IndexError:
+        raise DecodeError("Failed to decode.")
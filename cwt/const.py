@@ -132,6 +132,35 @@ COSE_KEY_LEN = {
     33: 256,  # AES-CCM mode 256-bit key, 128-bit tag, 7-byte nonce
 }
 
+# The lengths of the signatures (or the authentication tags) of the algorithms
+# whose signature sizes are fixed.
+COSE_SIGNATURE_LEN = {
+    -47: (64,),  # ES256K
+    -36: (132,),  # ES512
+    -35: (96,),  # ES384
+    -8: (64, 114),  # EdDSA (Ed25519 or Ed448)
+    -7: (64,),  # ES256
+    4: (8,),  # HMAC w/ SHA-256 truncated to 64 bits
+    5: (32,),  # HMAC w/ SHA-256
+    6: (48,),  # HMAC w/ SHA-384
+    7: (64,),  # HMAC w/ SHA-512
+}
+
+COSE_NONCE_LEN = {
+    1: 12,  # AES-GCM mode w/ 128-bit key, 128-bit tag
+    2: 12,  # AES-GCM mode w/ 192-bit key, 128-bit tag
+    3: 12,  # AES-GCM mode w/ 256-bit key, 128-bit tag
+    10: 13,  # AES-CCM mode 128-bit key, 64-bit tag, 13-byte nonce
+    11: 13,  # AES-CCM mode 256-bit key, 64-bit tag, 13-byte nonce
+    12: 7,  # AES-CCM mode 128-bit key, 64-bit tag, 7-byte nonce
+    13: 7,  # AES-CCM mode 256-bit key, 64-bit tag, 7-byte nonce
+    24: 12,  # ChaCha20/Poly1305 w/ 256-bit key, 128-bit tag
+    30: 13,  # AES-CCM mode 128-bit key, 128-bit tag, 13-byte nonce
+    31: 13,  # AES-CCM mode 256-bit key, 128-bit tag, 13-byte nonce
+    32: 7,  # AES-CCM mode 128-bit key, 128-bit tag, 7-byte nonce
+    33: 7,  # AES-CCM mode 256-bit key, 128-bit tag, 7-byte nonce
+}
+
 COSE_ALGORITHMS_CKDM = {
     "direct+HKDF-SHA-512": -11,  # Shared secret w/ HKDF and SHA-512
     "direct+HKDF-SHA-256": -10,  # Shared secret w/ HKDF and SHA-256
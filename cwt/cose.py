@@ -1,15 +1,89 @@
-from typing import Any, Dict, List, Optional, Union
+import hashlib
+import itertools
+import threading
+import time
+import weakref
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from cbor2 import CBORTag
 
+from .cache import LRUCache
 from .cbor_processor import CBORProcessor
-from .const import COSE_ALGORITHMS_RECIPIENT
+from .cbor_profile import CBORProfile
+from .cbor_reader import bstr_range, read_head, skip_item
+from .const import (
+    COSE_ALGORITHMS,
+    COSE_ALGORITHMS_RECIPIENT,
+    COSE_KEY_OPERATION_VALUES,
+    COSE_NONCE_LEN,
+    COSE_SIGNATURE_LEN,
+)
+from .cose_encoder import COSEEncoder
 from .cose_key_interface import COSEKeyInterface
+from .cose_key_ring import COSEKeyRing, _KeyList
+from .cose_message_info import COSEMessageInfo
+from .cose_stream import (
+    Encrypt0StreamDecoder,
+    Encrypt0StreamEncoder,
+    Sign1StreamSigner,
+    Sign1StreamVerifier,
+)
+from .decode_budget import DecodeBudget
+from .exceptions import DecodeError, DecodeLimitError, VerifyError
 from .recipient_interface import RecipientInterface
 from .recipients import Recipients
-from .signer import Signer
+from .signature_policy import SignaturePolicy
+from .signer import Signer, _sign
 from .utils import to_cose_header
 
+# The serial numbers of the keys used to identify the sets of keys.
+_key_serials: "weakref.WeakKeyDictionary[COSEKeyInterface, int]" = (
+    weakref.WeakKeyDictionary()
+)
+_key_serial_counter = itertools.count()
+_key_serials_lock = threading.Lock()
+
+
+def _key_serial(key: COSEKeyInterface) -> int:
+    serial = _key_serials.get(key)
+    if serial is None:
+        with _key_serials_lock:
+            serial = _key_serials.setdefault(key, next(_key_serial_counter))
+    return serial
+
+
+# The candidate keys, the message and the signature to be verified.
+_Trial = Tuple[Tuple[COSEKeyInterface, ...], bytes, bytes]
+
+# The names and the array lengths of the COSE messages.
+_COSE_MESSAGE_FORMATS = {
+    16: ("Encrypt0", 3),
+    96: ("Encrypt", 4),
+    17: ("MAC0", 4),
+    97: ("MAC", 5),
+    18: ("Signature1", 4),
+    98: ("Signature", 4),
+}
+
 
 class COSE(CBORProcessor):
     """
@@ -22,6 +96,20 @@ class COSE(CBORProcessor):
         alg_auto_inclusion: bool = False,
         kid_auto_inclusion: bool = False,
         verify_kid: bool = False,
+        max_signatures: Optional[int] = None,
+        max_recipients: Optional[int] = None,
+        max_key_trials: Optional[int] = None,
+        decode_timeout: Optional[float] = None,
+        cbor_profile: Optional[CBORProfile] = None,
+        allowed_tags: Optional[List[int]] = None,
+        allowed_algs: Optional[List[Union[int, str]]] = None,
+        failed_cache_size: int = 0,
+        failed_cache_ttl: int = 60,
+        cek_cache_size: int = 0,
+        cek_cache_ttl: int = 60,
+        cek_cache_lifetime: Optional[
+            Callable[[COSEKeyInterface, RecipientInterface], Optional[float]]
+        ] = None,
     ):
         if not isinstance(alg_auto_inclusion, bool):
             raise ValueError("alg_auto_inclusion should be bool.")
@@ -35,12 +123,63 @@ class COSE(CBORProcessor):
             raise ValueError("verify_kid should be bool.")
         self._verify_kid = verify_kid
 
+        self._max_signatures = self._validate_limit("max_signatures", max_signatures)
+        self._max_recipients = self._validate_limit("max_recipients", max_recipients)
+        self._max_key_trials = self._validate_limit("max_key_trials", max_key_trials)
+        self._decode_timeout = self._validate_timeout(decode_timeout)
+        self._cbor_profile = cbor_profile
+        self._allowed_tags = self._validate_allowed_tags(allowed_tags)
+        self._allowed_algs = self._validate_allowed_algs(allowed_algs)
+
+        if not isinstance(failed_cache_size, int):
+            raise ValueError("failed_cache_size should be int.")
+        if failed_cache_size < 0:
+            raise ValueError("failed_cache_size should not be negative number.")
+        if not isinstance(failed_cache_ttl, int):
+            raise ValueError("failed_cache_ttl should be int.")
+        if failed_cache_ttl <= 0:
+            raise ValueError("failed_cache_ttl should be positive number.")
+        self._failed_cache_ttl = failed_cache_ttl
+        self._failed_cache: Optional[LRUCache] = (
+            LRUCache(failed_cache_size) if failed_cache_size > 0 else None
+        )
+
+        if not isinstance(cek_cache_size, int):
+            raise ValueError("cek_cache_size should be int.")
+        if cek_cache_size < 0:
+            raise ValueError("cek_cache_size should not be negative number.")
+        if not isinstance(cek_cache_ttl, int):
+            raise ValueError("cek_cache_ttl should be int.")
+        if cek_cache_ttl <= 0:
+            raise ValueError("cek_cache_ttl should be positive number.")
+        if cek_cache_lifetime is not None and not callable(cek_cache_lifetime):
+            raise ValueError("cek_cache_lifetime should be callable.")
+        self._cek_cache_ttl = cek_cache_ttl
+        self._cek_cache_lifetime = cek_cache_lifetime
+        self._cek_cache: Optional[LRUCache] = (
+            Recipients.new_cache(cek_cache_size) if cek_cache_size > 0 else None
+        )
+
     @classmethod
     def new(
         cls,
         alg_auto_inclusion: bool = False,
         kid_auto_inclusion: bool = False,
         verify_kid: bool = False,
+        max_signatures: Optional[int] = None,
+        max_recipients: Optional[int] = None,
+        max_key_trials: Optional[int] = None,
+        decode_timeout: Optional[float] = None,
+        cbor_profile: Optional[CBORProfile] = None,
+        allowed_tags: Optional[List[int]] = None,
+        allowed_algs: Optional[List[Union[int, str]]] = None,
+        failed_cache_size: int = 0,
+        failed_cache_ttl: int = 60,
+        cek_cache_size: int = 0,
+        cek_cache_ttl: int = 60,
+        cek_cache_lifetime: Optional[
+            Callable[[COSEKeyInterface, RecipientInterface], Optional[float]]
+        ] = None,
     ):
         """
         Constructor.
@@ -52,8 +191,71 @@ class COSE(CBORProcessor):
                 in a proper header bucket automatically or not.
             verify_kid(bool): The indicator whether ``kid`` verification is mandatory or
                 not.
+            max_signatures(Optional[int]): The maximum number of the signatures in a
+                COSE_Sign message to be decoded. ``None`` means no limit.
+            max_recipients(Optional[int]): The maximum number of the recipients in a
+                COSE_Encrypt/COSE_Mac message to be decoded. ``None`` means no limit.
+            max_key_trials(Optional[int]): The maximum number of the cryptographic
+                operations with candidate keys (verification, decryption and key
+                unwrapping) spent on decoding a message. ``None`` means no limit.
+            decode_timeout(Optional[float]): The time limit in seconds, measured
+                with a monotonic clock, for decoding a message. ``None`` means no
+                limit. If one of the limits is exceeded, the decoding fails with
+                :class:`DecodeLimitError <cwt.DecodeLimitError>`.
+            cbor_profile(Optional[CBORProfile]): The resource limits applied to
+                the CBOR data to be decoded. ``None`` means no limit.
+            allowed_tags(Optional[List[int]]): The CBOR tags of the COSE messages
+                which can be decoded (e.g., ``[18]`` for COSE_Sign1 only). ``None``
+                means that all of the COSE messages can be decoded.
+            allowed_algs(Optional[List[Union[int, str]]]): The algorithms (labels
+                or names) which can be used in the protected headers of the COSE
+                messages (and of the signatures of COSE_Sign) to be decoded. The
+                messages without ``alg`` in the protected header are rejected if
+                it is specified. ``None`` means that all of the algorithms can be
+                used.
+            failed_cache_size(int): The maximum number of the COSE messages which
+                failed to be decoded to be cached by :func:`decode <cwt.COSE.decode>`.
+                The same message decoded again with the same keys fails with the
+                same class of error without being verified. ``0`` means that the
+                cache is disabled (default value: ``0``).
+            failed_cache_ttl(int): The lifetime in seconds of the entries of the
+                cache for the failed COSE messages (default value: ``60``).
+            cek_cache_size(int): The maximum number of the content keys unwrapped
+                from the recipients (e.g., AES Key Wrap and ECDH-ES/SS+AES Key Wrap)
+                or derived by the recipients (direct+HKDF and ECDH-ES/SS+HKDF) of
+                COSE_Encrypt/COSE_Mac messages to be cached. The same recipient
+                received again with the same key and context is not processed
+                again. The key materials of the evicted entries are zeroized on a
+                best-effort basis. ``0`` means that the cache is disabled (default
+                value: ``0``).
+            cek_cache_ttl(int): The upper limit of the lifetime in seconds of the
+                entries of the cache for the unwrapped content keys (default value:
+                ``60``).
+            cek_cache_lifetime(Optional[Callable]): A function which returns the
+                lifetime in seconds of the cache entry for the content key unwrapped
+                or derived with the key (the first argument) from the recipient (the
+                second argument), e.g., the remaining lifetime of the key. The shorter one of it and
+                ``cek_cache_ttl`` is used, and the content key is not cached if it
+                is not positive. If the function returns ``None`` or it is not
+                specified, ``cek_cache_ttl`` is used.
         """
-        return cls(alg_auto_inclusion, kid_auto_inclusion, verify_kid)
+        return cls(
+            alg_auto_inclusion,
+            kid_auto_inclusion,
+            verify_kid,
+            max_signatures,
+            max_recipients,
+            max_key_trials,
+            decode_timeout,
+            cbor_profile,
+            allowed_tags,
+            allowed_algs,
+            failed_cache_size,
+            failed_cache_ttl,
+            cek_cache_size,
+            cek_cache_ttl,
+            cek_cache_lifetime,
+        )
 
     @property
     def alg_auto_inclusion(self) -> bool:
@@ -95,6 +297,93 @@ class COSE(CBORProcessor):
         self._verify_kid = verify_kid
         return
 
+    @property
+    def max_signatures(self) -> Optional[int]:
+        """
+        The maximum number of the signatures in a COSE_Sign message to be decoded.
+        """
+        return self._max_signatures
+
+    @max_signatures.setter
+    def max_signatures(self, max_signatures: Optional[int]):
+        self._max_signatures = self._validate_limit("max_signatures", max_signatures)
+        return
+
+    @property
+    def max_recipients(self) -> Optional[int]:
+        """
+        The maximum number of the recipients in a COSE_Encrypt/COSE_Mac message to
+        be decoded.
+        """
+        return self._max_recipients
+
+    @max_recipients.setter
+    def max_recipients(self, max_recipients: Optional[int]):
+        self._max_recipients = self._validate_limit("max_recipients", max_recipients)
+        return
+
+    @property
+    def max_key_trials(self) -> Optional[int]:
+        """
+        The maximum number of the cryptographic operations with candidate keys
+        spent on decoding a message.
+        """
+        return self._max_key_trials
+
+    @max_key_trials.setter
+    def max_key_trials(self, max_key_trials: Optional[int]):
+        self._max_key_trials = self._validate_limit("max_key_trials", max_key_trials)
+        return
+
+    @property
+    def decode_timeout(self) -> Optional[float]:
+        """
+        The time limit in seconds for decoding a message.
+        """
+        return self._decode_timeout
+
+    @decode_timeout.setter
+    def decode_timeout(self, decode_timeout: Optional[float]):
+        self._decode_timeout = self._validate_timeout(decode_timeout)
+        return
+
+    @property
+    def cbor_profile(self) -> Optional[CBORProfile]:
+        """
+        The resource limits applied to the CBOR data to be decoded.
+        """
+        return self._cbor_profile
+
+    @cbor_profile.setter
+    def cbor_profile(self, cbor_profile: Optional[CBORProfile]):
+        self._cbor_profile = cbor_profile
+        return
+
+    @property
+    def allowed_tags(self) -> Optional[List[int]]:
+        """
+        The CBOR tags of the COSE messages which can be decoded.
+        """
+        return None if self._allowed_tags is None else sorted(self._allowed_tags)
+
+    @allowed_tags.setter
+    def allowed_tags(self, allowed_tags: Optional[List[int]]):
+        self._allowed_tags = self._validate_allowed_tags(allowed_tags)
+        return
+
+    @property
+    def allowed_algs(self) -> Optional[List[int]]:
+        """
+        The labels of the algorithms which can be used in the protected headers
+        of the COSE messages to be decoded.
+        """
+        return None if self._allowed_algs is None else sorted(self._allowed_algs)
+
+    @allowed_algs.setter
+    def allowed_algs(self, allowed_algs: Optional[List[Union[int, str]]]):
+        self._allowed_algs = self._validate_allowed_algs(allowed_algs)
+        return
+
     def encode_and_mac(
         self,
         payload: bytes,
@@ -145,7 +434,7 @@ class COSE(CBORProcessor):
             if self._kid_auto_inclusion and key.kid:
                 u[4] = key.kid
             mac_structure = [ctx, b_protected, external_aad, payload]
-            tag = key.sign(self._dumps(mac_structure))
+            tag = key.sign(self._dumps_structure(mac_structure))
             res = CBORTag(17, [b_protected, u, payload, tag])
             return res if out == "cbor2/CBORTag" else self._dumps(res)
 
@@ -169,7 +458,7 @@ class COSE(CBORProcessor):
         else:
             b_protected = self._dumps(p) if p else b""
         mac_structure = [ctx, b_protected, external_aad, payload]
-        tag = key.sign(self._dumps(mac_structure))
+        tag = key.sign(self._dumps_structure(mac_structure))
         cose_mac: List[Any] = [b_protected, u, payload, tag]
         cose_mac.append(recs)
         res = CBORTag(97, cose_mac)
@@ -184,6 +473,7 @@ class COSE(CBORProcessor):
         signers: List[Signer] = [],
         external_aad: bytes = b"",
         out: str = "",
+        executor: Optional[Executor] = None,
     ) -> Union[bytes, CBORTag]:
         """
         Encodes data with signing.
@@ -206,6 +496,13 @@ class COSE(CBORProcessor):
                 data as `cbor2 <https://cbor2.readthedocs.io/en/stable/>`_'s
                 ``CBORTag`` object. If any other value is specified, it will return
                 encoded data as bytes.
+            executor (Optional[Executor]): An executor (``ThreadPoolExecutor`` or
+                ``ProcessPoolExecutor``) on which the signatures of the ``signers``
+                are generated concurrently. If it is not specified, the signatures
+                are generated one by one. In either case, the signatures are placed
+                in the order of the ``signers`` and the time taken for each of them
+                is available as :attr:`Signer.elapsed_time
+                <cwt.Signer.elapsed_time>`.
         Returns:
             Union[bytes, CBORTag]: A byte string of the encoded COSE or a
                 cbor2.CBORTag object.
@@ -234,19 +531,374 @@ class COSE(CBORProcessor):
         # Signature1
         if not signers and key is not None:
             sig_structure = [ctx, b_protected, external_aad, payload]
-            sig = key.sign(self._dumps(sig_structure))
+            sig = key.sign(self._dumps_structure(sig_structure))
             res = CBORTag(18, [b_protected, u, payload, sig])
             return res if out == "cbor2/CBORTag" else self._dumps(res)
 
         # Signature
-        sigs = []
-        for s in signers:
-            sig_structure = [ctx, b_protected, s.protected, external_aad, payload]
-            s.sign(self._dumps(sig_structure))
-            sigs.append([s.protected, s.unprotected, s.signature])
+        msgs = [
+            self._dumps_structure(
+                [ctx, b_protected, s.protected, external_aad, payload]
+            )
+            for s in signers
+        ]
+        if executor is None:
+            for s, msg in zip(signers, msgs):
+                s.sign(msg)
+        elif isinstance(executor, ProcessPoolExecutor):
+            # COSE key objects cannot be pickled, so the keys are rebuilt from
+            # their parameters in the worker processes.
+            futures = [
+                executor.submit(_sign, s.cose_key.to_dict(), msg)
+                for s, msg in zip(signers, msgs)
+            ]
+            for s, f in zip(signers, futures):
+                s._set_signature(*f.result())
+        else:
+            for f in [executor.submit(s.sign, msg) for s, msg in zip(signers, msgs)]:
+                f.result()
+        sigs = [[s.protected, s.unprotected, s.signature] for s in signers]
         res = CBORTag(98, [b_protected, u, payload, sigs])
         return res if out == "cbor2/CBORTag" else self._dumps(res)
 
+    def compile_encoder(
+        self,
+        key: COSEKeyInterface,
+        protected: Optional[Union[dict, bytes]] = None,
+        unprotected: Optional[dict] = None,
+    ) -> COSEEncoder:
+        """
+        Returns a pre-compiled encoder which generates COSE_Sign1 (for a signing
+        key) or COSE_Mac0 (for a MAC key) messages with the same key and headers.
+        The encoded messages are identical to the ones generated by
+        :func:`encode_and_sign <cwt.COSE.encode_and_sign>` or
+        :func:`encode_and_mac <cwt.COSE.encode_and_mac>` with the same arguments.
+
+        Args:
+            key (COSEKeyInterface): A signing key or a MAC Authentication key. The
+                key must have ``key_ops`` of ``sign`` or ``MAC create``.
+            protected (Optional[Union[dict, bytes]]): Parameters that are to be
+                cryptographically protected.
+            unprotected (Optional[dict]): Parameters that are not cryptographically
+                protected.
+        Returns:
+            COSEEncoder: A pre-compiled encoder.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode the headers.
+
+        Examples:
+
+            >>> from cwt import COSE, COSEKey
+            >>> ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+            >>> mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+            >>> encoder = ctx.compile_encoder(mac_key)
+            >>> encoded = encoder.encode(b"Hello world!")
+            >>> ctx.decode(encoded, mac_key)
+            b'Hello world!'
+        """
+        p: Union[Dict[int, Any], bytes] = (
+            to_cose_header(protected) if not isinstance(protected, bytes) else protected
+        )
+        u = to_cose_header(unprotected)
+        if COSE_KEY_OPERATION_VALUES["sign"] in key.key_ops:
+            tag = 18
+        elif COSE_KEY_OPERATION_VALUES["MAC create"] in key.key_ops:
+            tag = 17
+        else:
+            raise ValueError("The key operation could not be specified.")
+        if isinstance(p, bytes):
+            b_protected = p
+        else:
+            if self._alg_auto_inclusion:
+                p[1] = key.alg
+            # COSE_Mac0 always has the serialized protected header (see encode_and_mac).
+            b_protected = self._dumps(p) if p or tag == 17 else b""
+        if self._kid_auto_inclusion and key.kid:
+            u[4] = key.kid
+        return COSEEncoder(key, tag, b_protected, u)
+
+    def sign_detached(
+        self,
+        key: COSEKeyInterface,
+        payload_length: int,
+        protected: Optional[Union[dict, bytes]] = None,
+        unprotected: Optional[dict] = None,
+        external_aad: bytes = b"",
+    ) -> Sign1StreamSigner:
+        """
+        Returns an incremental signer which generates a COSE_Sign1 message with a
+        detached payload. The payload is fed to the signer piece by piece and
+        hashed incrementally, so that large payloads (e.g., firmware images) do
+        not need to be held in memory. The length of the payload must be known in
+        advance because it is a part of the Sig_structure.
+
+        Only the keys which can sign prehashed messages (ECDSA and RSA) can be
+        used. EdDSA cannot be used because it hashes the whole message by itself.
+
+        Args:
+            key (COSEKeyInterface): A signing key.
+            payload_length (int): The length of the whole payload.
+            protected (Optional[Union[dict, bytes]]): Parameters that are to be
+                cryptographically protected.
+            unprotected (Optional[dict]): Parameters that are not cryptographically
+                protected.
+            external_aad(bytes): External additional authenticated data supplied
+                by application.
+        Returns:
+            Sign1StreamSigner: An incremental signer.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode the headers.
+
+        Examples:
+
+            >>> from cwt import COSE, COSEKey
+            >>> ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+            >>> signer = ctx.sign_detached(private_key, os.path.getsize(path))
+            >>> with open(path, "rb") as f:
+            ...     for chunk in iter(lambda: f.read(65536), b""):
+            ...         signer.update(chunk)
+            ...
+            >>> encoded = signer.finalize()
+        """
+        p: Union[Dict[int, Any], bytes] = (
+            to_cose_header(protected) if not isinstance(protected, bytes) else protected
+        )
+        u = to_cose_header(unprotected)
+        if isinstance(p, dict) and self._alg_auto_inclusion:
+            p[1] = key.alg
+        if self._kid_auto_inclusion and key.kid:
+            u[4] = key.kid
+        if isinstance(p, bytes):
+            b_protected = p
+        else:
+            b_protected = self._dumps(p) if p else b""
+        try:
+            return Sign1StreamSigner(key, b_protected, u, payload_length, external_aad)
+        except NotImplementedError:
+            raise ValueError(
+                f"Prehashed signatures are not supported for the alg: {key.alg}."
+            )
+
+    def verify_detached(
+        self,
+        data: Union[bytes, CBORTag],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        payload_length: int,
+        external_aad: bytes = b"",
+    ) -> Sign1StreamVerifier:
+        """
+        Returns an incremental verifier of a COSE_Sign1 message with a detached
+        payload. The payload is fed to the verifier piece by piece and the
+        signature is verified by ``finalize()``.
+
+        Args:
+            data (Union[bytes, CBORTag]): A byte string or cbor2.CBORTag of an
+                encoded COSE_Sign1 whose payload is ``nil``.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): COSE
+                key(s) to verify the encoded data.
+            payload_length (int): The length of the whole payload.
+            external_aad(bytes): External additional authenticated data supplied by
+                application.
+        Returns:
+            Sign1StreamVerifier: An incremental verifier.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decode data.
+
+        Examples:
+
+            >>> verifier = ctx.verify_detached(encoded, public_key, os.path.getsize(path))
+            >>> with open(path, "rb") as f:
+            ...     for chunk in iter(lambda: f.read(65536), b""):
+            ...         verifier.update(chunk)
+            ...
+            >>> verifier.finalize()
+        """
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = self._loads(data)
+        if not isinstance(data, CBORTag):
+            raise ValueError("Invalid COSE format.")
+        if data.tag != 18:
+            raise ValueError(f"Unsupported or unknown CBOR tag({data.tag}).")
+        self._check_tag(data.tag)
+        if not isinstance(data.value, list) or len(data.value) != 4:
+            raise ValueError("Invalid Signature1 format.")
+        if data.value[2] is not None:
+            raise ValueError("The payload should be detached (nil).")
+        protected = self._loads(data.value[0]) if data.value[0] else b""
+        unprotected = data.value[1]
+        if not isinstance(unprotected, dict):
+            raise ValueError("unprotected header should be dict.")
+        kid = self._get_kid(protected, unprotected)
+        alg = self._get_alg(protected)
+        self._check_alg(alg)
+        self._check_signature(alg, data.value[3])
+        candidates = self._to_key_ring(keys).candidates(2, kid, alg)
+        if not candidates:
+            raise ValueError("key is not found.")
+        prehashable = []
+        for k in candidates:
+            try:
+                k.new_hash()
+                prehashable.append(k)
+            except NotImplementedError:
+                pass
+        if not prehashable:
+            raise ValueError(
+                f"Prehashed signatures are not supported for the alg: {alg}."
+            )
+        return Sign1StreamVerifier(
+            prehashable, data.value[0], data.value[3], payload_length, external_aad
+        )
+
+    def encrypt_stream(
+        self,
+        key: COSEKeyInterface,
+        payload_length: int,
+        sink: Any,
+        protected: Optional[Union[dict, bytes]] = None,
+        unprotected: Optional[dict] = None,
+        nonce: bytes = b"",
+        external_aad: bytes = b"",
+    ) -> Encrypt0StreamEncoder:
+        """
+        Returns an incremental encoder which writes a COSE_Encrypt0 message to a
+        file-like sink. The payload is encrypted piece by piece with AES-GCM, so
+        that memory use does not depend on the size of the payload. The output is
+        identical to the one of :func:`encode_and_encrypt
+        <cwt.COSE.encode_and_encrypt>`. The length of the payload must be known
+        in advance because it determines the CBOR head of the ciphertext.
+
+        Args:
+            key (COSEKeyInterface): A COSE key as an encryption key (AES-GCM).
+            payload_length (int): The length of the whole payload.
+            sink (Any): A file-like object to which the encoded message is
+                written.
+            protected (Optional[Union[dict, bytes]]): Parameters that are to be
+                cryptographically protected.
+            unprotected (Optional[dict]): Parameters that are not cryptographically
+                protected.
+            nonce (bytes): A nonce for encryption.
+            external_aad(bytes): External additional authenticated data supplied
+                by application.
+        Returns:
+            Encrypt0StreamEncoder: An incremental encoder.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode data.
+
+        Examples:
+
+            >>> with open(src, "rb") as f, open(dst, "wb") as sink:
+            ...     encoder = ctx.encrypt_stream(enc_key, os.path.getsize(src), sink)
+            ...     for chunk in iter(lambda: f.read(65536), b""):
+            ...         encoder.update(chunk)
+            ...     encoder.finalize()
+            ...
+        """
+        p: Union[Dict[int, Any], bytes] = (
+            to_cose_header(protected) if not isinstance(protected, bytes) else protected
+        )
+        u = to_cose_header(unprotected)
+        if not nonce:
+            try:
+                nonce = key.generate_nonce()
+            except NotImplementedError:
+                raise ValueError(
+                    "Nonce generation is not supported for the key. Set a nonce explicitly."
+                )
+        if isinstance(p, bytes):
+            b_protected = p
+        else:
+            if self._alg_auto_inclusion:
+                p[1] = key.alg
+            b_protected = self._dumps(p) if p else b""
+        if self._kid_auto_inclusion and key.kid:
+            u[4] = key.kid
+        u[5] = nonce
+        try:
+            return Encrypt0StreamEncoder(
+                key, b_protected, u, nonce, payload_length, external_aad, sink
+            )
+        except NotImplementedError:
+            raise ValueError(
+                f"Streaming encryption is not supported for the alg: {key.alg}."
+            )
+
+    def decrypt_stream(
+        self,
+        source: Any,
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        sink: Any,
+        external_aad: bytes = b"",
+        chunk_size: int = 65536,
+    ) -> int:
+        """
+        Reads a COSE_Encrypt0 message from a file-like source and writes the
+        decrypted payload to a file-like sink piece by piece.
+
+        The keys are selected by ``kid`` and ``alg`` of the message and tried in
+        turn as :func:`decode <cwt.COSE.decode>` does. To try the next key, the
+        source is rewound to the beginning of the ciphertext and the sink is
+        rewound and truncated to the position where the plaintext started, so
+        both of them should be seekable. Otherwise, only the first candidate key
+        is used and exactly one key should match the message.
+
+        Note that the plaintext is written to the sink before the authentication
+        tag at the end of the message is verified. If this function raises an
+        exception, everything written to the sink must be discarded.
+
+        Args:
+            source (Any): A file-like object from which the encoded message is
+                read.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): COSE
+                key(s) to decrypt the message.
+            sink (Any): A file-like object to which the plaintext is written.
+            external_aad(bytes): External additional authenticated data supplied by
+                application.
+            chunk_size (int): The size of the pieces to be read from the source.
+        Returns:
+            int: The length of the plaintext.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decode or decrypt data.
+            VerifyError: The ``alg`` of the message is not allowed.
+            DecodeLimitError: The headers exceed the limits of ``cbor_profile``.
+        """
+        self._check_tag(16)
+        decoder = Encrypt0StreamDecoder(source, self._cbor_profile)
+        kid = self._get_kid(decoder.protected, decoder.unprotected)
+        alg = self._get_alg(decoder.protected)
+        self._check_alg(alg)
+        self._check_nonce(alg, decoder.unprotected.get(5, None))
+        candidates = self._to_key_ring(keys).candidates(4, kid, alg)
+        if not candidates:
+            raise ValueError("key is not found.")
+        rewindable = self._is_seekable(source) and self._is_seekable(sink)
+        if not rewindable:
+            candidates = candidates[:1]
+        source_pos = source.tell() if rewindable else 0
+        sink_pos = sink.tell() if rewindable else 0
+        budget = self._new_budget()
+        err: Exception = ValueError("key is not found.")
+        for i, k in enumerate(candidates):
+            budget.consume()
+            if i > 0:
+                source.seek(source_pos)
+                sink.seek(sink_pos)
+                sink.truncate()
+            try:
+                return decoder.decrypt(k, sink, external_aad, chunk_size)
+            except NotImplementedError:
+                err = ValueError(
+                    f"Streaming decryption is not supported for the alg: {k.alg}."
+                )
+            except Exception as e:
+                err = e
+        raise err
+
     def encode_and_encrypt(
         self,
         payload: bytes,
@@ -312,7 +964,7 @@ class COSE(CBORProcessor):
                 u[4] = key.kid
             u[5] = nonce
             enc_structure = [ctx, b_protected, external_aad]
-            aad = self._dumps(enc_structure)
+            aad = self._dumps_structure(enc_structure)
             ciphertext = key.encrypt(payload, nonce, aad)
             res = CBORTag(16, [b_protected, u, ciphertext])
             return res if out == "cbor2/CBORTag" else self._dumps(res)
@@ -336,7 +988,7 @@ class COSE(CBORProcessor):
         else:
             b_protected = self._dumps(p) if p else b""
         enc_structure = [ctx, b_protected, external_aad]
-        aad = self._dumps(enc_structure)
+        aad = self._dumps_structure(enc_structure)
         ciphertext = key.encrypt(payload, nonce, aad)
         cose_enc: List[Any] = [b_protected, u, ciphertext]
         cose_enc.append(recs)
@@ -345,166 +997,502 @@ class COSE(CBORProcessor):
 
     def decode(
         self,
-        data: Union[bytes, CBORTag],
-        keys: Union[COSEKeyInterface, List[COSEKeyInterface]],
+        data: Union[bytes, CBORTag, COSEMessageInfo],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
         context: Optional[Union[Dict[str, Any], List[Any]]] = None,
         external_aad: bytes = b"",
-    ) -> bytes:
+        out: str = "",
+    ) -> Union[bytes, memoryview]:
 
         """
         Verifies and decodes COSE data.
 
         Args:
-            data (Union[bytes, CBORTag]): A byte string or cbor2.CBORTag of an
-                encoded data.
-            keys (Union[COSEKeyInterface, List[COSEKeyInterface]]): COSE key(s)
-                to verify and decrypt the encoded data.
+            data (Union[bytes, CBORTag, COSEMessageInfo]): A byte string (or a
+                bytes-like object such as ``bytearray`` and ``memoryview``) or
+                cbor2.CBORTag of an encoded data, or the result of
+                :func:`inspect <cwt.COSE.inspect>` for it.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): COSE
+                key(s) to verify and decrypt the encoded data. A
+                :class:`COSEKeyRing <cwt.COSEKeyRing>` should be used when a
+                large number of keys are given repeatedly.
             context (Optional[Union[Dict[str, Any], List[Any]]]): A context information
                 structure for key deriviation functions.
             external_aad(bytes): External additional authenticated data supplied by
                 application.
+            out(str): An output format. Only ``"memoryview"`` can be used. If
+                ``"memoryview"`` is specified, this function will return the payload
+                as a ``memoryview`` object. In this case, the data is parsed with
+                :func:`inspect <cwt.COSE.inspect>` and the payload is a view on
+                ``data`` without being copied (except for the decrypted payloads).
+                If any other value is specified, it will return the payload as bytes.
         Returns:
-            bytes: A byte string of decoded payload.
+            Union[bytes, memoryview]: A byte string of decoded payload.
         Raises:
             ValueError: Invalid arguments.
             DecodeError: Failed to decode data.
             VerifyError: Failed to verify data.
+            DecodeLimitError: One of the limits on the decoder is exceeded.
+        """
+        ck = None
+        if self._failed_cache is not None and context is None:
+            raw = data.data if isinstance(data, COSEMessageInfo) else data
+            if isinstance(raw, (bytes, bytearray, memoryview)) and isinstance(
+                keys, (COSEKeyInterface, list, COSEKeyRing)
+            ):
+                ksid = self._key_set_id(keys)
+                if ksid is not None:
+                    ck = (hashlib.sha256(raw).digest(), bytes(external_aad), ksid)
+                    failed = self._failed_cache.get(ck)
+                    if failed is not None:
+                        raise failed[0](*failed[1])
+        try:
+            res = self._decode_data(data, keys, context, external_aad, out)
+        except DecodeLimitError:
+            # The limits (e.g., the deadline) may not be exceeded next time.
+            raise
+        except Exception as err:
+            if ck is not None and self._failed_cache is not None:
+                self._failed_cache.put(
+                    ck, (type(err), err.args), time.time() + self._failed_cache_ttl
+                )
+            raise
+
+        if out == "memoryview":
+            return memoryview(res) if isinstance(res, bytes) else res
+        return bytes(res) if isinstance(res, memoryview) else res
+
+    def _decode_data(
+        self,
+        data: Union[bytes, CBORTag, COSEMessageInfo],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        context: Optional[Union[Dict[str, Any], List[Any]]],
+        external_aad: bytes,
+        out: str,
+    ) -> Union[bytes, memoryview]:
+        budget = self._new_budget()
+        if out == "memoryview" and isinstance(data, (bytes, bytearray, memoryview)):
+            if self._cbor_profile:
+                self._cbor_profile.check(data)
+            data = self._inspect(data, 0)
+        if isinstance(data, COSEMessageInfo):
+            res = self._decode(
+                data.to_cbor_tag("memoryview"),
+                self._to_key_ring(keys),
+                context,
+                external_aad,
+                data.protected,
+                budget,
+            )
+        else:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                data = self._loads(data)
+            if not isinstance(data, CBORTag):
+                raise ValueError("Invalid COSE format.")
+            res = self._decode(
+                data, self._to_key_ring(keys), context, external_aad, budget=budget
+            )
+        return res
+
+    def inspect(self, data: bytes) -> COSEMessageInfo:
+        """
+        Parses only the headers of COSE data. The payload and the signatures
+        are not decoded but located by their byte offsets.
+
+        Args:
+            data (bytes): A byte string of an encoded data.
+        Returns:
+            COSEMessageInfo: The header-level information on the COSE data.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decode data.
+
+        Examples:
+
+            >>> from cwt import COSE, COSEKey
+            >>> ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+            >>> mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+            >>> encoded = ctx.encode_and_mac(b"Hello world!", mac_key)
+            >>> info = ctx.inspect(encoded)
+            >>> info.tag, info.alg, info.kid
+            (17, 5, b'01')
+            >>> ctx.decode(info, mac_key)
+            b'Hello world!'
+        """
+        if self._cbor_profile:
+            self._cbor_profile.check(data)
+        return self._inspect(data, 0)
+
+    def decode_with_signers(
+        self,
+        data: Union[bytes, CBORTag, COSEMessageInfo],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        policy: Optional[SignaturePolicy] = None,
+        external_aad: bytes = b"",
+        max_workers: Optional[int] = None,
+    ) -> Tuple[bytes, List[Signer]]:
+        """
+        Verifies and decodes COSE_Sign data according to a verification policy.
+
+        The signatures are verified concurrently on a thread pool, and the
+        verification stops as soon as the policy is met or it turns out that the
+        policy can no longer be met.
+
+        Args:
+            data (Union[bytes, CBORTag, COSEMessageInfo]): A byte string or
+                cbor2.CBORTag of an encoded COSE_Sign.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): COSE
+                key(s) to verify the signatures.
+            policy (Optional[SignaturePolicy]): A verification policy. If it is not
+                specified, ``SignaturePolicy.new("any")`` is used.
+            external_aad(bytes): External additional authenticated data supplied by
+                application.
+            max_workers (Optional[int]): The maximum number of threads used for
+                the verification. If it is not specified, the default value of
+                ``concurrent.futures.ThreadPoolExecutor`` is used.
+        Returns:
+            Tuple[bytes, List[Signer]]: The decoded payload and the signers whose
+                signatures have been verified before the policy was met, in the
+                order of the signatures in the message. The signatures made with
+                the same key material are counted as the signature of one signer.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decode data.
+            VerifyError: Failed to meet the verification policy.
+            DecodeLimitError: One of the limits on the decoder is exceeded.
+
+        Examples:
+
+            >>> from cwt import COSE, SignaturePolicy
+            >>> ctx = COSE.new()
+            >>> payload, signers = ctx.decode_with_signers(
+            ...     encoded, public_keys, SignaturePolicy.new(2, required_kids=["01"])
+            ... )
         """
-        if isinstance(data, bytes):
+        budget = self._new_budget()
+        if isinstance(data, COSEMessageInfo):
+            data = data.to_cbor_tag()
+        elif isinstance(data, (bytes, bytearray, memoryview)):
             data = self._loads(data)
         if not isinstance(data, CBORTag):
             raise ValueError("Invalid COSE format.")
+        if data.tag != 98:
+            raise ValueError(f"Unsupported or unknown CBOR tag({data.tag}).")
+        self._check_tag(data.tag)
+        if not isinstance(data.value, list) or len(data.value) != 4:
+            raise ValueError("Invalid Signature format.")
+        if data.value[0]:
+            self._loads(data.value[0])
+        if not isinstance(data.value[1], dict):
+            raise ValueError("unprotected header should be dict.")
+        sigs = data.value[3]
+        if not isinstance(sigs, list) or not sigs:
+            raise ValueError("Invalid Signature format.")
+        self._check_limit(sigs, self._max_signatures, "signatures")
 
-        if not isinstance(keys, list):
-            if not isinstance(keys, COSEKeyInterface):
-                raise ValueError("key in keys should have COSEKeyInterface.")
-            keys = [keys]
+        ring = self._to_key_ring(keys)
+        policy = policy or SignaturePolicy.new()
+        kids: List[bytes] = []
+        tasks = []
+        for sig in sigs:
+            if not isinstance(sig, list) or len(sig) != 3:
+                raise ValueError("Invalid Signature format.")
+            protected = self._loads(sig[0]) if sig[0] else b""
+            unprotected = sig[1]
+            if not isinstance(unprotected, dict):
+                raise ValueError(
+                    "unprotected header in signature structure should be dict."
+                )
+            kid = self._get_kid(protected, unprotected)
+            to_be_signed = self._dumps_structure(
+                ["Signature", data.value[0], sig[0], external_aad, data.value[2]]
+            )
+            kids.append(kid if isinstance(kid, bytes) else b"")
+            # A malformed or disallowed signature is counted as a failed one.
+            tasks.append(
+                self._signature_trial(protected, unprotected, sig, ring, to_be_signed)
+            )
+
+        err: Exception = ValueError("key is not found.")
+        passed: Dict[int, COSEKeyInterface] = {}
+        failed: Set[int] = set()
+        # The signatures made by the same signer are counted only once.
+        signer_ids: Set[bytes] = set()
+        if policy.can_be_met(kids, failed):
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            futures: Dict[Future, int] = {}
+            try:
+                for i, t in enumerate(tasks):
+                    futures[executor.submit(self._verify_signature, [t], budget)] = i
+                pending = set(futures)
+                while (
+                    pending
+                    and not policy.is_met(kids, passed)
+                    and policy.can_be_met(kids, failed)
+                ):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        try:
+                            k = f.result()
+                        except DecodeLimitError:
+                            raise
+                        except Exception as e:
+                            failed.add(futures[f])
+                            err = e
+                            continue
+                        signer_id = self._signer_id(k)
+                        if signer_id in signer_ids:
+                            failed.add(futures[f])
+                            err = VerifyError("Duplicate signer.")
+                            continue
+                        signer_ids.add(signer_id)
+                        passed[futures[f]] = k
+            finally:
+                for f in futures:
+                    f.cancel()
+                executor.shutdown(wait=False)
+        if not policy.is_met(kids, passed):
+            raise VerifyError("Failed to meet the verification policy.") from err
+        signers = [
+            Signer(passed[i], sigs[i][0], sigs[i][1], sigs[i][2])
+            for i in sorted(passed)
+        ]
+        return data.value[2], signers
+
+    def decode_batch(
+        self,
+        data: List[Union[bytes, CBORTag]],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        context: Optional[Union[Dict[str, Any], List[Any]]] = None,
+        external_aad: bytes = b"",
+        max_workers: Optional[int] = None,
+    ) -> List[Union[bytes, Exception]]:
+        """
+        Verifies and decodes a list of COSE data.
+
+        All of the COSE data are parsed first, and then the verification and
+        decryption are performed on a thread pool. The candidate keys are
+        resolved once for each ``kid`` through a :class:`COSEKeyRing <cwt.COSEKeyRing>`
+        shared among the COSE data.
+
+        Args:
+            data (List[Union[bytes, CBORTag]]): A list of byte strings or
+                cbor2.CBORTag of encoded data.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): COSE
+                key(s) to verify and decrypt the encoded data.
+            context (Optional[Union[Dict[str, Any], List[Any]]]): A context information
+                structure for key deriviation functions.
+            external_aad(bytes): External additional authenticated data supplied by
+                application.
+            max_workers (Optional[int]): The maximum number of threads used for
+                the verification and decryption. If it is not specified, the default
+                value of ``concurrent.futures.ThreadPoolExecutor`` is used.
+        Returns:
+            List[Union[bytes, Exception]]: A list of decoded payloads. Each item is
+                the exception raised instead if the corresponding data could not be
+                decoded.
+        Raises:
+            ValueError: Invalid arguments.
+        """
+        # The candidates are computed once for each kid and shared among the
+        # COSE data.
+        ring = (
+            keys
+            if isinstance(keys, COSEKeyRing)
+            else COSEKeyRing([keys] if isinstance(keys, COSEKeyInterface) else keys)
+        )
+        res: List[Union[bytes, Exception]] = []
+        tags: List[Union[CBORTag, None]] = []
+        for d in data:
+            try:
+                tag = (
+                    self._loads(d)
+                    if isinstance(d, (bytes, bytearray, memoryview))
+                    else d
+                )
+                if not isinstance(tag, CBORTag):
+                    raise ValueError("Invalid COSE format.")
+                tags.append(tag)
+                res.append(b"")
+            except Exception as err:
+                tags.append(None)
+                res.append(err)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._decode, tag, ring, context, external_aad)
+                if tag is not None
+                else None
+                for tag in tags
+            ]
+            for i, f in enumerate(futures):
+                if f is None:
+                    continue
+                try:
+                    res[i] = f.result()
+                except Exception as err:
+                    res[i] = err
+        return res
+
+    def _decode(
+        self,
+        data: CBORTag,
+        ring: Union[COSEKeyRing, _KeyList],
+        context: Optional[Union[Dict[str, Any], List[Any]]],
+        external_aad: bytes,
+        protected: Any = None,
+        budget: Optional[DecodeBudget] = None,
+    ) -> bytes:
+
+        budget = budget or self._new_budget()
 
         if data.tag == 16:
-            keys = self._filter_by_key_ops(keys, 4)
+            op = 4
             if not isinstance(data.value, list) or len(data.value) != 3:
                 raise ValueError("Invalid Encrypt0 format.")
         elif data.tag == 96:
-            keys = self._filter_by_key_ops(keys, 4)
+            op = 4
             if not isinstance(data.value, list) or len(data.value) != 4:
                 raise ValueError("Invalid Encrypt format.")
         elif data.tag == 17:
-            keys = self._filter_by_key_ops(keys, 10)
+            op = 10
             if not isinstance(data.value, list) or len(data.value) != 4:
                 raise ValueError("Invalid MAC0 format.")
         elif data.tag == 97:
-            keys = self._filter_by_key_ops(keys, 10)
+            op = 10
             if not isinstance(data.value, list) or len(data.value) != 5:
                 raise ValueError("Invalid MAC format.")
         elif data.tag == 18:
-            keys = self._filter_by_key_ops(keys, 2)
+            op = 2
             if not isinstance(data.value, list) or len(data.value) != 4:
                 raise ValueError("Invalid Signature1 format.")
         elif data.tag == 98:
-            keys = self._filter_by_key_ops(keys, 2)
+            op = 2
             if not isinstance(data.value, list) or len(data.value) != 4:
                 raise ValueError("Invalid Signature format.")
         else:
             raise ValueError(f"Unsupported or unknown CBOR tag({data.tag}).")
+        self._check_tag(data.tag)
 
-        protected = self._loads(data.value[0]) if data.value[0] else b""
+        if protected is None:
+            protected = self._loads(data.value[0]) if data.value[0] else b""
         unprotected = data.value[1]
         if not isinstance(unprotected, dict):
             raise ValueError("unprotected header should be dict.")
         alg = self._get_alg(protected)
 
+        # Rejects the malformed or downgraded messages before any key lookup.
+        if data.tag in (16, 96):
+            self._check_alg(alg)
+            self._check_nonce(alg, unprotected.get(5, None))
+        elif data.tag != 98:
+            self._check_alg(alg)
+            self._check_signature(alg, data.value[3])
+
         err: Exception = ValueError("key is not found.")
 
         # Encrypt0
         if data.tag == 16:
             kid = self._get_kid(protected, unprotected)
-            aad = self._dumps(["Encrypt0", data.value[0], external_aad])
+            aad = self._dumps_structure(["Encrypt0", data.value[0], external_aad])
             nonce = unprotected.get(5, None)
-            if kid:
-                for i, k in enumerate(keys):
-                    if k.kid != kid:
-                        continue
-                    try:
-                        return k.decrypt(data.value[2], nonce, aad)
-                    except Exception as e:
-                        err = e
-                raise err
-            for i, k in enumerate(keys):
+            for k in ring.candidates(op, kid, alg):
+                budget.consume()
                 try:
-                    return k.decrypt(data.value[2], nonce, aad)
+                    res = k.try_decrypt(data.value[2], nonce, aad)
+                    if res is not None:
+                        return res
+                    err = DecodeError("Failed to decrypt.")
                 except Exception as e:
                     err = e
             raise err
 
         # Encrypt
         if data.tag == 96:
-            aad = self._dumps(["Encrypt", data.value[0], external_aad])
+            aad = self._dumps_structure(["Encrypt", data.value[0], external_aad])
             nonce = unprotected.get(5, None)
-            rs = Recipients.from_list(data.value[3], self._verify_kid)
-            enc_key = rs.extract(keys, context, alg)
+            self._check_limit(data.value[3], self._max_recipients, "recipients")
+            rs = Recipients.from_list(
+                data.value[3], self._verify_kid, self._cbor_profile
+            )
+            enc_key = rs.extract(
+                ring,
+                context,
+                alg,
+                budget,
+                self._cek_cache,
+                self._cek_cache_ttl,
+                op,
+                self._cek_cache_lifetime,
+            )
+            budget.consume()
             return enc_key.decrypt(data.value[2], nonce, aad)
 
         # MAC0
         if data.tag == 17:
             kid = self._get_kid(protected, unprotected)
-            msg = self._dumps(["MAC0", data.value[0], external_aad, data.value[2]])
-            if kid:
-                for i, k in enumerate(keys):
-                    if k.kid != kid:
-                        continue
-                    try:
-                        k.verify(msg, data.value[3])
-                        return data.value[2]
-                    except Exception as e:
-                        err = e
-                raise err
-            for i, k in enumerate(keys):
-                try:
-                    k.verify(msg, data.value[3])
-                    return data.value[2]
-                except Exception as e:
-                    err = e
-            raise err
+            msg = self._dumps_structure(
+                ["MAC0", data.value[0], external_aad, data.value[2]]
+            )
+            self._verify_signature(
+                [(ring.candidates(op, kid, alg), msg, data.value[3])], budget
+            )
+            return data.value[2]
 
         # MAC
         if data.tag == 97:
-            to_be_maced = self._dumps(
+            to_be_maced = self._dumps_structure(
                 ["MAC", data.value[0], external_aad, data.value[2]]
             )
-            rs = Recipients.from_list(data.value[4], self._verify_kid)
-            mac_auth_key = rs.extract(keys, context, alg)
+            self._check_limit(data.value[4], self._max_recipients, "recipients")
+            rs = Recipients.from_list(
+                data.value[4], self._verify_kid, self._cbor_profile
+            )
+            mac_auth_key = rs.extract(
+                ring,
+                context,
+                alg,
+                budget,
+                self._cek_cache,
+                self._cek_cache_ttl,
+                op,
+                self._cek_cache_lifetime,
+            )
+            budget.consume()
             mac_auth_key.verify(to_be_maced, data.value[3])
             return data.value[2]
 
         # Signature1
         if data.tag == 18:
             kid = self._get_kid(protected, unprotected)
-            to_be_signed = self._dumps(
+            to_be_signed = self._dumps_structure(
                 ["Signature1", data.value[0], external_aad, data.value[2]]
             )
-            if kid:
-                for i, k in enumerate(keys):
-                    if k.kid != kid:
-                        continue
-                    try:
-                        k.verify(to_be_signed, data.value[3])
-                        return data.value[2]
-                    except Exception as e:
-                        err = e
-                raise err
-            for i, k in enumerate(keys):
-                try:
-                    k.verify(to_be_signed, data.value[3])
-                    return data.value[2]
-                except Exception as e:
-                    err = e
-            raise err
+            self._verify_signature(
+                [(ring.candidates(op, kid, alg), to_be_signed, data.value[3])], budget
+            )
+            return data.value[2]
 
         # Signature
         # if data.tag == 98:
         sigs = data.value[3]
         if not isinstance(sigs, list):
             raise ValueError("Invalid Signature format.")
+        self._check_limit(sigs, self._max_signatures, "signatures")
+        self._verify_signature(
+            self._signature_trials(data, sigs, ring, external_aad), budget, err
+        )
+        return data.value[2]
+
+    def _signature_trials(
+        self,
+        data: CBORTag,
+        sigs: List[Any],
+        ring: Union[COSEKeyRing, _KeyList],
+        external_aad: bytes,
+    ) -> Iterator[Union[_Trial, Exception]]:
+        # Each signature is checked when it is tried, so that a malformed or
+        # disallowed signature is skipped in favor of the other signatures.
         for sig in sigs:
             if not isinstance(sig, list) or len(sig) != 3:
                 raise ValueError("Invalid Signature format.")
@@ -515,54 +1503,225 @@ class COSE(CBORProcessor):
                 raise ValueError(
                     "unprotected header in signature structure should be dict."
                 )
-            kid = self._get_kid(protected, unprotected)
-            if kid:
-                for i, k in enumerate(keys):
-                    if k.kid != kid:
-                        continue
-                    try:
-                        to_be_signed = self._dumps(
-                            [
-                                "Signature",
-                                data.value[0],
-                                sig[0],
-                                external_aad,
-                                data.value[2],
-                            ]
-                        )
-                        k.verify(to_be_signed, sig[2])
-                        return data.value[2]
-                    except Exception as e:
-                        err = e
+            yield self._signature_trial(
+                protected,
+                unprotected,
+                sig,
+                ring,
+                self._dumps_structure(
+                    [
+                        "Signature",
+                        data.value[0],
+                        sig[0],
+                        external_aad,
+                        data.value[2],
+                    ]
+                ),
+            )
+
+    def _signature_trial(
+        self,
+        protected: Any,
+        unprotected: dict,
+        sig: List[Any],
+        ring: Union[COSEKeyRing, _KeyList],
+        to_be_signed: bytes,
+    ) -> Union[_Trial, Exception]:
+        kid = self._get_kid(protected, unprotected)
+        alg = self._get_alg(protected)
+        try:
+            self._check_alg(alg)
+            self._check_signature(alg, sig[2])
+        except (DecodeError, VerifyError) as err:
+            return err
+        return (ring.candidates(2, kid, alg), to_be_signed, sig[2])
+
+    def _verify_signature(
+        self,
+        trials: Iterable[Union[_Trial, Exception]],
+        budget: DecodeBudget,
+        err: Optional[Exception] = None,
+    ) -> COSEKeyInterface:
+        # Tries the keys with verification_error() so that only the final
+        # failure raises an exception. The signatures which failed to be checked
+        # are given as the errors and skipped.
+        err = err or ValueError("key is not found.")
+        for t in trials:
+            if isinstance(t, Exception):
+                err = t
                 continue
-            for i, k in enumerate(keys):
+            keys, msg, sig = t
+            for k in keys:
+                budget.consume()
                 try:
-                    to_be_signed = self._dumps(
-                        [
-                            "Signature",
-                            data.value[0],
-                            sig[0],
-                            external_aad,
-                            data.value[2],
-                        ]
-                    )
-                    k.verify(to_be_signed, sig[2])
-                    return data.value[2]
-                except Exception as e:
-                    err = e
+                    e = k.verification_error(msg, sig)
+                except Exception as ex:
+                    err = ex
+                    continue
+                if e is None:
+                    return k
+                err = e
         raise err
 
-    def _filter_by_key_ops(
-        self, keys: List[COSEKeyInterface], op: int
-    ) -> List[COSEKeyInterface]:
-        res: List[COSEKeyInterface] = []
-        for k in keys:
-            if op in k.key_ops:
-                res.append(k)
-        if len(res) == 0:
-            res = keys
+    def _check_tag(self, tag: int):
+        if self._allowed_tags is not None and tag not in self._allowed_tags:
+            raise ValueError(f"CBOR tag({tag}) is not allowed.")
+        return
+
+    def _check_alg(self, alg: Any):
+        if self._allowed_algs is None:
+            return
+        if not alg:
+            raise VerifyError("alg should be specified in the protected header.")
+        if not isinstance(alg, int) or alg not in self._allowed_algs:
+            raise VerifyError(f"alg({alg}) is not allowed.")
+        return
+
+    @staticmethod
+    def _is_seekable(f: Any) -> bool:
+        try:
+            return bool(f.seekable())
+        except Exception:
+            return False
+
+    def _signer_id(self, key: COSEKeyInterface) -> bytes:
+        # The key material without kid, alg and key_ops identifies a signer.
+        d = sorted((k, v) for k, v in key.to_dict().items() if k not in (2, 3, 4))
+        return hashlib.sha256(self._dumps(dict(d))).digest()
+
+    @staticmethod
+    def _check_signature(alg: Any, sig: Any):
+        lens = COSE_SIGNATURE_LEN.get(alg) if isinstance(alg, int) else None
+        if (
+            lens
+            and isinstance(sig, (bytes, bytearray, memoryview))
+            and len(sig) not in lens
+        ):
+            raise DecodeError("Invalid signature length.")
+        return
+
+    @staticmethod
+    def _check_nonce(alg: Any, nonce: Any):
+        n = COSE_NONCE_LEN.get(alg) if isinstance(alg, int) else None
+        if n and isinstance(nonce, (bytes, bytearray, memoryview)) and len(nonce) != n:
+            raise DecodeError(f"The length of nonce should be {n} bytes.")
+        return
+
+    @staticmethod
+    def _validate_allowed_tags(tags: Optional[List[int]]) -> Optional[Set[int]]:
+        if tags is None:
+            return None
+        if not isinstance(tags, list):
+            raise ValueError("allowed_tags should be list.")
+        for tag in tags:
+            if tag not in _COSE_MESSAGE_FORMATS:
+                raise ValueError(f"Unsupported or unknown CBOR tag({tag}).")
+        return set(tags)
+
+    @staticmethod
+    def _validate_allowed_algs(
+        algs: Optional[List[Union[int, str]]]
+    ) -> Optional[Set[int]]:
+        if algs is None:
+            return None
+        if not isinstance(algs, list):
+            raise ValueError("allowed_algs should be list.")
+        res = set()
+        for alg in algs:
+            if isinstance(alg, str) and alg in COSE_ALGORITHMS:
+                alg = COSE_ALGORITHMS[alg]
+            if not isinstance(alg, int) or alg not in COSE_ALGORITHMS.values():
+                raise ValueError(f"Unsupported or unknown alg: {alg}.")
+            res.add(alg)
         return res
 
+    def _new_budget(self) -> DecodeBudget:
+        return DecodeBudget(self._max_key_trials, self._decode_timeout)
+
+    @staticmethod
+    def _validate_limit(name: str, limit: Optional[int]) -> Optional[int]:
+        if limit is None:
+            return None
+        if not isinstance(limit, int) or isinstance(limit, bool):
+            raise ValueError(f"{name} should be int.")
+        if limit <= 0:
+            raise ValueError(f"{name} should be positive number.")
+        return limit
+
+    @staticmethod
+    def _validate_timeout(timeout: Optional[float]) -> Optional[float]:
+        if timeout is None:
+            return None
+        if not isinstance(timeout, (int, float)) or isinstance(timeout, bool):
+            raise ValueError("decode_timeout should be int or float.")
+        if timeout <= 0:
+            raise ValueError("decode_timeout should be positive number.")
+        return timeout
+
+    @staticmethod
+    def _check_limit(items: Any, limit: Optional[int], name: str):
+        if limit is not None and isinstance(items, list) and len(items) > limit:
+            raise DecodeLimitError(f"The number of {name} exceeds the limit.")
+        return
+
+    def _inspect(self, data: Any, pos: int) -> COSEMessageInfo:
+        major, tag, pos = read_head(data, pos)
+        if major != 6:
+            raise ValueError("Invalid COSE format.")
+        if tag not in _COSE_MESSAGE_FORMATS:
+            raise ValueError(f"Unsupported or unknown CBOR tag({tag}).")
+        name, n = _COSE_MESSAGE_FORMATS[tag]
+        major, arg, pos = read_head(data, pos)
+        if major != 4 or arg != n:
+            raise ValueError(f"Invalid {name} format.")
+        items = []
+        bstrs = []
+        for _ in range(n):
+            end = skip_item(data, pos)
+            items.append((pos, end))
+            bstrs.append(bstr_range(data, pos))
+            pos = end
+        if bstrs[0] is None:
+            raise ValueError(f"Invalid {name} format.")
+        b_protected = bytes(data[bstrs[0][0] : bstrs[0][1]])
+        protected = self._loads(b_protected) if b_protected else {}
+        if not isinstance(protected, dict):
+            raise ValueError("protected header should be dict.")
+        unprotected = self._loads(bytes(data[items[1][0] : items[1][1]]))
+        if not isinstance(unprotected, dict):
+            raise ValueError("unprotected header should be dict.")
+        return COSEMessageInfo(data, tag, protected, unprotected, items, bstrs)
+
+    def _key_set_id(
+        self, keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]
+    ) -> Optional[Tuple[Any, ...]]:
+        # The key ring itself is held in the identity so that the identity is not
+        # reused by other key rings.
+        if isinstance(keys, COSEKeyRing):
+            return (keys, keys.version)
+        # A list of keys is identified by a digest of the serial numbers of the
+        # keys, which are never reused, so that the keys are not held by each of
+        # the cache entries.
+        h = hashlib.sha256()
+        try:
+            for k in [keys] if isinstance(keys, COSEKeyInterface) else keys:
+                h.update(_key_serial(k).to_bytes(8, "big"))
+        except TypeError:
+            # The keys which cannot be weakly referenced are not cached.
+            return None
+        return (h.digest(),)
+
+    def _to_key_ring(
+        self, keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]
+    ) -> Union[COSEKeyRing, _KeyList]:
+        if isinstance(keys, COSEKeyRing):
+            return keys
+        if not isinstance(keys, list):
+            if not isinstance(keys, COSEKeyInterface):
+                raise ValueError("key in keys should have COSEKeyInterface.")
+            keys = [keys]
+        return _KeyList(keys)
+
     def _get_alg(self, protected: Any) -> int:
         return protected[1] if isinstance(protected, dict) and 1 in protected else 0
 
@@ -0,0 +1,117 @@
+from typing import Any, Dict
+
+from .cbor_processor import CBORProcessor
+from .cose_key_interface import COSEKeyInterface
+
+
+class COSEEncoder(CBORProcessor):
+    """
+    A pre-compiled COSE_Sign1 or COSE_Mac0 encoder returned by
+    :func:`COSE.compile_encoder <cwt.COSE.compile_encoder>`.
+
+    The protected header, the prefix of the Sig_structure (or MAC_structure) and
+    the prefix of the COSE message are serialized once when this object is created,
+    so that :func:`encode <cwt.COSEEncoder.encode>` only appends the payload and
+    the signature (or the tag).
+    """
+
+    def __init__(
+        self,
+        key: COSEKeyInterface,
+        tag: int,
+        protected: bytes,
+        unprotected: Dict[int, Any],
+    ):
+        self._key = key
+        self._tag = tag
+        self._protected = protected
+        self._unprotected = unprotected
+        ctx = b"MAC0" if tag == 17 else b"Signature1"
+        self._structure_prefix = b"".join(
+            [
+                self._dumps_head(4, 4),
+                self._dumps_head(3, len(ctx)),
+                ctx,
+                self._dumps_head(2, len(protected)),
+                protected,
+            ]
+        )
+        # For the most common case where external_aad is empty.
+        self._structure_prefix_without_aad = self._structure_prefix + b"\x40"
+        self._message_prefix = b"".join(
+            [
+                self._dumps_head(6, tag),
+                self._dumps_head(4, 4),
+                self._dumps_head(2, len(protected)),
+                protected,
+                self._dumps(unprotected),
+            ]
+        )
+        return
+
+    @property
+    def key(self) -> COSEKeyInterface:
+        """
+        The COSE key used to sign (or generate a MAC for) the payloads.
+        """
+        return self._key
+
+    @property
+    def tag(self) -> int:
+        """
+        The CBOR tag of the COSE messages to be generated (``18`` for COSE_Sign1
+        or ``17`` for COSE_Mac0).
+        """
+        return self._tag
+
+    @property
+    def protected(self) -> bytes:
+        """
+        The serialized protected header.
+        """
+        return self._protected
+
+    @property
+    def unprotected(self) -> Dict[int, Any]:
+        """
+        The unprotected header.
+        """
+        return self._unprotected
+
+    def encode(self, payload: bytes, external_aad: bytes = b"") -> bytes:
+        """
+        Encodes data with signing (or MAC).
+
+        Args:
+            payload (bytes): A content to be signed (or MACed).
+            external_aad(bytes): External additional authenticated data supplied
+                by application.
+        Returns:
+            bytes: A byte string of the encoded COSE.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode data.
+        """
+        b_payload_len = self._dumps_head(2, len(payload))
+        if external_aad:
+            tbs = b"".join(
+                [
+                    self._structure_prefix,
+                    self._dumps_head(2, len(external_aad)),
+                    external_aad,
+                    b_payload_len,
+                    payload,
+                ]
+            )
+        else:
+            tbs = b"".join([self._structure_prefix_without_aad, b_payload_len, payload])
+        sig = self._key.sign(tbs)
+        return b"".join(
+            [
+                self._message_prefix,
+                b_payload_len,
+                payload,
+                self._dumps_head(2, len(sig)),
+                sig,
+            ]
+        )
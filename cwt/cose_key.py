@@ -17,6 +17,7 @@ from .algs.okp import OKPKey
 from .algs.raw import RawKey
 from .algs.rsa import RSAKey
 from .algs.symmetric import AESCCMKey, AESGCMKey, AESKeyWrap, ChaCha20Key, HMACKey
+from .cbor_profile import CBORProfile
 from .const import (
     COSE_ALGORITHMS_CKDM_KEY_AGREEMENT,
     COSE_ALGORITHMS_RSA,
@@ -137,18 +138,24 @@ class COSEKey:
         return cls.new(params)
 
     @classmethod
-    def from_bytes(cls, key_data: bytes) -> COSEKeyInterface:
+    def from_bytes(
+        cls, key_data: bytes, cbor_profile: Optional[CBORProfile] = None
+    ) -> COSEKeyInterface:
         """
         Creates a COSE key from CBOR-formatted key data.
 
         Args:
             key_data (bytes): CBOR-formatted key data.
+            cbor_profile (Optional[CBORProfile]): The resource limits applied to
+                the key data.
         Returns:
             COSEKeyInterface: A COSE key object.
         Raises:
             ValueError: Invalid arguments.
             DecodeError: Failed to decode the key data.
         """
+        if cbor_profile:
+            cbor_profile.check(key_data)
         params = cbor2.loads(key_data)
         return cls.new(params)
 
@@ -6,6 +6,7 @@ from .const import (
     COSE_KEY_TYPES,
     COSE_NAMED_ALGORITHMS_SUPPORTED,
 )
+from .exceptions import DecodeError, VerifyError
 
 
 class COSEKeyInterface(CBORProcessor):
@@ -181,6 +182,104 @@ class COSEKeyInterface(CBORProcessor):
         """
         raise NotImplementedError
 
+    def try_verify(self, msg: bytes, sig: bytes) -> bool:
+        """
+        Verifies that the specified digital signature (or MAC) is valid for the
+        specified message, and returns the result instead of raising an
+        exception for an invalid signature. It is used when several keys are
+        tried for a message, so that only the final failure raises an exception.
+
+        Args:
+            msg (bytes): A message to be verified.
+            sig (bytes): A digital signature of the message.
+        Returns:
+            bool: Whether the signature is valid.
+        Raises:
+            NotImplementedError: Not implemented.
+            ValueError: Invalid arguments.
+            VerifyError: Failed to verify for the reasons other than the invalid
+                signature (e.g., malformed signature).
+        """
+        try:
+            self.verify(msg, sig)
+            return True
+        except VerifyError:
+            return False
+
+    def verification_error(self, msg: bytes, sig: bytes) -> Optional[VerifyError]:
+        """
+        Verifies that the specified digital signature (or MAC) is valid for the
+        specified message, and returns the error which :func:`verify
+        <cwt.COSEKeyInterface.verify>` would raise instead of raising it. The
+        cause of the error (e.g., ``InvalidSignature`` of ``cryptography``) is
+        kept as ``__cause__`` of it. It is used when several keys are tried for
+        a message, so that only the final failure is raised.
+
+        Args:
+            msg (bytes): A message to be verified.
+            sig (bytes): A digital signature of the message.
+        Returns:
+            Optional[VerifyError]: ``None`` if the signature is valid, or the
+                error of the verification.
+        Raises:
+            NotImplementedError: Not implemented.
+            ValueError: Invalid arguments.
+        """
+        try:
+            self.verify(msg, sig)
+            return None
+        except VerifyError as err:
+            return err
+
+    def new_hash(self) -> Any:
+        """
+        Returns a new incremental hash context
+        (``cryptography.hazmat.primitives.hashes.Hash``) of the hash algorithm
+        used for the signature. The digest of the message calculated with it can
+        be signed and verified with :func:`sign_prehashed
+        <cwt.COSEKeyInterface.sign_prehashed>` and :func:`verify_prehashed
+        <cwt.COSEKeyInterface.verify_prehashed>`.
+
+        Returns:
+            Any: A hash context.
+        Raises:
+            NotImplementedError: Not implemented (e.g., the algorithm which cannot
+                sign a prehashed message like EdDSA).
+        """
+        raise NotImplementedError
+
+    def sign_prehashed(self, digest: bytes) -> bytes:
+        """
+        Returns a digital signature for the message whose digest is specified.
+
+        Args:
+            digest (bytes): A digest of a message calculated with the hash context
+                returned by :func:`new_hash <cwt.COSEKeyInterface.new_hash>`.
+        Returns:
+            bytes: The byte string of the signature.
+        Raises:
+            NotImplementedError: Not implemented.
+            ValueError: Invalid arguments.
+            EncodeError: Failed to sign the message.
+        """
+        raise NotImplementedError
+
+    def verify_prehashed(self, digest: bytes, sig: bytes):
+        """
+        Verifies that the specified digital signature is valid for the message
+        whose digest is specified.
+
+        Args:
+            digest (bytes): A digest of a message calculated with the hash context
+                returned by :func:`new_hash <cwt.COSEKeyInterface.new_hash>`.
+            sig (bytes): A digital signature of the message.
+        Raises:
+            NotImplementedError: Not implemented.
+            ValueError: Invalid arguments.
+            VerifyError: Failed to verify.
+        """
+        raise NotImplementedError
+
     def encrypt(self, msg: bytes, nonce: bytes, aad: bytes) -> bytes:
         """
         Encrypts the specified message.
@@ -215,6 +314,69 @@ class COSEKeyInterface(CBORProcessor):
         """
         raise NotImplementedError
 
+    def try_decrypt(self, msg: bytes, nonce: bytes, aad: bytes) -> Optional[bytes]:
+        """
+        Decrypts the specified message, and returns ``None`` instead of raising
+        an exception if the message cannot be authenticated. It is used when
+        several keys are tried for a message, so that only the final failure
+        raises an exception.
+
+        Args:
+            msg (bytes): An encrypted message.
+            nonce (bytes): A nonce for encryption.
+            aad (bytes): Additional authenticated data.
+        Returns:
+            Optional[bytes]: The byte string of the decrypted data or ``None``.
+        Raises:
+            NotImplementedError: Not implemented.
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decrypt for the reasons other than the
+                authentication failure.
+        """
+        try:
+            return self.decrypt(msg, nonce, aad)
+        except DecodeError:
+            return None
+
+    def new_encryptor(self, nonce: bytes, aad: bytes) -> Any:
+        """
+        Returns a new incremental encryption context
+        (``cryptography.hazmat.primitives.ciphers.CipherContext``) which has
+        already been fed the additional authenticated data. The message can be
+        encrypted piece by piece with ``update()``, and ``finalize()`` and ``tag``
+        of the context complete the encryption.
+
+        Args:
+            nonce (bytes): A nonce for encryption.
+            aad (bytes): Additional authenticated data.
+        Returns:
+            Any: An encryption context.
+        Raises:
+            NotImplementedError: Not implemented (e.g., the algorithm which does
+                not support incremental encryption like ChaCha20/Poly1305).
+            EncodeError: Failed to create the context.
+        """
+        raise NotImplementedError
+
+    def new_decryptor(self, nonce: bytes, aad: bytes) -> Any:
+        """
+        Returns a new incremental decryption context
+        (``cryptography.hazmat.primitives.ciphers.CipherContext``) which has
+        already been fed the additional authenticated data. The encrypted message
+        can be decrypted piece by piece with ``update()``, and
+        ``finalize_with_tag()`` of the context verifies the authentication tag.
+
+        Args:
+            nonce (bytes): A nonce for encryption.
+            aad (bytes): Additional authenticated data.
+        Returns:
+            Any: A decryption context.
+        Raises:
+            NotImplementedError: Not implemented.
+            DecodeError: Failed to create the context.
+        """
+        raise NotImplementedError
+
     def wrap_key(self, key_to_wrap: bytes) -> bytes:
         """
         Wraps a key.
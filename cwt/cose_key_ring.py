@@ -0,0 +1,271 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .const import (
+    COSE_ALGORITHMS,
+    COSE_ALGORITHMS_SIG_EC2,
+    COSE_ALGORITHMS_SIG_OKP,
+    COSE_ALGORITHMS_SIG_RSA,
+    COSE_ALGORITHMS_SYMMETRIC,
+)
+from .cose_key_interface import COSEKeyInterface
+
+_KNOWN_ALGS = set(COSE_ALGORITHMS.values())
+
+# The key types implied by the algorithms of COSE messages.
+_ALG_TO_KTY = {
+    **{alg: 1 for alg in COSE_ALGORITHMS_SIG_OKP.values()},
+    **{alg: 2 for alg in COSE_ALGORITHMS_SIG_EC2.values()},
+    **{alg: 3 for alg in COSE_ALGORITHMS_SIG_RSA.values()},
+    **{alg: 4 for alg in COSE_ALGORITHMS_SYMMETRIC.values()},
+}
+
+
+class COSEKeyRing:
+    """
+    A set of COSE keys indexed by ``kid``, ``key_ops``, ``alg`` and ``kty``.
+
+    :func:`COSE.decode <cwt.COSE.decode>` and :func:`CWT.decode <cwt.CWT.decode>`
+    accept this object in place of a list of keys. The candidate keys for each
+    combination of ``kid``, key operation and ``alg`` are computed once and reused
+    for the subsequent decodings, so that a large number of keys (e.g., trust
+    anchors) can be held without scanning all of them for every message.
+    """
+
+    def __init__(self, keys: Optional[List[COSEKeyInterface]] = None):
+        self._keys: List[COSEKeyInterface] = []
+        self._by_kid: Dict[bytes, List[COSEKeyInterface]] = {}
+        self._by_op: Dict[int, List[COSEKeyInterface]] = {}
+        # The candidates by kid (b"" for the messages without kid) and by the
+        # combination of the key operation and alg.
+        self._candidates: Dict[
+            bytes, Dict[Tuple[int, int], Tuple[COSEKeyInterface, ...]]
+        ] = {}
+        self._version = 0
+        # The keys are indexed in bulk without invalidating the candidates for
+        # each of them.
+        for k in keys or []:
+            self._index(k)
+        self._changed()
+        return
+
+    @classmethod
+    def new(cls, keys: Optional[List[COSEKeyInterface]] = None):
+        """
+        Constructor.
+
+        Args:
+            keys (Optional[List[COSEKeyInterface]]): COSE keys to be held.
+        Returns:
+            COSEKeyRing: A key ring.
+        Raises:
+            ValueError: Invalid arguments.
+
+        Examples:
+
+            >>> from cwt import COSEKey, COSEKeyRing
+            >>> ring = COSEKeyRing.new()
+            >>> ring.add(COSEKey.from_symmetric_key(alg="HS256", kid="01"))
+            >>> len(ring)
+            1
+        """
+        return cls(keys)
+
+    @property
+    def keys(self) -> List[COSEKeyInterface]:
+        """
+        The list of the COSE keys held in this key ring.
+        """
+        return list(self._keys)
+
+    @property
+    def version(self) -> int:
+        """
+        The number which is incremented every time the set of keys is changed.
+        """
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[COSEKeyInterface]:
+        return iter(self._keys)
+
+    def add(self, key: COSEKeyInterface):
+        """
+        Adds a COSE key to the key ring.
+
+        Args:
+            key (COSEKeyInterface): A COSE key to be added.
+        Raises:
+            ValueError: Invalid arguments.
+        """
+        self._add(key)
+        return
+
+    def remove(self, key: COSEKeyInterface):
+        """
+        Removes a COSE key from the key ring.
+
+        Args:
+            key (COSEKeyInterface): A COSE key to be removed.
+        Raises:
+            ValueError: The key is not found in the key ring.
+        """
+        if key not in self._keys:
+            raise ValueError("key is not found.")
+        self._keys.remove(key)
+        if key.kid:
+            self._by_kid[key.kid].remove(key)
+            if not self._by_kid[key.kid]:
+                del self._by_kid[key.kid]
+        ops = []
+        for op in key.key_ops:
+            self._by_op[op].remove(key)
+            if not self._by_op[op]:
+                del self._by_op[op]
+                ops.append(op)
+        self._changed(key, ops)
+        return
+
+    def get(self, kid: bytes) -> List[COSEKeyInterface]:
+        """
+        Returns the COSE keys which have the specified ``kid``.
+
+        Args:
+            kid (bytes): A key identifier.
+        Returns:
+            List[COSEKeyInterface]: The COSE keys found.
+        """
+        return list(self._by_kid.get(kid, []))
+
+    def candidates(
+        self, op: int, kid: bytes = b"", alg: int = 0
+    ) -> Tuple[COSEKeyInterface, ...]:
+        """
+        Returns the COSE keys to be tried for a message.
+
+        The keys are narrowed down by ``key_ops`` (all keys are used if no key
+        has the operation), then by ``kid`` if specified, then by ``alg`` if
+        specified. The keys without ``alg`` match only if their ``kty`` fits the
+        ``alg`` (e.g., ``EC2`` for ``ES256``), so that no cryptographic operation
+        is attempted with the keys which cannot be used for the message. If
+        ``kid`` is specified and none of the keys bound to it matches the
+        ``alg``, the narrowing by ``alg`` is not applied.
+
+        Args:
+            op (int): A key operation value (e.g., ``2("verify")``).
+            kid (bytes): A key identifier of the message.
+            alg (int): An algorithm of the message.
+        Returns:
+            Tuple[COSEKeyInterface, ...]: The candidate keys.
+        """
+        if not isinstance(kid, bytes):
+            return ()
+        if not isinstance(alg, int):
+            alg = 0
+        ck = (op, alg)
+        res = self._candidates.get(kid, {}).get(ck)
+        if res is not None:
+            return res
+        keys: List[COSEKeyInterface]
+        if kid:
+            if kid not in self._by_kid:
+                return ()
+            keys = self._by_kid[kid]
+            if op in self._by_op:
+                keys = [k for k in keys if op in k.key_ops]
+        else:
+            keys = self._by_op.get(op) or self._keys
+        if alg:
+            narrowed = _narrow_by_alg(keys, alg)
+            # The keys bound to the kid are still tried so that the mismatch is
+            # reported as a verification failure.
+            keys = narrowed or keys if kid else narrowed
+        res = tuple(keys)
+        # Do not remember arbitrary algs taken from untrusted messages.
+        if not alg or alg in _KNOWN_ALGS:
+            self._candidates.setdefault(kid, {})[ck] = res
+        return res
+
+    def _add(self, key: COSEKeyInterface):
+        ops = [op for op in key.key_ops if op not in self._by_op]
+        self._index(key)
+        self._changed(key, ops)
+        return
+
+    def _index(self, key: COSEKeyInterface):
+        if not isinstance(key, COSEKeyInterface):
+            raise ValueError("key in keys should have COSEKeyInterface.")
+        self._keys.append(key)
+        if key.kid:
+            self._by_kid.setdefault(key.kid, []).append(key)
+        for op in key.key_ops:
+            self._by_op.setdefault(op, []).append(key)
+        return
+
+    def _changed(self, key: Optional[COSEKeyInterface] = None, ops: Sequence[int] = ()):
+        self._version += 1
+        if key is None:
+            self._candidates = {}
+            return
+        # Only the candidates which the key can be one of are forgotten.
+        if key.kid:
+            self._candidates.pop(key.kid, None)
+        without_kid = self._candidates.get(b"", {})
+        for op, alg in list(without_kid):
+            if not alg or _fits(key, alg, _ALG_TO_KTY.get(alg)):
+                del without_kid[(op, alg)]
+        if ops:
+            # The keys without the key operation fall back to all of the keys
+            # only while no key has it.
+            for memo in self._candidates.values():
+                for ck in [ck for ck in memo if ck[0] in ops]:
+                    del memo[ck]
+        return
+
+
+class _KeyList:
+    """
+    A list of COSE keys given to a single decoding. The candidate keys are
+    filtered out of the list for each message in the same manner as
+    :func:`COSEKeyRing.candidates <cwt.COSEKeyRing.candidates>` without building
+    the indexes, which would cost more than a scan for a single decoding.
+    """
+
+    def __init__(self, keys: List[COSEKeyInterface]):
+        for k in keys:
+            if not isinstance(k, COSEKeyInterface):
+                raise ValueError("key in keys should have COSEKeyInterface.")
+        self._keys = keys
+        return
+
+    def candidates(
+        self, op: int, kid: bytes = b"", alg: int = 0
+    ) -> Tuple[COSEKeyInterface, ...]:
+        if not isinstance(kid, bytes):
+            return ()
+        if not isinstance(alg, int):
+            alg = 0
+        keys = [k for k in self._keys if op in k.key_ops] or self._keys
+        if kid:
+            keys = [k for k in keys if k.kid == kid]
+            if not keys:
+                return ()
+        if alg:
+            narrowed = _narrow_by_alg(keys, alg)
+            keys = narrowed or keys if kid else narrowed
+        return tuple(keys)
+
+
+def _narrow_by_alg(
+    keys: Sequence[COSEKeyInterface], alg: int
+) -> List[COSEKeyInterface]:
+    kty = _ALG_TO_KTY.get(alg)
+    return [k for k in keys if _fits(k, alg, kty)]
+
+
+def _fits(key: COSEKeyInterface, alg: int, kty: Optional[int]) -> bool:
+    # The keys without alg match only if their kty fits the alg.
+    if key.alg:
+        return key.alg == alg
+    return kty is None or key.kty == kty
@@ -0,0 +1,155 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from cbor2 import CBORTag
+
+from .cbor_processor import CBORProcessor
+
+
+class COSEMessageInfo(CBORProcessor):
+    """
+    The header-level information on a COSE message returned by
+    :func:`COSE.inspect <cwt.COSE.inspect>` and
+    :func:`CWT.inspect <cwt.CWT.inspect>`.
+
+    The payload and the signatures are not decoded (nor copied) but located by
+    their byte offsets in the original buffer. This object can be passed to
+    :func:`COSE.decode <cwt.COSE.decode>` and :func:`CWT.decode <cwt.CWT.decode>`
+    in place of the encoded message so that the headers are not parsed again.
+    """
+
+    def __init__(
+        self,
+        data: Any,
+        tag: int,
+        protected: Dict[int, Any],
+        unprotected: Dict[int, Any],
+        items: List[Tuple[int, int]],
+        bstrs: List[Optional[Tuple[int, int]]],
+    ):
+        self._data = data
+        self._tag = tag
+        self._protected = protected
+        self._unprotected = unprotected
+        # The ranges of the encoded items of the COSE message array.
+        self._items = items
+        # The ranges of the contents of the items if they are byte strings.
+        self._bstrs = bstrs
+        return
+
+    @property
+    def data(self) -> Any:
+        """
+        The buffer of the encoded message.
+        """
+        return self._data
+
+    @property
+    def tag(self) -> int:
+        """
+        The CBOR tag of the COSE message (e.g., ``18`` for COSE_Sign1).
+        """
+        return self._tag
+
+    @property
+    def protected(self) -> Dict[int, Any]:
+        """
+        The decoded protected header.
+        """
+        return self._protected
+
+    @property
+    def unprotected(self) -> Dict[int, Any]:
+        """
+        The unprotected header.
+        """
+        return self._unprotected
+
+    @property
+    def alg(self) -> int:
+        """
+        The ``alg`` in the protected header (``0`` if it is not found).
+        """
+        alg = self._protected.get(1, 0)
+        return alg if isinstance(alg, int) else 0
+
+    @property
+    def kid(self) -> bytes:
+        """
+        The ``kid`` in the protected header or the unprotected header
+        (``b""`` if it is not found).
+        """
+        if 4 in self._protected:
+            return self._protected[4]
+        return self._unprotected.get(4, b"")
+
+    @property
+    def payload_range(self) -> Optional[Tuple[int, int]]:
+        """
+        The start and end offsets of the payload (the ciphertext for
+        COSE_Encrypt0 and COSE_Encrypt) in :attr:`data`. ``None`` if the payload
+        is detached (``nil``).
+        """
+        return self._bstrs[2]
+
+    @property
+    def signature_range(self) -> Optional[Tuple[int, int]]:
+        """
+        The start and end offsets of the signature (the tag for COSE_Mac0 and
+        COSE_Mac) in :attr:`data`. For COSE_Sign, the range of the encoded array
+        of COSE_Signature is returned. ``None`` for COSE_Encrypt0 and COSE_Encrypt.
+        """
+        if self._tag in (16, 96):
+            return None
+        if self._tag == 98:
+            return self._items[3]
+        return self._bstrs[3]
+
+    @property
+    def payload(self) -> Optional[memoryview]:
+        """
+        The payload as a ``memoryview`` on :attr:`data`.
+        """
+        r = self.payload_range
+        return memoryview(self._data)[r[0] : r[1]] if r else None
+
+    @property
+    def signature(self) -> Optional[memoryview]:
+        """
+        The signature as a ``memoryview`` on :attr:`data`.
+        """
+        r = self.signature_range
+        return memoryview(self._data)[r[0] : r[1]] if r else None
+
+    def to_cbor_tag(self, out: str = "") -> CBORTag:
+        """
+        Returns the COSE message as a cbor2.CBORTag object. Only the items other
+        than the headers are decoded.
+
+        Args:
+            out(str): An output format of the byte strings in the message. If
+                ``"memoryview"`` is specified, the byte strings (e.g., the payload)
+                are returned as ``memoryview`` objects on :attr:`data` without being
+                copied. If any other value is specified, they are returned as bytes.
+        Returns:
+            CBORTag: The COSE message.
+        Raises:
+            DecodeError: Failed to decode.
+        """
+        view = out == "memoryview"
+        b_protected = self._slice(self._bstrs[0], view)
+        value: List[Any] = [b_protected, self._unprotected]
+        for i in range(2, len(self._items)):
+            r = self._bstrs[i]
+            value.append(
+                self._slice(r, view)
+                if r
+                else self._loads(self._slice(self._items[i], False))
+            )
+        return CBORTag(self._tag, value)
+
+    def _slice(self, r: Optional[Tuple[int, int]], view: bool) -> Any:
+        if not r:
+            return b""
+        if view:
+            return memoryview(self._data)[r[0] : r[1]]
+        return bytes(self._data[r[0] : r[1]])
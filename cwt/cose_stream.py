@@ -0,0 +1,364 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from cbor2 import CBORTag
+
+from .cbor_processor import CBORProcessor
+from .cbor_profile import CBORProfile
+from .cbor_reader import _CHUNK_SIZE, read_item
+from .cose_key_interface import COSEKeyInterface
+from .exceptions import DecodeError, DecodeLimitError
+
+# The length of the authentication tag of AES-GCM.
+_GCM_TAG_LENGTH = 16
+
+
+class _Sign1Stream(CBORProcessor):
+    """
+    A base class to feed the Sig_structure of COSE_Sign1 with a detached payload
+    to hash functions piece by piece.
+    """
+
+    def __init__(
+        self,
+        keys: List[COSEKeyInterface],
+        protected: bytes,
+        payload_length: int,
+        external_aad: bytes,
+    ):
+        if not isinstance(payload_length, int) or payload_length < 0:
+            raise ValueError("payload_length should not be negative number.")
+        self._payload_length = payload_length
+        self._length = 0
+        # The keys which use the same hash algorithm share the hash context.
+        self._hashes: Dict[str, Any] = {}
+        for k in keys:
+            h = k.new_hash()
+            if h.algorithm.name not in self._hashes:
+                self._hashes[h.algorithm.name] = h
+        # The Sig_structure up to the head of the payload.
+        chunks = self._structure_chunks(["Signature1", protected, external_aad, b""])
+        chunks[-2:] = [self._dumps_head(2, payload_length)]
+        for h in self._hashes.values():
+            for c in chunks:
+                h.update(c)
+        return
+
+    @property
+    def payload_length(self) -> int:
+        """
+        The length of the whole payload.
+        """
+        return self._payload_length
+
+    def update(self, data: bytes):
+        """
+        Feeds a piece of the payload.
+
+        Args:
+            data (bytes): A piece of the payload.
+        Raises:
+            ValueError: The payload exceeds the ``payload_length``.
+        """
+        self._length += len(data)
+        if self._length > self._payload_length:
+            raise ValueError("The payload exceeds payload_length.")
+        for h in self._hashes.values():
+            h.update(data)
+        return
+
+    def _digests(self) -> Dict[str, bytes]:
+        if self._length != self._payload_length:
+            raise ValueError("The length of the payload differs from payload_length.")
+        return {name: h.finalize() for name, h in self._hashes.items()}
+
+
+class Sign1StreamSigner(_Sign1Stream):
+    """
+    An incremental signer of COSE_Sign1 with a detached payload returned by
+    :func:`COSE.sign_detached <cwt.COSE.sign_detached>`.
+
+    The Sig_structure is fed to the hash function of the key piece by piece, so
+    that the whole payload does not need to be held in memory.
+    """
+
+    def __init__(
+        self,
+        key: COSEKeyInterface,
+        protected: bytes,
+        unprotected: Dict[int, Any],
+        payload_length: int,
+        external_aad: bytes,
+    ):
+        super().__init__([key], protected, payload_length, external_aad)
+        self._key = key
+        self._protected = protected
+        self._unprotected = unprotected
+        return
+
+    def finalize(self, out: str = "") -> Union[bytes, CBORTag]:
+        """
+        Signs the payload fed so far and returns a COSE_Sign1 message whose
+        payload is ``nil``.
+
+        Args:
+            out(str): An output format. Only ``"cbor2/CBORTag"`` can be used. If
+                ``"cbor2/CBORTag"`` is specified. This function will return encoded
+                data as `cbor2 <https://cbor2.readthedocs.io/en/stable/>`_'s
+                ``CBORTag`` object. If any other value is specified, it will return
+                encoded data as bytes.
+        Returns:
+            Union[bytes, CBORTag]: A byte string of the encoded COSE or a
+                cbor2.CBORTag object.
+        Raises:
+            ValueError: The length of the payload differs from ``payload_length``.
+            EncodeError: Failed to sign the payload.
+        """
+        (digest,) = self._digests().values()
+        sig = self._key.sign_prehashed(digest)
+        res = CBORTag(18, [self._protected, self._unprotected, None, sig])
+        return res if out == "cbor2/CBORTag" else self._dumps(res)
+
+
+class Sign1StreamVerifier(_Sign1Stream):
+    """
+    An incremental verifier of COSE_Sign1 with a detached payload returned by
+    :func:`COSE.verify_detached <cwt.COSE.verify_detached>`.
+    """
+
+    def __init__(
+        self,
+        keys: List[COSEKeyInterface],
+        protected: bytes,
+        sig: bytes,
+        payload_length: int,
+        external_aad: bytes,
+    ):
+        super().__init__(keys, protected, payload_length, external_aad)
+        self._keys = keys
+        self._sig = sig
+        return
+
+    def finalize(self):
+        """
+        Verifies the signature over the payload fed so far.
+
+        Raises:
+            ValueError: The length of the payload differs from ``payload_length``.
+            VerifyError: Failed to verify.
+        """
+        digests = self._digests()
+        err: Exception = ValueError("key is not found.")
+        for k in self._keys:
+            try:
+                k.verify_prehashed(digests[k.new_hash().algorithm.name], self._sig)
+                return
+            except Exception as e:
+                err = e
+        raise err
+
+
+class Encrypt0StreamEncoder(CBORProcessor):
+    """
+    An incremental encoder of COSE_Encrypt0 returned by
+    :func:`COSE.encrypt_stream <cwt.COSE.encrypt_stream>`.
+
+    The encoded message is written to the sink piece by piece, so that the whole
+    payload (and the ciphertext) does not need to be held in memory. The output
+    is identical to the one of :func:`COSE.encode_and_encrypt
+    <cwt.COSE.encode_and_encrypt>`.
+    """
+
+    def __init__(
+        self,
+        key: COSEKeyInterface,
+        protected: bytes,
+        unprotected: Dict[int, Any],
+        nonce: bytes,
+        payload_length: int,
+        external_aad: bytes,
+        sink: Any,
+    ):
+        if not isinstance(payload_length, int) or payload_length < 0:
+            raise ValueError("payload_length should not be negative number.")
+        aad = self._dumps_structure(["Encrypt0", protected, external_aad])
+        self._encryptor = key.new_encryptor(nonce, aad)
+        self._payload_length = payload_length
+        self._length = 0
+        self._sink = sink
+        self._sink.write(
+            b"".join(
+                [
+                    self._dumps_head(6, 16),
+                    self._dumps_head(4, 3),
+                    self._dumps_head(2, len(protected)),
+                    protected,
+                    self._dumps(unprotected),
+                    self._dumps_head(2, payload_length + _GCM_TAG_LENGTH),
+                ]
+            )
+        )
+        return
+
+    @property
+    def payload_length(self) -> int:
+        """
+        The length of the whole payload.
+        """
+        return self._payload_length
+
+    def update(self, data: bytes):
+        """
+        Encrypts a piece of the payload and writes it to the sink.
+
+        Args:
+            data (bytes): A piece of the payload.
+        Raises:
+            ValueError: The payload exceeds the ``payload_length``.
+        """
+        self._length += len(data)
+        if self._length > self._payload_length:
+            raise ValueError("The payload exceeds payload_length.")
+        self._sink.write(self._encryptor.update(data))
+        return
+
+    def finalize(self):
+        """
+        Completes the encryption and writes the authentication tag to the sink.
+
+        Raises:
+            ValueError: The length of the payload differs from ``payload_length``.
+        """
+        if self._length != self._payload_length:
+            raise ValueError("The length of the payload differs from payload_length.")
+        self._sink.write(self._encryptor.finalize() + self._encryptor.tag)
+        return
+
+
+class Encrypt0StreamDecoder(CBORProcessor):
+    """
+    An incremental decoder of COSE_Encrypt0 read from a file-like object. The
+    headers are read when this object is created and the ciphertext is read by
+    :func:`decrypt <cwt.Encrypt0StreamDecoder.decrypt>` piece by piece.
+
+    If ``cbor_profile`` is specified, it is applied to the protected and
+    unprotected headers. The declared lengths of them are checked before they
+    are read, and they are read in chunks so that a forged length cannot make
+    this object allocate a large buffer. The ciphertext is not limited by the
+    profile since it is never held in memory as a whole.
+    """
+
+    def __init__(self, source: Any, cbor_profile: Optional[CBORProfile] = None):
+        self._source = source
+        self._cbor_profile = cbor_profile
+        max_bytes = cbor_profile.max_bytes if cbor_profile else None
+        max_bstr_length = cbor_profile.max_bstr_length if cbor_profile else None
+        if self._read_head() != (6, 16):
+            raise ValueError("Invalid COSE_Encrypt0 format.")
+        if self._read_head() != (4, 3):
+            raise ValueError("Invalid COSE_Encrypt0 format.")
+        major, n = self._read_head()
+        if major != 2:
+            raise ValueError("Invalid COSE_Encrypt0 format.")
+        if max_bstr_length is not None and n > max_bstr_length:
+            raise DecodeLimitError("The length of byte string exceeds the limit.")
+        if max_bytes is not None and n > max_bytes:
+            raise DecodeLimitError("The size of CBOR data exceeds the limit.")
+        self._b_protected = self._read(n)
+        self._protected = self._loads(self._b_protected) if n else {}
+        if not isinstance(self._protected, dict):
+            raise ValueError("protected header should be dict.")
+        b_unprotected = read_item(source, max_bytes)
+        if b_unprotected is None:
+            raise DecodeError("Failed to decode.")
+        self._unprotected = self._loads(b_unprotected)
+        if not isinstance(self._unprotected, dict):
+            raise ValueError("unprotected header should be dict.")
+        major, n = self._read_head()
+        if major != 2 or n < _GCM_TAG_LENGTH:
+            raise ValueError("Invalid COSE_Encrypt0 format.")
+        self._ciphertext_length = n
+        return
+
+    @property
+    def protected(self) -> Dict[int, Any]:
+        """
+        The decoded protected header.
+        """
+        return self._protected
+
+    @property
+    def unprotected(self) -> Dict[int, Any]:
+        """
+        The unprotected header.
+        """
+        return self._unprotected
+
+    @property
+    def ciphertext_length(self) -> int:
+        """
+        The length of the ciphertext including the authentication tag.
+        """
+        return self._ciphertext_length
+
+    def decrypt(
+        self,
+        key: COSEKeyInterface,
+        sink: Any,
+        external_aad: bytes = b"",
+        chunk_size: int = 65536,
+    ) -> int:
+        """
+        Decrypts the ciphertext piece by piece and writes the plaintext to the sink.
+
+        Note that the plaintext is written to the sink before the authentication
+        tag at the end of the ciphertext is verified. If this function raises an
+        exception, everything written to the sink must be discarded.
+
+        Args:
+            key (COSEKeyInterface): A decryption key.
+            sink (Any): A file-like object to which the plaintext is written.
+            external_aad(bytes): External additional authenticated data supplied by
+                application.
+            chunk_size (int): The size of the pieces to be read from the source.
+        Returns:
+            int: The length of the plaintext.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decrypt.
+        """
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError("chunk_size should be positive number.")
+        aad = self._dumps_structure(["Encrypt0", self._b_protected, external_aad])
+        decryptor = key.new_decryptor(self._unprotected.get(5, None), aad)
+        remaining = self._ciphertext_length - _GCM_TAG_LENGTH
+        length = remaining
+        while remaining > 0:
+            chunk = self._read(min(chunk_size, remaining))
+            sink.write(decryptor.update(chunk))
+            remaining -= len(chunk)
+        tag = self._read(_GCM_TAG_LENGTH)
+        try:
+            sink.write(decryptor.finalize_with_tag(tag))
+        except Exception as err:
+            raise DecodeError("Failed to decrypt.") from err
+        return length
+
+    def _read(self, n: int) -> bytes:
+        # The declared length is not trusted, so the content is read in chunks
+        # instead of being allocated at once.
+        res = bytearray()
+        while len(res) < n:
+            chunk = self._source.read(min(n - len(res), _CHUNK_SIZE))
+            if not chunk:
+                raise DecodeError("Failed to decode.")
+            res += chunk
+        return bytes(res)
+
+    def _read_head(self) -> Tuple[int, int]:
+        ib = self._read(1)[0]
+        ai = ib & 0x1F
+        if ai < 24:
+            return ib >> 5, ai
+        if ai > 27:
+            raise DecodeError("Failed to decode.")
+        return ib >> 5, int.from_bytes(self._read(1 << (ai - 24)), "big")
@@ -1,15 +1,27 @@
+import hashlib
+import mmap
+import threading
+import time
 from calendar import timegm
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Union
 
 from cbor2 import CBORTag
 
+from .cache import LRUCache
 from .cbor_processor import CBORProcessor
+from .cbor_profile import CBORProfile
+from .cbor_reader import read_head, read_item, skip_item
 from .claims import Claims
 from .const import COSE_KEY_OPERATION_VALUES
 from .cose import COSE
+from .cose_encoder import COSEEncoder
 from .cose_key_interface import COSEKeyInterface
-from .exceptions import DecodeError, VerifyError
+from .cose_key_ring import COSEKeyRing
+from .cose_message_info import COSEMessageInfo
+from .exceptions import DecodeError, DecodeLimitError, EncodeError, VerifyError
 from .recipient_interface import RecipientInterface
 from .signer import Signer
 
@@ -28,7 +40,14 @@ class CWT(CBORProcessor):
     CBOR_TAG = 61
 
     def __init__(
-        self, expires_in: int = CWT_DEFAULT_EXPIRES_IN, leeway: int = CWT_DEFAULT_LEEWAY
+        self,
+        expires_in: int = CWT_DEFAULT_EXPIRES_IN,
+        leeway: int = CWT_DEFAULT_LEEWAY,
+        verified_cache_size: int = 0,
+        cbor_profile: Optional[CBORProfile] = None,
+        expiry_first: bool = False,
+        failed_cache_size: int = 0,
+        failed_cache_ttl: int = 60,
     ):
         if not isinstance(expires_in, int):
             raise ValueError("expires_in should be int.")
@@ -42,14 +61,53 @@ class CWT(CBORProcessor):
             raise ValueError("leeway should be positive number.")
         self._leeway = leeway
 
+        if not isinstance(verified_cache_size, int):
+            raise ValueError("verified_cache_size should be int.")
+        if verified_cache_size < 0:
+            raise ValueError("verified_cache_size should not be negative number.")
+        self._verified_cache_size = verified_cache_size
+        self._verified_cache: Optional[LRUCache] = (
+            LRUCache(verified_cache_size) if verified_cache_size > 0 else None
+        )
+
+        if not isinstance(failed_cache_size, int):
+            raise ValueError("failed_cache_size should be int.")
+        if failed_cache_size < 0:
+            raise ValueError("failed_cache_size should not be negative number.")
+        if not isinstance(failed_cache_ttl, int):
+            raise ValueError("failed_cache_ttl should be int.")
+        if failed_cache_ttl <= 0:
+            raise ValueError("failed_cache_ttl should be positive number.")
+        self._failed_cache_ttl = failed_cache_ttl
+        self._failed_cache: Optional[LRUCache] = (
+            LRUCache(failed_cache_size) if failed_cache_size > 0 else None
+        )
+
+        self._cbor_profile = cbor_profile
         self._cose = COSE(
-            kid_auto_inclusion=True, alg_auto_inclusion=True, verify_kid=True
+            kid_auto_inclusion=True,
+            alg_auto_inclusion=True,
+            verify_kid=True,
+            cbor_profile=cbor_profile,
         )
         self._claim_names: Dict[str, int] = {}
 
+        if not isinstance(expiry_first, bool):
+            raise ValueError("expiry_first should be bool.")
+        self._expiry_first = expiry_first
+        self._metrics = {"early_rejected": 0, "rejected": 0}
+        self._metrics_lock = threading.Lock()
+
     @classmethod
     def new(
-        cls, expires_in: int = CWT_DEFAULT_EXPIRES_IN, leeway: int = CWT_DEFAULT_LEEWAY
+        cls,
+        expires_in: int = CWT_DEFAULT_EXPIRES_IN,
+        leeway: int = CWT_DEFAULT_LEEWAY,
+        verified_cache_size: int = 0,
+        cbor_profile: Optional[CBORProfile] = None,
+        expiry_first: bool = False,
+        failed_cache_size: int = 0,
+        failed_cache_ttl: int = 60,
     ):
         """
         Constructor.
@@ -59,6 +117,23 @@ class CWT(CBORProcessor):
                 (default value: ``3600``).
             leeway(int): The default leeway in seconds for validating
                 ``exp`` and ``nbf`` (default value: ``60``).
+            verified_cache_size(int): The maximum number of successfully verified
+                CWTs to be cached by :func:`decode <cwt.CWT.decode>`. ``0`` means
+                that the cache is disabled (default value: ``0``).
+            cbor_profile(Optional[CBORProfile]): The resource limits applied to
+                the CBOR data of CWTs to be decoded. ``None`` means no limit.
+            expiry_first(bool): The indicator whether the expired or not yet valid
+                COSE_Sign1/COSE_Mac0 CWTs are rejected by peeking at their claims
+                before the verification (default value: ``False``). The CWTs which
+                pass the peek are verified as usual.
+            failed_cache_size(int): The maximum number of the CWTs which failed to
+                be verified or decoded to be cached by :func:`decode
+                <cwt.CWT.decode>`. The same CWT decoded again with the same keys
+                fails with the same class of error without being verified. The
+                failures on ``exp`` and ``nbf`` are not cached. ``0`` means that the
+                cache is disabled (default value: ``0``).
+            failed_cache_ttl(int): The lifetime in seconds of the entries of the
+                cache for the failed CWTs (default value: ``60``).
 
         Examples:
 
@@ -70,7 +145,15 @@ class CWT(CBORProcessor):
             ...     key,
             ... )
         """
-        return cls(expires_in, leeway)
+        return cls(
+            expires_in,
+            leeway,
+            verified_cache_size,
+            cbor_profile,
+            expiry_first,
+            failed_cache_size,
+            failed_cache_ttl,
+        )
 
     @property
     def expires_in(self) -> int:
@@ -101,6 +184,52 @@ class CWT(CBORProcessor):
         self._leeway = leeway
         return
 
+    @property
+    def verified_cache_size(self) -> int:
+        """
+        The maximum number of successfully verified CWTs to be cached by
+        :func:`decode <cwt.CWT.decode>`. The cache is looked up with the digest of
+        the CWT and the identity of the keys. An entry is evicted at the ``exp``
+        of the CWT minus the leeway, and the CWTs without ``exp`` are not cached.
+        Even if the CWT is found in the cache, ``exp`` and ``nbf`` are validated
+        again.
+        """
+        return self._verified_cache_size
+
+    @property
+    def cbor_profile(self) -> Optional[CBORProfile]:
+        """
+        The resource limits applied to the CBOR data of CWTs to be decoded.
+        """
+        return self._cbor_profile
+
+    @property
+    def expiry_first(self) -> bool:
+        """
+        If this property is True, :func:`decode <cwt.CWT.decode>` peeks at the
+        ``exp`` and ``nbf`` of COSE_Sign1/COSE_Mac0 CWTs and rejects the expired or
+        not yet valid ones before verifying the signatures (or the MACs). This is
+        only a fast path for rejection: the CWTs are accepted only after the full
+        verification.
+        """
+        return self._expiry_first
+
+    @expiry_first.setter
+    def expiry_first(self, expiry_first: bool):
+        self._expiry_first = expiry_first
+        return
+
+    @property
+    def metrics(self) -> Dict[str, int]:
+        """
+        The counters of the CWTs rejected by :func:`decode <cwt.CWT.decode>` for
+        their ``exp`` or ``nbf``. ``early_rejected`` counts the ones rejected before
+        the verification with :attr:`expiry_first`, and ``rejected`` counts the
+        ones rejected after the verification.
+        """
+        with self._metrics_lock:
+            return dict(self._metrics)
+
     @property
     def cose(self) -> COSE:
         """
@@ -146,29 +275,9 @@ class CWT(CBORProcessor):
             ValueError: Invalid arguments.
             EncodeError: Failed to encode the claims.
         """
-        if isinstance(claims, Claims):
-            return self._encode(claims, key, nonce, recipients, signers, tagged)
-        if isinstance(claims, str):
-            claims = claims.encode("utf-8")
-        if isinstance(claims, bytes):
-            try:
-                claims = Claims.from_json(claims, self._claim_names)
-            except ValueError:
-                return self._encode(claims, key, nonce, recipients, signers, tagged)
-        else:
-            # Following code causes mypy error:
-            # for k, v in claims.items():
-            #     if isinstance(k, str):
-            #         claims = Claims.from_json(claims)
-            #     break
-            # To avoid the error:
-            json_claims: Dict[str, Any] = {}
-            for k, v in claims.items():
-                if isinstance(k, str):
-                    json_claims[k] = v
-            if json_claims:
-                claims = Claims.from_json(json_claims, self._claim_names)
-        return self._encode(claims, key, nonce, recipients, signers, tagged)
+        return self._encode(
+            self._to_claims(claims), key, nonce, recipients, signers, tagged
+        )
 
     def encode_and_mac(
         self,
@@ -194,12 +303,7 @@ class CWT(CBORProcessor):
             ValueError: Invalid arguments.
             EncodeError: Failed to encode the claims.
         """
-        if not isinstance(claims, Claims):
-            self._validate(claims)
-        else:
-            claims = claims.to_dict()
-        self._set_default_value(claims)
-        b_claims = self._dumps(claims)
+        b_claims = self._dumps(self._prepare_claims(claims))
         res = self._cose.encode_and_mac(
             b_claims, key, {}, {}, recipients, out="cbor2/CBORTag"
         )
@@ -233,12 +337,7 @@ class CWT(CBORProcessor):
             ValueError: Invalid arguments.
             EncodeError: Failed to encode the claims.
         """
-        if not isinstance(claims, Claims):
-            self._validate(claims)
-        else:
-            claims = claims.to_dict()
-        self._set_default_value(claims)
-        b_claims = self._dumps(claims)
+        b_claims = self._dumps(self._prepare_claims(claims))
         res = self._cose.encode_and_sign(
             b_claims, key, {}, {}, signers=signers, out="cbor2/CBORTag"
         )
@@ -297,17 +396,20 @@ class CWT(CBORProcessor):
 
     def decode(
         self,
-        data: bytes,
-        keys: Union[COSEKeyInterface, List[COSEKeyInterface]],
+        data: Union[bytes, COSEMessageInfo],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
         no_verify: bool = False,
     ) -> Union[Dict[int, Any], bytes]:
         """
         Verifies and decodes CWT.
 
         Args:
-            data (bytes): A byte string of an encoded CWT.
-            keys (Union[COSEKeyInterface, List[COSEKeyInterface]]): A COSE key
-                or a list of the keys used to verify and decrypt the encoded CWT.
+            data (Union[bytes, COSEMessageInfo]): A byte string (or a bytes-like
+                object such as ``bytearray`` and ``memoryview``) of an encoded CWT,
+                or the result of :func:`inspect <cwt.CWT.inspect>` for it.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): A
+                COSE key, a list of the keys or a key ring used to verify and decrypt
+                the encoded CWT.
             no_verify (bool): An indicator whether token verification is skiped
                 or not.
         Returns:
@@ -317,16 +419,313 @@ class CWT(CBORProcessor):
             DecodeError: Failed to decode the CWT.
             VerifyError: Failed to verify the CWT.
         """
-        cwt: Union[bytes, CBORTag, Dict[int, Any]] = self._loads(data)
-        if isinstance(cwt, CBORTag) and cwt.tag == CWT.CBOR_TAG:
-            cwt = cwt.value
-        keys = [keys] if isinstance(keys, COSEKeyInterface) else keys
-        while isinstance(cwt, CBORTag):
-            cwt = self._cose.decode(cwt, keys)
-            cwt = self._loads(cwt)
+        ksid = None
+        if self._verified_cache is not None or self._failed_cache is not None:
+            ksid = self._cose._key_set_id(keys)
+        if ksid is None:
+            if self._expiry_first and not no_verify:
+                self._reject_early(data)
+            cwt: Union[bytes, CBORTag, COSEMessageInfo, Dict[int, Any]] = (
+                data if isinstance(data, COSEMessageInfo) else self._loads(data)
+            )
+            return self._decode(cwt, keys, no_verify)
+
+        raw = data.data if isinstance(data, COSEMessageInfo) else data
+        if not isinstance(raw, (bytes, bytearray, memoryview)):
+            raise DecodeError("Failed to decode.")
+        ck = (hashlib.sha256(raw).digest(), ksid)
+        if self._verified_cache is not None:
+            cached = self._verified_cache.get(ck)
+            if cached is not None:
+                # The claims are decoded again from the cached encoding so that
+                # the nested claims are never shared with the callers.
+                claims = self._loads(cached)
+                if not no_verify:
+                    self._verify(claims)
+                return claims
+        if self._failed_cache is not None:
+            failed = self._failed_cache.get(ck)
+            if failed is not None:
+                raise failed[0](*failed[1])
+        if self._expiry_first and not no_verify:
+            self._reject_early(data)
+        try:
+            cwt = data if isinstance(data, COSEMessageInfo) else self._loads(data)
+            # exp and nbf are validated separately so that the failures on them,
+            # which depend on the time, are not cached.
+            res = self._decode(cwt, keys, True)
+        except DecodeLimitError:
+            raise
+        except Exception as err:
+            if self._failed_cache is not None:
+                self._failed_cache.put(
+                    ck, (type(err), err.args), time.time() + self._failed_cache_ttl
+                )
+            raise
         if not no_verify:
-            self._verify(cwt)
-        return cwt
+            self._verify_and_count(res)
+        if self._verified_cache is not None:
+            if isinstance(res, dict) and isinstance(res.get(4), (int, float)):
+                try:
+                    encoded = self._dumps(res)
+                except EncodeError:
+                    return res
+                self._verified_cache.put(ck, encoded, res[4] - self._leeway)
+        return res
+
+    def decode_batch(
+        self,
+        data: List[bytes],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        no_verify: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> List[Union[Dict[int, Any], bytes, Exception]]:
+        """
+        Verifies and decodes a list of CWTs.
+
+        All of the CWTs are parsed first, and then the verification and decryption
+        are performed on a thread pool. The candidate keys are resolved once for each
+        ``kid`` through a :class:`COSEKeyRing <cwt.COSEKeyRing>` shared among the CWTs.
+
+        Args:
+            data (List[bytes]): A list of byte strings of encoded CWTs.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): A
+                COSE key, a list of the keys or a key ring used to verify and decrypt
+                the encoded CWTs.
+            no_verify (bool): An indicator whether token verification is skiped
+                or not.
+            max_workers (Optional[int]): The maximum number of threads used for
+                the verification and decryption. If it is not specified, the default
+                value of ``concurrent.futures.ThreadPoolExecutor`` is used.
+        Returns:
+            List[Union[Dict[int, Any], bytes, Exception]]: A list of decoded CWTs.
+                Each item is the exception raised instead if the corresponding CWT
+                could not be decoded.
+        Raises:
+            ValueError: Invalid arguments.
+        """
+        ring = self._to_key_ring(keys)
+        res: List[Union[Dict[int, Any], bytes, Exception]] = []
+        cwts: List[Any] = []
+        for d in data:
+            try:
+                if self._expiry_first and not no_verify:
+                    self._reject_early(d)
+                cwts.append(self._loads(d))
+                res.append(b"")
+            except Exception as err:
+                cwts.append(None)
+                res.append(err)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._decode, cwt, ring, no_verify)
+                if not isinstance(res[i], Exception)
+                else None
+                for i, cwt in enumerate(cwts)
+            ]
+            for i, f in enumerate(futures):
+                if f is None:
+                    continue
+                try:
+                    res[i] = f.result()
+                except Exception as err:
+                    res[i] = err
+        return res
+
+    def decode_stream(
+        self,
+        source: Any,
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        no_verify: bool = False,
+        max_workers: Optional[int] = None,
+        prefetch: int = 64,
+    ) -> Iterator[Union[Dict[int, Any], bytes, Exception]]:
+        """
+        Verifies and decodes CWTs in a CBOR Sequence (RFC8742) incrementally.
+
+        The boundaries of the CWTs are found without decoding them, and only the
+        CWTs in flight are held in memory. A bytes-like object (including
+        ``mmap.mmap``) is sliced without copying, and a file-like object is read
+        item by item. The candidate keys are resolved through a
+        :class:`COSEKeyRing <cwt.COSEKeyRing>` shared among the CWTs.
+
+        Args:
+            source (Any): A bytes-like object, an ``mmap.mmap`` object or a binary
+                file-like object which has ``read()`` containing encoded CWTs.
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): A
+                COSE key, a list of the keys or a key ring used to verify and decrypt
+                the encoded CWTs.
+            no_verify (bool): An indicator whether token verification is skiped
+                or not.
+            max_workers (Optional[int]): The maximum number of threads used for
+                the verification and decryption. If it is not specified, the CWTs
+                are decoded in the calling thread.
+            prefetch (int): The maximum number of CWTs read ahead of the one being
+                yielded when ``max_workers`` is specified.
+        Returns:
+            Iterator[Union[Dict[int, Any], bytes, Exception]]: An iterator of the
+                decoded CWTs in the order of the sequence. Each item is the exception
+                raised instead if the corresponding CWT could not be decoded. The
+                tracebacks of the exceptions are dropped so that they do not keep
+                the source from being closed.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to find the boundary of a CWT in the sequence
+                (raised by the iterator).
+        """
+        if not isinstance(prefetch, int):
+            raise ValueError("prefetch should be int.")
+        if prefetch <= 0:
+            raise ValueError("prefetch should be positive number.")
+        return self._decode_stream(
+            source, self._to_key_ring(keys), no_verify, max_workers, prefetch
+        )
+
+    def encode_stream(
+        self,
+        claims_iter: Iterable[Union[Claims, Dict[str, Any], Dict[int, Any], bytes]],
+        key: COSEKeyInterface,
+        sink: Any,
+        tagged: bool = False,
+        max_workers: Optional[int] = None,
+        prefetch: int = 64,
+    ) -> int:
+        """
+        Encodes CWTs and writes them to a sink as a CBOR Sequence (RFC8742)
+        incrementally. The claims are consumed lazily and only the CWTs in flight
+        are held in memory. A signing key or a MAC key is compiled once with
+        :func:`issuer <cwt.CWT.issuer>`, and the other keys are used in the same
+        manner as :func:`encode <cwt.CWT.encode>`.
+
+        Args:
+            claims_iter (Iterable[Union[Claims, Dict[str, Any], Dict[int, Any], bytes]]):
+                An iterable of CWT claims objects, or JWT claims objects, text
+                strings or byte strings.
+            key (COSEKeyInterface): A COSE key used to generate a MAC, to sign or
+                to encrypt the claims.
+            sink (Any): A binary file-like object which has ``write()``.
+            tagged (bool): An indicator whether the CWTs are wrapped by CWT
+                tag(61) or not.
+            max_workers (Optional[int]): The maximum number of threads used for
+                the encoding. If it is not specified, the CWTs are encoded in the
+                calling thread.
+            prefetch (int): The maximum number of CWTs encoded ahead of the one
+                being written when ``max_workers`` is specified.
+        Returns:
+            int: The number of the CWTs written.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode the claims.
+        """
+        if not isinstance(prefetch, int):
+            raise ValueError("prefetch should be int.")
+        if prefetch <= 0:
+            raise ValueError("prefetch should be positive number.")
+        if (
+            COSE_KEY_OPERATION_VALUES["sign"] in key.key_ops
+            or COSE_KEY_OPERATION_VALUES["MAC create"] in key.key_ops
+        ):
+            encode = self.issuer(key, tagged=tagged).encode
+        else:
+
+            def encode(claims):
+                return self.encode(claims, key, tagged=tagged)
+
+        count = 0
+        if max_workers is None:
+            for claims in claims_iter:
+                sink.write(encode(claims))
+                count += 1
+            return count
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending: Deque[Future] = deque()
+            for claims in claims_iter:
+                pending.append(executor.submit(encode, claims))
+                if len(pending) >= prefetch:
+                    sink.write(pending.popleft().result())
+                    count += 1
+            while pending:
+                sink.write(pending.popleft().result())
+                count += 1
+        return count
+
+    def inspect(self, data: bytes) -> COSEMessageInfo:
+        """
+        Parses only the headers of the outermost COSE message of CWT. The payload
+        and the signatures are not decoded but located by their byte offsets.
+
+        Args:
+            data (bytes): A byte string of an encoded CWT.
+        Returns:
+            COSEMessageInfo: The header-level information on the COSE message.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decode the CWT.
+
+        Examples:
+
+            >>> from cwt import CWT, COSEKey
+            >>> ctx = CWT.new()
+            >>> key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+            >>> token = ctx.encode({"iss": "coaps://as.example"}, key)
+            >>> info = ctx.inspect(token)
+            >>> info.kid
+            b'01'
+            >>> ctx.decode(info, key)[1]
+            'coaps://as.example'
+        """
+        if self._cbor_profile:
+            self._cbor_profile.check(data)
+        major, tag, pos = read_head(data, 0)
+        return self._cose._inspect(
+            data, pos if major == 6 and tag == CWT.CBOR_TAG else 0
+        )
+
+    def issuer(
+        self,
+        key: COSEKeyInterface,
+        protected: Optional[Dict[int, Any]] = None,
+        unprotected: Optional[Dict[int, Any]] = None,
+        tagged: bool = False,
+    ):
+        """
+        Returns a pre-compiled CWT issuer which encodes CWTs with signing (for a
+        signing key) or MAC (for a MAC key) using the same key. The protected
+        header and the prefixes of the Sig_structure (or MAC_structure) and the
+        COSE message are serialized once by
+        :func:`COSE.compile_encoder <cwt.COSE.compile_encoder>`, so that each
+        issuance only encodes the claims and signs them.
+
+        Args:
+            key (COSEKeyInterface): A signing key or a MAC Authentication key. The
+                key must have ``key_ops`` of ``sign`` or ``MAC create``.
+            protected (Optional[Dict[int, Any]]): Parameters that are to be
+                cryptographically protected.
+            unprotected (Optional[Dict[int, Any]]): Parameters that are not
+                cryptographically protected.
+            tagged (bool): An indicator whether the response is wrapped by CWT
+                tag(61) or not.
+        Returns:
+            CWTIssuer: A pre-compiled CWT issuer.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode the headers.
+
+        Examples:
+
+            >>> from cwt import CWT, COSEKey
+            >>> ctx = CWT.new()
+            >>> key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+            >>> issuer = ctx.issuer(key)
+            >>> token = issuer.encode({"iss": "coaps://as.example"})
+            >>> ctx.decode(token, key)[1]
+            'coaps://as.example'
+        """
+        return CWTIssuer(
+            self, self._cose.compile_encoder(key, protected, unprotected), tagged
+        )
 
     def set_private_claim_names(self, claim_names: Dict[str, int]):
         """
@@ -345,6 +744,42 @@ class CWT(CBORProcessor):
         self._claim_names = claim_names
         return
 
+    def _to_claims(
+        self, claims: Union[Claims, Dict[str, Any], Dict[int, Any], bytes]
+    ) -> Union[Claims, Dict[Any, Any], bytes]:
+        if isinstance(claims, Claims):
+            return claims
+        if isinstance(claims, str):
+            claims = claims.encode("utf-8")
+        if isinstance(claims, bytes):
+            try:
+                return Claims.from_json(claims, self._claim_names)
+            except ValueError:
+                return claims
+        # Following code causes mypy error:
+        # for k, v in claims.items():
+        #     if isinstance(k, str):
+        #         claims = Claims.from_json(claims)
+        #     break
+        # To avoid the error:
+        json_claims: Dict[str, Any] = {}
+        for k, v in claims.items():
+            if isinstance(k, str):
+                json_claims[k] = v
+        if json_claims:
+            return Claims.from_json(json_claims, self._claim_names)
+        return claims
+
+    def _prepare_claims(
+        self, claims: Union[Claims, Dict[Any, Any], bytes]
+    ) -> Union[Dict[int, Any], bytes]:
+        if not isinstance(claims, Claims):
+            self._validate(claims)
+        else:
+            claims = claims.to_dict()
+        self._set_default_value(claims)
+        return claims
+
     def _encode(
         self,
         claims: Union[Claims, Dict[Any, Any], bytes],
@@ -368,6 +803,115 @@ class CWT(CBORProcessor):
             return self.encode_and_mac(claims, key, recipients, tagged)
         raise ValueError("The key operation could not be specified.")
 
+    def _decode_stream(
+        self,
+        source: Any,
+        ring: COSEKeyRing,
+        no_verify: bool,
+        max_workers: Optional[int],
+        prefetch: int,
+    ) -> Iterator[Union[Dict[int, Any], bytes, Exception]]:
+        if max_workers is None:
+            for token in self._iter_tokens(source):
+                yield self._decode_token(token, ring, no_verify)
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending: Deque[Future] = deque()
+            for token in self._iter_tokens(source):
+                pending.append(
+                    executor.submit(self._decode_token, token, ring, no_verify)
+                )
+                if len(pending) >= prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _decode_token(
+        self, token: Any, ring: COSEKeyRing, no_verify: bool
+    ) -> Union[Dict[int, Any], bytes, Exception]:
+        try:
+            return self.decode(token, ring, no_verify)
+        except Exception as err:
+            # The frames in the tracebacks hold the memoryview of the source
+            # (e.g., mmap), which could not be closed while the error is alive.
+            e: Optional[BaseException] = err
+            seen = set()
+            while e is not None and id(e) not in seen:
+                seen.add(id(e))
+                e.__traceback__ = None
+                e = e.__cause__ or e.__context__
+            return err
+
+    def _iter_tokens(self, source: Any) -> Iterator[Any]:
+        if not isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            max_bytes = self._cbor_profile.max_bytes if self._cbor_profile else None
+            while True:
+                token = read_item(source, max_bytes)
+                if token is None:
+                    return
+                yield token
+        with memoryview(source) as view:
+            pos = 0
+            while pos < len(view):
+                end = skip_item(view, pos)
+                yield view[pos:end]
+                pos = end
+
+    def _decode(
+        self,
+        cwt: Union[bytes, CBORTag, COSEMessageInfo, Dict[int, Any]],
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        no_verify: bool,
+    ) -> Union[Dict[int, Any], bytes]:
+        if isinstance(cwt, CBORTag) and cwt.tag == CWT.CBOR_TAG:
+            cwt = cwt.value
+        while isinstance(cwt, (CBORTag, COSEMessageInfo)):
+            cwt = self._loads(self._cose.decode(cwt, keys, out="memoryview"))
+        if not no_verify:
+            self._verify_and_count(cwt)
+        return cwt
+
+    def _verify_and_count(self, claims: Union[Dict[int, Any], bytes]):
+        try:
+            self._verify(claims)
+        except VerifyError:
+            self._count("rejected")
+            raise
+        return
+
+    def _reject_early(self, data: Union[bytes, COSEMessageInfo]):
+        # Any failure on peeking is left to the regular decoding process.
+        try:
+            info = data if isinstance(data, COSEMessageInfo) else self.inspect(data)
+            if info.tag not in (17, 18) or info.payload is None:
+                return
+            claims = self._loads(info.payload)
+        except Exception:
+            return
+        if not isinstance(claims, dict):
+            return
+        try:
+            self._verify(claims)
+        except VerifyError:
+            self._count("early_rejected")
+            raise
+        except Exception:
+            return
+        return
+
+    def _count(self, name: str):
+        with self._metrics_lock:
+            self._metrics[name] += 1
+        return
+
+    def _to_key_ring(
+        self, keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]
+    ) -> COSEKeyRing:
+        if isinstance(keys, COSEKeyRing):
+            return keys
+        return COSEKeyRing([keys] if isinstance(keys, COSEKeyInterface) else keys)
+
     def _validate(self, claims: Union[Dict[int, Any], bytes]):
         if isinstance(claims, bytes):
             try:
@@ -415,6 +959,44 @@ class CWT(CBORProcessor):
         return
 
 
+class CWTIssuer(CBORProcessor):
+    """
+    A pre-compiled CWT issuer returned by :func:`CWT.issuer <cwt.CWT.issuer>`.
+    """
+
+    def __init__(self, cwt: CWT, encoder: COSEEncoder, tagged: bool):
+        self._cwt = cwt
+        self._encoder = encoder
+        self._prefix = self._dumps_head(6, CWT.CBOR_TAG) if tagged else b""
+        return
+
+    @property
+    def encoder(self) -> COSEEncoder:
+        """
+        The pre-compiled COSE encoder used to encode CWTs.
+        """
+        return self._encoder
+
+    def encode(
+        self, claims: Union[Claims, Dict[str, Any], Dict[int, Any], bytes]
+    ) -> bytes:
+        """
+        Encodes CWT with signing or MAC. ``exp``, ``nbf`` and ``iat`` are set in
+        the same manner as :func:`CWT.encode <cwt.CWT.encode>`.
+
+        Args:
+            claims (Union[Claims, Dict[str, Any], Dict[int, Any], bytes]): A CWT
+                claims object, or a JWT claims object, text string or byte string.
+        Returns:
+            bytes: A byte string of the encoded CWT.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode the claims.
+        """
+        claims = self._cwt._prepare_claims(self._cwt._to_claims(claims))
+        return self._prefix + self._encoder.encode(self._dumps(claims))
+
+
 # export
 _cwt = CWT()
 encode = _cwt.encode
@@ -422,4 +1004,7 @@ encode_and_mac = _cwt.encode_and_mac
 encode_and_sign = _cwt.encode_and_sign
 encode_and_encrypt = _cwt.encode_and_encrypt
 decode = _cwt.decode
+decode_batch = _cwt.decode_batch
+decode_stream = _cwt.decode_stream
+encode_stream = _cwt.encode_stream
 set_private_claim_names = _cwt.set_private_claim_names
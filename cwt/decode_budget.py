@@ -0,0 +1,53 @@
+import threading
+import time
+from typing import Optional
+
+from .exceptions import DecodeLimitError
+
+
+class DecodeBudget:
+    """
+    The budget of the cryptographic operations which can be spent on decoding a
+    single COSE message.
+    """
+
+    def __init__(
+        self, max_key_trials: Optional[int] = None, timeout: Optional[float] = None
+    ):
+        self._max_key_trials = max_key_trials
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._trials = 0
+        self._lock = threading.Lock()
+        return
+
+    @property
+    def trials(self) -> int:
+        """
+        The number of the key trials spent so far.
+        """
+        return self._trials
+
+    def consume(self):
+        """
+        Spends one key trial.
+
+        Raises:
+            DecodeLimitError: The maximum number of the key trials has been
+                exceeded or the deadline has passed.
+        """
+        with self._lock:
+            self._trials += 1
+            trials = self._trials
+        if self._max_key_trials is not None and trials > self._max_key_trials:
+            raise DecodeLimitError("The number of key trials exceeds the limit.")
+        self.check_deadline()
+        return
+
+    def check_deadline(self):
+        """
+        Raises:
+            DecodeLimitError: The deadline has passed.
+        """
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise DecodeLimitError("The decoding deadline has passed.")
+        return
@@ -62,13 +62,16 @@ class EncryptedCOSEKey(CBORProcessor):
 
     @staticmethod
     def to_cose_key(
-        key: List[Any], encryption_key: COSEKeyInterface
+        key: Union[List[Any], bytes, bytearray, memoryview],
+        encryption_key: COSEKeyInterface,
     ) -> COSEKeyInterface:
         """
         Returns an decrypted COSE key.
 
         Args:
-            key: COSEKeyInterface: A key formatted to COSE_Encrypt0 structure to be decrypted.
+            key: Union[List[Any], bytes, bytearray, memoryview]: A key formatted to
+                COSE_Encrypt0 structure to be decrypted, or the encoded COSE_Encrypt0
+                as a bytes-like object.
             encryption_key: COSEKeyInterface: An encryption key to decrypt the target COSE key.
         Returns:
             COSEKeyInterface: A key decrypted.
@@ -77,5 +80,8 @@ class EncryptedCOSEKey(CBORProcessor):
             DecodeError: Failed to decode the COSE key.
             VerifyError: Failed to verify the COSE key.
         """
-        res = cbor2.loads(COSE().decode(CBORTag(16, key), encryption_key))
+        data = (
+            key if isinstance(key, (bytes, bytearray, memoryview)) else CBORTag(16, key)
+        )
+        res = cbor2.loads(COSE().decode(data, encryption_key))
         return COSEKey.new(res)
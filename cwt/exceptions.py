@@ -28,3 +28,12 @@ class DecodeError(CWTError):
     """
 
     pass
+
+
+class DecodeLimitError(DecodeError):
+    """
+    An Exception occurred when a CWT/COSE decoding process exceeded one of the
+    limits configured on the decoder.
+    """
+
+    pass
@@ -0,0 +1,199 @@
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from .cose_key import COSEKey
+from .cose_key_interface import COSEKeyInterface
+from .cose_key_ring import COSEKeyRing
+from .cwt import CWT, CWT_DEFAULT_EXPIRES_IN, CWT_DEFAULT_LEEWAY
+
+# The CWT context and the keys set up in each worker process.
+_worker_ctx: Optional[CWT] = None
+_worker_keys: Optional[COSEKeyRing] = None
+
+
+def _init_worker(params: List[Dict[int, Any]], expires_in: int, leeway: int):
+    global _worker_ctx, _worker_keys
+    _worker_ctx = CWT(expires_in, leeway)
+    _worker_keys = COSEKeyRing([COSEKey.new(p) for p in params])
+    return
+
+
+def _decode(data: bytes, no_verify: bool) -> Union[Dict[int, Any], bytes]:
+    if _worker_ctx is None or _worker_keys is None:
+        raise ValueError("The worker process is not initialized.")
+    return _worker_ctx.decode(data, _worker_keys, no_verify)
+
+
+def _decode_chunk(
+    data: List[bytes], no_verify: bool
+) -> List[Union[Dict[int, Any], bytes, Exception]]:
+    res: List[Union[Dict[int, Any], bytes, Exception]] = []
+    for d in data:
+        try:
+            res.append(_decode(d, no_verify))
+        except Exception as err:
+            res.append(err)
+    return res
+
+
+class ProcessPoolVerifier:
+    """
+    A CWT verifier which performs the verification and decoding on a pool of
+    worker processes with ``concurrent.futures.ProcessPoolExecutor``.
+
+    The verification keys are converted into the CBOR-like structure and sent to
+    each worker process only once when the process starts, so that only the encoded
+    CWTs and the decoded claims are transferred between processes for each task.
+    This is useful for RSA-heavy trust lists, where the verification saturates
+    a single core.
+
+    Note that it requires Python 3.7 or later.
+    """
+
+    def __init__(
+        self,
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        max_workers: Optional[int] = None,
+        expires_in: int = CWT_DEFAULT_EXPIRES_IN,
+        leeway: int = CWT_DEFAULT_LEEWAY,
+    ):
+        if sys.version_info < (3, 7):
+            raise NotImplementedError("ProcessPoolVerifier requires Python 3.7+.")
+        if isinstance(keys, COSEKeyInterface):
+            keys = [keys]
+        params: List[Dict[int, Any]] = []
+        for k in keys:
+            if not isinstance(k, COSEKeyInterface):
+                raise ValueError("key in keys should have COSEKeyInterface.")
+            params.append(k.to_dict())
+        # Validate the settings in this process before starting workers.
+        CWT(expires_in, leeway)
+        self._executor: ProcessPoolExecutor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(params, expires_in, leeway),
+        )
+        return
+
+    @classmethod
+    def new(
+        cls,
+        keys: Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing],
+        max_workers: Optional[int] = None,
+        expires_in: int = CWT_DEFAULT_EXPIRES_IN,
+        leeway: int = CWT_DEFAULT_LEEWAY,
+    ):
+        """
+        Constructor.
+
+        Args:
+            keys (Union[COSEKeyInterface, List[COSEKeyInterface], COSEKeyRing]): A
+                COSE key, a list of the keys or a key ring used to verify and decrypt
+                CWTs.
+            max_workers (Optional[int]): The maximum number of worker processes.
+                If it is not specified, the number of processors is used.
+            expires_in(int): The default lifetime in seconds of CWT
+                (default value: ``3600``).
+            leeway(int): The default leeway in seconds for validating
+                ``exp`` and ``nbf`` (default value: ``60``).
+        Returns:
+            ProcessPoolVerifier: A verifier.
+        Raises:
+            ValueError: Invalid arguments.
+
+        Examples:
+
+            >>> import cwt
+            >>> from cwt import COSEKey, ProcessPoolVerifier
+            >>> key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+            >>> tokens = [cwt.encode({"iss": "coaps://as.example"}, key)] * 10
+            >>> with ProcessPoolVerifier.new(key, max_workers=2) as verifier:
+            ...     decoded = verifier.decode_batch(tokens)
+            ...
+            >>> decoded[0][1]
+            'coaps://as.example'
+        """
+        return cls(keys, max_workers, expires_in, leeway)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        return
+
+    def submit(self, data: bytes, no_verify: bool = False) -> Future:
+        """
+        Submits a CWT to be verified and decoded by a worker process.
+
+        Args:
+            data (bytes): A byte string of an encoded CWT.
+            no_verify (bool): An indicator whether token verification is skiped
+                or not.
+        Returns:
+            Future: A future of the decoded CWT.
+        """
+        return self._executor.submit(_decode, bytes(data), no_verify)
+
+    def decode(
+        self, data: bytes, no_verify: bool = False
+    ) -> Union[Dict[int, Any], bytes]:
+        """
+        Verifies and decodes a CWT on a worker process.
+
+        Args:
+            data (bytes): A byte string of an encoded CWT.
+            no_verify (bool): An indicator whether token verification is skiped
+                or not.
+        Returns:
+            Union[Dict[int, Any], bytes]: A byte string of the decoded CWT.
+        Raises:
+            ValueError: Invalid arguments.
+            DecodeError: Failed to decode the CWT.
+            VerifyError: Failed to verify the CWT.
+        """
+        return self.submit(data, no_verify).result()
+
+    def decode_batch(
+        self, data: List[bytes], no_verify: bool = False, chunk_size: int = 64
+    ) -> List[Union[Dict[int, Any], bytes, Exception]]:
+        """
+        Verifies and decodes a list of CWTs on the worker processes. The CWTs are
+        sent to the workers in chunks to reduce the inter-process communication.
+
+        Args:
+            data (List[bytes]): A list of byte strings of encoded CWTs.
+            no_verify (bool): An indicator whether token verification is skiped
+                or not.
+            chunk_size (int): The number of CWTs sent to a worker at once.
+        Returns:
+            List[Union[Dict[int, Any], bytes, Exception]]: A list of decoded CWTs.
+                Each item is the exception raised instead if the corresponding CWT
+                could not be decoded.
+        Raises:
+            ValueError: Invalid arguments.
+        """
+        if not isinstance(chunk_size, int) or chunk_size <= 0:
+            raise ValueError("chunk_size should be positive number.")
+        futures = [
+            self._executor.submit(
+                _decode_chunk, [bytes(d) for d in data[i : i + chunk_size]], no_verify
+            )
+            for i in range(0, len(data), chunk_size)
+        ]
+        res: List[Union[Dict[int, Any], bytes, Exception]] = []
+        for f in futures:
+            res.extend(f.result())
+        return res
+
+    def shutdown(self, wait: bool = True):
+        """
+        Shuts down the worker processes.
+
+        Args:
+            wait (bool): An indicator whether this function waits for the pending
+                tasks to be completed or not.
+        """
+        self._executor.shutdown(wait=wait)
+        return
@@ -1,8 +1,10 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Union
 
 import cbor2
 
+from .cbor_profile import CBORProfile
 from .const import (  # COSE_ALGORITHMS_CKDM_KEY_AGREEMENT_WITH_KEY_WRAP,
     COSE_ALGORITHMS_CKDM_KEY_AGREEMENT,
     COSE_ALGORITHMS_CKDM_KEY_AGREEMENT_DIRECT,
@@ -145,12 +147,16 @@ class Recipient:
         return cls.new(protected, unprotected, sender_key=sender_key)
 
     @classmethod
-    def from_list(cls, recipient: List[Any]) -> RecipientInterface:
+    def from_list(
+        cls, recipient: List[Any], cbor_profile: Optional[CBORProfile] = None
+    ) -> RecipientInterface:
         """
         Creates a recipient from a raw COSE array data.
 
         Args:
             data (Union[str, bytes, Dict[str, Any]]): JSON-formatted recipient data.
+            cbor_profile (Optional[CBORProfile]): The resource limits applied to the
+                protected headers of the recipient and the nested recipients.
         Returns:
             RecipientInterface: A recipient object.
         Raises:
@@ -163,6 +169,8 @@ class Recipient:
             raise ValueError("Invalid recipient format.")
         if not isinstance(recipient[0], bytes):
             raise ValueError("protected header should be bytes.")
+        if recipient[0] and cbor_profile:
+            cbor_profile.check(recipient[0])
         protected = {} if not recipient[0] else cbor2.loads(recipient[0])
         if not isinstance(recipient[1], dict):
             raise ValueError("unprotected header should be dict.")
@@ -174,5 +182,70 @@ class Recipient:
             raise ValueError("recipients should be list.")
         recipients: List[RecipientInterface] = []
         for r in recipient[3]:
-            recipients.append(cls.from_list(r))
+            recipients.append(cls.from_list(r, cbor_profile))
         return cls.new(protected, recipient[1], recipient[2], recipients)
+
+    @classmethod
+    def apply_batch(
+        cls,
+        recipients: List[RecipientInterface],
+        key: Optional[COSEKeyInterface] = None,
+        recipient_keys: Optional[List[COSEKeyInterface]] = None,
+        salt: Optional[bytes] = None,
+        context: Optional[Union[List[Any], Dict[str, Any]]] = None,
+        max_workers: Optional[int] = None,
+    ) -> List[COSEKeyInterface]:
+        """
+        Applies a COSEKey to a list of recipients on a thread pool. This is the
+        bulk version of :func:`RecipientInterface.apply
+        <cwt.RecipientInterface.apply>` for the cases where a content encryption
+        key (or a MAC key) is shared with a large number of recipients (e.g., by
+        key wrapping or key agreement with key wrapping).
+
+        Args:
+            recipients (List[RecipientInterface]): A list of recipients.
+            key (Optional[COSEKeyInterface]): The external key to be used for
+                preparing the key.
+            recipient_keys (Optional[List[COSEKeyInterface]]): The external public
+                keys provided by the recipients used for ECDH key agreement. The
+                ``i``-th key is used for the ``i``-th recipient.
+            salt (Optional[bytes]): A salt used for deriving a key.
+            context (Optional[Union[List[Any], Dict[str, Any]]]): Context
+                information structure.
+            max_workers (Optional[int]): The maximum number of threads used for
+                applying the key. If it is not specified, the default value of
+                ``concurrent.futures.ThreadPoolExecutor`` is used.
+        Returns:
+            List[COSEKeyInterface]: The keys returned by ``apply()`` of the
+                recipients, in the order of the ``recipients``.
+        Raises:
+            ValueError: Invalid arguments.
+            EncodeError: Failed to encode(e.g., wrap, derive) the key.
+
+        Examples:
+
+            >>> from cwt import COSE, COSEKey, Recipient
+            >>> enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+            >>> rs = [
+            ...     Recipient.from_jwk({"kty": "EC", "crv": "P-256", "alg": "ECDH-ES+A128KW"})
+            ...     for _ in public_keys
+            ... ]
+            >>> Recipient.apply_batch(rs, enc_key, public_keys, context={"alg": "A128GCM"})
+            >>> ctx = COSE.new(alg_auto_inclusion=True)
+            >>> encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=rs)
+        """
+        if recipient_keys is not None and len(recipient_keys) != len(recipients):
+            raise ValueError(
+                "The length of recipient_keys should be the same as recipients."
+            )
+        rks: List[Optional[COSEKeyInterface]] = (
+            list(recipient_keys)
+            if recipient_keys is not None
+            else [None] * len(recipients)
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(r.apply, key, rk, salt, context)
+                for r, rk in zip(recipients, rks)
+            ]
+            return [f.result() for f in futures]
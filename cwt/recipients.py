@@ -1,9 +1,30 @@
-from typing import Any, Dict, List, Optional, Union
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Union
 
+import cbor2
+
+from .cache import LRUCache
+from .cbor_profile import CBORProfile
+from .const import COSE_ALGORITHMS_CKDM, COSE_ALGORITHMS_CKDM_KEY_AGREEMENT_DIRECT
+from .cose_key import COSEKey
 from .cose_key_interface import COSEKeyInterface
+from .cose_key_ring import COSEKeyRing, _KeyList
+from .decode_budget import DecodeBudget
 from .recipient import Recipient
 from .recipient_interface import RecipientInterface
 
+# The recipient algorithms which derive the content keys directly with HKDF.
+_DERIVED_KEY_ALGS = {
+    COSE_ALGORITHMS_CKDM["direct+HKDF-SHA-256"],
+    COSE_ALGORITHMS_CKDM["direct+HKDF-SHA-512"],
+    *COSE_ALGORITHMS_CKDM_KEY_AGREEMENT_DIRECT.values(),
+}
+
+# The header parameters used as the inputs of the key derivation: ephemeral key,
+# static key, static key id, salt and PartyU/PartyV identity, nonce and other.
+_KDF_LABELS = (-1, -2, -3, -20, -21, -22, -23, -24, -25, -26)
+
 
 class Recipients:
     """
@@ -16,42 +37,172 @@ class Recipients:
         return
 
     @classmethod
-    def from_list(cls, recipients: List[Any], verify_kid: bool = False):
+    def from_list(
+        cls,
+        recipients: List[Any],
+        verify_kid: bool = False,
+        cbor_profile: Optional[CBORProfile] = None,
+    ):
         """
         Create Recipients from a CBOR-like list.
         """
         res: List[RecipientInterface] = []
         for r in recipients:
-            res.append(Recipient.from_list(r))
+            res.append(Recipient.from_list(r, cbor_profile))
         return cls(res, verify_kid)
 
     def extract(
         self,
-        keys: List[COSEKeyInterface],
+        keys: Union[Sequence[COSEKeyInterface], COSEKeyRing, _KeyList],
         context: Optional[Union[Dict[str, Any], List[Any]]] = None,
         alg: int = 0,
+        budget: Optional[DecodeBudget] = None,
+        cache: Optional[LRUCache] = None,
+        cache_ttl: int = 60,
+        op: int = 0,
+        cache_lifetime: Optional[
+            Callable[[COSEKeyInterface, RecipientInterface], Optional[float]]
+        ] = None,
     ) -> COSEKeyInterface:
         """
         Decodes an appropriate key from recipients or keys privided as a parameter ``keys``.
+
+        If ``keys`` is a :class:`COSEKeyRing <cwt.COSEKeyRing>`, the keys for the
+        recipients with kid are looked up with its index of kid. Otherwise, the
+        keys are indexed by kid once for each call. The keys are narrowed down
+        by the key operation ``op`` in the same manner as
+        :func:`COSEKeyRing.candidates <cwt.COSEKeyRing.candidates>`.
+
+        If ``cache`` is specified, the keys unwrapped from the recipients which
+        have wrapped keys (e.g., AES Key Wrap and ECDH-ES/SS+AES Key Wrap) and
+        the keys derived by the recipients of direct key agreement with HKDF
+        (direct+HKDF and ECDH-ES/SS+HKDF) are cached for ``cache_ttl`` seconds
+        and reused for the same inputs without unwrapping or deriving them
+        again. The cache should be created with
+        :func:`new_cache <cwt.recipients.Recipients.new_cache>`. If
+        ``cache_lifetime`` is specified, it is called with the key used for the
+        recipient and the recipient, and the lifetime in seconds returned by it
+        is applied to the entry instead of ``cache_ttl`` if it is shorter. The
+        entry is not cached if the lifetime is not positive. ``None`` means
+        ``cache_ttl``.
         """
         if not self._recipients:
             raise ValueError("No recipients.")
+
+        ring = keys if isinstance(keys, COSEKeyRing) else None
+        all_keys: Sequence[COSEKeyInterface] = ()
+        by_kid: Dict[bytes, List[COSEKeyInterface]] = {}
+        if ring is None:
+            # Index the keys by kid once so that the recipients with kid are
+            # matched with the keys in O(1) instead of walking through all of
+            # the keys for each recipient.
+            key_list = keys if isinstance(keys, _KeyList) else _KeyList(list(keys))
+            all_keys = key_list.candidates(op)
+            for k in all_keys:
+                if k.kid:
+                    by_kid.setdefault(k.kid, []).append(k)
+
         err: Exception = ValueError("key is not found.")
         for r in self._recipients:
             if not r.kid and self._verify_kid:
                 raise ValueError("kid should be specified in recipient.")
-            if r.kid:
-                for k in keys:
-                    if k.kid != r.kid:
-                        continue
-                    try:
-                        return r.extract(k, alg=alg, context=context)
-                    except Exception as e:
-                        err = e
-                continue
-            for k in keys:
+            candidates: Sequence[COSEKeyInterface]
+            if ring is not None:
+                candidates = ring.candidates(op, r.kid)
+            elif not isinstance(r.kid, bytes):
+                candidates = ()
+            else:
+                # The recipients without kid are tried with all of the keys.
+                candidates = by_kid.get(r.kid, []) if r.kid else all_keys
+            for k in candidates:
+                ck = self._cache_key(r, k, alg, context) if cache is not None else None
+                if cache is not None and ck is not None:
+                    cached = cache.get(ck)
+                    res = cached.to_key() if cached else None
+                    if res is not None:
+                        return res
+                if budget:
+                    budget.consume()
                 try:
-                    return r.extract(k, alg=alg, context=context)
+                    res = r.extract(k, alg=alg, context=context)
                 except Exception as e:
                     err = e
+                    continue
+                if cache is not None and ck is not None and res.key and res.alg:
+                    ttl: float = cache_ttl
+                    if cache_lifetime is not None:
+                        lifetime = cache_lifetime(k, r)
+                        if lifetime is not None:
+                            ttl = min(ttl, lifetime)
+                    if ttl > 0:
+                        cache.put(ck, _CachedKey(res), time.time() + ttl)
+                return res
         raise err
+
+    @staticmethod
+    def new_cache(max_size: int) -> LRUCache:
+        """
+        Creates a cache for the unwrapped or derived keys used by
+        :func:`extract <cwt.recipients.Recipients.extract>`. The key materials
+        of the evicted or expired entries are overwritten with zeros on a
+        best-effort basis. The expired entries are removed on every access to
+        the cache, and can also be removed by calling ``purge()`` of the cache
+        while it is not accessed.
+
+        Args:
+            max_size (int): The maximum number of entries.
+        Returns:
+            LRUCache: A cache for the unwrapped or derived keys.
+        """
+        return LRUCache(max_size, on_evict=lambda entry: entry.zeroize())
+
+    @staticmethod
+    def _cache_key(
+        r: RecipientInterface,
+        key: COSEKeyInterface,
+        alg: int,
+        context: Optional[Union[Dict[str, Any], List[Any]]],
+    ) -> Optional[Hashable]:
+        if not r.ciphertext and r.alg not in _DERIVED_KEY_ALGS:
+            return None
+        try:
+            # The sender's keys (ephemeral key, static key and static key id),
+            # the salt, the PartyU/PartyV info and the context are the inputs
+            # of the key derivation. The context is encoded canonically so that
+            # the equivalent dicts are regarded as the same.
+            params = cbor2.dumps([r.unprotected.get(label) for label in _KDF_LABELS])
+            ctx = cbor2.dumps(context, canonical=True)
+        except Exception:
+            return None
+        # The key itself is held so that its identity is not reused by other keys.
+        return (r.kid, r.alg, r.ciphertext, params, alg, ctx, key)
+
+
+class _CachedKey:
+    """
+    An unwrapped or derived key cached by :func:`Recipients.extract`. A new key
+    object is created for each use so that zeroizing the cached key material
+    does not affect the key objects in use.
+    """
+
+    def __init__(self, key: COSEKeyInterface):
+        self._material: Optional[bytearray] = bytearray(key.key)
+        self._alg: int = key.alg or 0
+        self._kid: bytes = key.kid or b""
+        self._lock = threading.Lock()
+        return
+
+    def to_key(self) -> Optional[COSEKeyInterface]:
+        with self._lock:
+            if self._material is None:
+                return None
+            return COSEKey.from_symmetric_key(
+                bytes(self._material), alg=self._alg, kid=self._kid
+            )
+
+    def zeroize(self):
+        with self._lock:
+            if self._material is not None:
+                self._material[:] = bytes(len(self._material))
+                self._material = None
+        return
@@ -0,0 +1,108 @@
+from typing import Collection, List, Union
+
+
+class SignaturePolicy:
+    """
+    A verification policy for COSE_Sign (multiple signers) used by
+    :func:`COSE.decode_with_signers <cwt.COSE.decode_with_signers>`.
+
+    The policy is met when the number of the valid signatures reaches the
+    ``threshold`` and the signatures of all of the ``required_kids`` are valid.
+    The signatures made with the same key material are counted only once, so a
+    duplicated signature can never meet ``"all"``.
+    """
+
+    def __init__(self, threshold: Union[int, str] = 1, required_kids: List[bytes] = []):
+        if threshold == "any":
+            threshold = 1
+        if threshold != "all":
+            if not isinstance(threshold, int) or isinstance(threshold, bool):
+                raise ValueError('threshold should be int, "any" or "all".')
+            if threshold <= 0:
+                raise ValueError("threshold should be positive number.")
+        self._threshold = threshold
+        self._required_kids = required_kids
+        return
+
+    @classmethod
+    def new(
+        cls,
+        threshold: Union[int, str] = 1,
+        required_kids: List[Union[bytes, str]] = [],
+    ):
+        """
+        Creates a verification policy for COSE_Sign.
+
+        Args:
+            threshold (Union[int, str]): The number of the signatures which should
+                be valid. ``"any"`` (the same as ``1``) and ``"all"`` (all of the
+                signatures in a message) can also be used.
+            required_kids (List[Union[bytes, str]]): The key identifiers of the
+                signers whose signatures should be valid regardless of the
+                ``threshold``.
+        Returns:
+            SignaturePolicy: A verification policy.
+        Raises:
+            ValueError: Invalid arguments.
+        """
+        kids: List[bytes] = []
+        for kid in required_kids:
+            if isinstance(kid, str):
+                kid = kid.encode("utf-8")
+            if not isinstance(kid, bytes):
+                raise ValueError("required_kids should be a list of bytes or str.")
+            kids.append(kid)
+        return cls(threshold, kids)
+
+    @property
+    def threshold(self) -> Union[int, str]:
+        """
+        The number of the signatures which should be valid (or ``"all"``).
+        """
+        return self._threshold
+
+    @property
+    def required_kids(self) -> List[bytes]:
+        """
+        The key identifiers of the signers whose signatures should be valid.
+        """
+        return self._required_kids
+
+    def is_met(self, kids: List[bytes], passed: Collection[int]) -> bool:
+        """
+        Returns whether the policy is met.
+
+        Args:
+            kids (List[bytes]): The key identifiers of all of the signatures in a
+                message (``b""`` if not specified).
+            passed (Collection[int]): The indexes of the valid signatures, each of
+                which is made by a distinct signer.
+        Returns:
+            bool: Whether the policy is met.
+        """
+        if len(passed) < self._to_count(kids):
+            return False
+        passed_kids = {kids[i] for i in passed}
+        return all(kid in passed_kids for kid in self._required_kids)
+
+    def can_be_met(self, kids: List[bytes], failed: Collection[int]) -> bool:
+        """
+        Returns whether the policy can still be met.
+
+        Args:
+            kids (List[bytes]): The key identifiers of all of the signatures in a
+                message (``b""`` if not specified).
+            failed (Collection[int]): The indexes of the invalid signatures,
+                including the duplicated signatures of the same signer.
+        Returns:
+            bool: Whether the policy can still be met.
+        """
+        if len(kids) - len(failed) < self._to_count(kids):
+            return False
+        rest = {kid for i, kid in enumerate(kids) if i not in failed}
+        return all(kid in rest for kid in self._required_kids)
+
+    def _to_count(self, kids: List[bytes]) -> int:
+        if self._threshold == "all":
+            return len(kids)
+        return self._threshold  # type: ignore
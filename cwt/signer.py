@@ -1,4 +1,5 @@
-from typing import Any, Dict, Union
+import time
+from typing import Any, Dict, Tuple, Union
 
 from .cbor_processor import CBORProcessor
 from .const import COSE_ALGORITHMS_SIGNATURE
@@ -26,6 +27,7 @@ class Signer(CBORProcessor):
             self._protected = b"" if not protected else self._dumps(protected)
         self._unprotected = unprotected
         self._signature = signature
+        self._elapsed_time = 0.0
         return
 
     @property
@@ -56,6 +58,14 @@ class Signer(CBORProcessor):
         """
         return self._signature
 
+    @property
+    def elapsed_time(self) -> float:
+        """
+        The time in seconds taken to generate the signature in the last signing
+        (``0.0`` if the signer has not signed yet).
+        """
+        return self._elapsed_time
+
     @classmethod
     def new(
         cls,
@@ -170,7 +180,14 @@ class Signer(CBORProcessor):
             ValueError: Invalid arguments.
             EncodeError: Failed to sign the message.
         """
+        start = time.perf_counter()
         self._signature = self._cose_key.sign(msg)
+        self._elapsed_time = time.perf_counter() - start
+        return
+
+    def _set_signature(self, signature: bytes, elapsed_time: float):
+        self._signature = signature
+        self._elapsed_time = elapsed_time
         return
 
     def verify(self, msg: bytes):
@@ -186,3 +203,11 @@ class Signer(CBORProcessor):
         """
         self._cose_key.verify(msg, self._signature)
         return
+
+
+def _sign(params: Dict[int, Any], msg: bytes) -> Tuple[bytes, float]:
+    # Signs a message in a worker process where COSE key objects cannot be sent.
+    key = COSEKey.new(params)
+    start = time.perf_counter()
+    sig = key.sign(msg)
+    return sig, time.perf_counter() - start
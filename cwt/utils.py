@@ -57,6 +57,14 @@ def uint_to_bytes(v: int) -> bytes:
     return v.to_bytes(length, "big")
 
 
+def to_bytes(v: Any) -> bytes:
+    """
+    Returns a bytes-like object (e.g., ``memoryview``) as bytes. A bytes object
+    is returned as it is without being copied.
+    """
+    return v if isinstance(v, bytes) else bytes(v)
+
+
 def base64url_decode(v: str) -> bytes:
     bv = v.encode("ascii")
     rem = len(bv) % 4
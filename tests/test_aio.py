@@ -0,0 +1,172 @@
+"""
+Tests for AsyncCWT and AsyncCOSE.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cwt import COSE, CWT, COSEKey, VerifyError
+from cwt.aio import AsyncCOSE, AsyncCWT
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def key():
+    return COSEKey.from_symmetric_key(alg="HS256", kid="01")
+
+
+class TestAsyncCWT:
+    """
+    Tests for AsyncCWT.
+    """
+
+    def test_async_cwt_constructor(self):
+        ctx = AsyncCWT.new(max_concurrency=3)
+        assert isinstance(ctx.cwt, CWT)
+        assert ctx.max_concurrency == 3
+        assert AsyncCWT.new().max_concurrency > 0
+
+    @pytest.mark.parametrize(
+        "invalid, msg",
+        [
+            ("1", "max_concurrency should be int."),
+            (-1, "max_concurrency should not be negative number."),
+        ],
+    )
+    def test_async_cwt_constructor_with_invalid_arg(self, invalid, msg):
+        with pytest.raises(ValueError) as err:
+            AsyncCWT.new(max_concurrency=invalid)
+            pytest.fail("AsyncCWT.new() should fail.")
+        assert msg in str(err.value)
+
+    def test_async_cwt_encode_and_decode(self, key):
+        async def main():
+            async with AsyncCWT.new() as ctx:
+                token = await ctx.encode({"iss": "coaps://as.example"}, key)
+                return await ctx.decode(token, key)
+
+        assert run(main())[1] == "coaps://as.example"
+
+    def test_async_cwt_decode_with_external_executor(self, key):
+        token = CWT.new().encode({"iss": "coaps://as.example"}, key)
+
+        async def main(ctx):
+            return await asyncio.gather(*[ctx.decode(token, key) for _ in range(10)])
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ctx = AsyncCWT.new(executor=executor, max_concurrency=2)
+            res = run(main(ctx))
+            ctx.close()
+            # The external executor is still available.
+            assert executor.submit(lambda: 1).result() == 1
+        assert len(res) == 10
+        assert all(r[1] == "coaps://as.example" for r in res)
+
+    def test_async_cwt_decode_with_invalid_key(self, key):
+        other = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = CWT.new().encode({"iss": "coaps://as.example"}, key)
+
+        async def main():
+            async with AsyncCWT.new() as ctx:
+                return await ctx.decode(token, other)
+
+        with pytest.raises(VerifyError) as err:
+            run(main())
+            pytest.fail("decode() should fail.")
+        assert "Failed to compare digest." in str(err.value)
+
+    def test_async_cwt_decode_with_cancellation(self, key):
+        token = CWT.new().encode({"iss": "coaps://as.example"}, key)
+        ctx = AsyncCWT.new(max_concurrency=1)
+        decode = ctx.cwt.decode
+        started = threading.Event()
+        unblock = threading.Event()
+
+        def blocking_decode(*args):
+            started.set()
+            unblock.wait(5)
+            return decode(*args)
+
+        async def main():
+            ctx.cwt.decode = blocking_decode
+            running = asyncio.ensure_future(ctx.decode(token, key))
+            waiting = asyncio.ensure_future(ctx.decode(token, key))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            # Both the running and the waiting callers go away.
+            running.cancel()
+            waiting.cancel()
+            for t in [running, waiting]:
+                with pytest.raises(asyncio.CancelledError):
+                    await t
+            # The slot is kept until the running function is actually finished.
+            started.clear()
+            pending = asyncio.ensure_future(ctx.decode(token, key))
+            await asyncio.sleep(0.05)
+            assert not started.is_set()
+            unblock.set()
+            return await pending
+
+        try:
+            assert run(main())[1] == "coaps://as.example"
+        finally:
+            ctx.close()
+
+
+class TestAsyncCOSE:
+    """
+    Tests for AsyncCOSE.
+    """
+
+    def test_async_cose_constructor(self):
+        cose = COSE.new(alg_auto_inclusion=True)
+        ctx = AsyncCOSE.new(cose)
+        assert ctx.cose is cose
+
+    def test_async_cose_encode_and_decode(self, key):
+        async def main():
+            async with AsyncCOSE.new(COSE.new(alg_auto_inclusion=True)) as ctx:
+                mac = await ctx.encode_and_mac(b"Hello world!", key)
+                return await ctx.decode(mac, key)
+
+        assert run(main()) == b"Hello world!"
+
+    def test_async_cose_encode_and_sign(self):
+        signer = COSEKey.from_jwk(
+            {
+                "kty": "EC",
+                "kid": "01",
+                "crv": "P-256",
+                "x": "usWxHK2PmfnHKwXPS54m0kTcGJ90UiglWiGahtagnv8",
+                "y": "IBOL-C3BttVivg-lSreASjpkttcsz-1rb7btKLv8EX4",
+                "d": "V8kgd2ZBRuh2dgyVINBUqpPDr7BOMGcF22CQMIUHtNM",
+            }
+        )
+
+        async def main():
+            async with AsyncCOSE.new(COSE.new(alg_auto_inclusion=True)) as ctx:
+                signed = await ctx.encode_and_sign(b"Hello world!", signer)
+                return await ctx.decode(signed, signer)
+
+        assert run(main()) == b"Hello world!"
+
+    def test_async_cose_encode_and_encrypt(self):
+        enc_key = COSEKey.from_symmetric_key(alg="ChaCha20/Poly1305", kid="01")
+
+        async def main():
+            async with AsyncCOSE.new(COSE.new(alg_auto_inclusion=True)) as ctx:
+                encrypted = await ctx.encode_and_encrypt(
+                    b"Hello world!", enc_key, nonce=enc_key.generate_nonce()
+                )
+                return await ctx.decode(encrypted, enc_key)
+
+        assert run(main()) == b"Hello world!"
@@ -3,6 +3,7 @@ Tests for EC2Key.
 """
 import cbor2
 import pytest
+from cryptography.exceptions import InvalidSignature
 
 from cwt.algs.ec2 import EC2Key
 from cwt.cose_key import COSEKey
@@ -666,6 +667,24 @@ class TestEC2Key:
             pytest.fail("verify() should fail.")
         assert "Invalid signature." in str(err.value)
 
+    def test_ec2_key_try_verify(self):
+        private_key = EC2Key(
+            {
+                1: 2,
+                -2: b"\xa7\xddc*\xff\xc2?\x8b\xf8\x9c:\xad\xccDF\x9cZ \x04P\xef\x99\x0c=\xe6 w1\x08&\xba\xd9",
+                -3: b"\xe2\xdb\xef\xfe\xb8\x8a\x12\xf27\xcb\x15:\x8a\xb9\x1a90B\x1a\x19^\xbc\xdc\xde\r\xb9s\xc1P\xf3\xaa\xdd",
+                -4: b'\xe9\x16\x0c\xa96\x8d\xfa\xbc\xd5\xda"ua\xec\xf7\x96\r\x15\xf7_\xf3rb{\xb1\xde;\x99\x88\xafNh',
+                -1: 1,
+            }
+        )
+        sig = private_key.sign(b"Hello world!")
+        assert private_key.try_verify(b"Hello world!", sig) is True
+        assert private_key.try_verify(b"Hello world?", sig) is False
+        assert private_key.verification_error(b"Hello world!", sig) is None
+        err = private_key.verification_error(b"Hello world?", sig)
+        assert isinstance(err, VerifyError)
+        assert isinstance(err.__cause__, InvalidSignature)
+
     @pytest.mark.parametrize(
         "alg",
         [
@@ -229,6 +229,20 @@ class TestHMACKey:
             pytest.fail("verify should fail.")
         assert "Failed to compare digest." in str(err.value)
 
+    def test_hmac_key_try_verify(self):
+        key = HMACKey({1: 4, -1: b"mysecret", 3: 5})
+        sig = key.sign(b"Hello world!")
+        assert key.try_verify(b"Hello world!", sig) is True
+        assert key.try_verify(b"Hello world!", sig + b"xxx") is False
+
+    def test_hmac_key_verification_error(self):
+        key = HMACKey({1: 4, -1: b"mysecret", 3: 5})
+        sig = key.sign(b"Hello world!")
+        assert key.verification_error(b"Hello world!", sig) is None
+        err = key.verification_error(b"Hello world!", sig + b"xxx")
+        assert isinstance(err, VerifyError)
+        assert "Failed to compare digest." in str(err)
+
 
 class TestAESCCMKey:
     """
@@ -595,6 +609,13 @@ class TestAESGCMKey:
             key.decrypt(encrypted, nonce=token_bytes(12))
         assert "Failed to decrypt." in str(err.value)
 
+    def test_aesgcm_key_try_decrypt(self):
+        key = AESGCMKey({1: 4, -1: token_bytes(16), 3: 1})
+        nonce = token_bytes(12)
+        encrypted = key.encrypt(b"Hello world!", nonce=nonce)
+        assert key.try_decrypt(encrypted, nonce, b"") == b"Hello world!"
+        assert key.try_decrypt(encrypted, token_bytes(12), b"") is None
+
 
 class TestChaCha20Key:
     """
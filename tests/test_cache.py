@@ -0,0 +1,121 @@
+"""
+Tests for LRUCache.
+"""
+import time
+
+import pytest
+
+from cwt.cache import LRUCache
+
+
+class TestLRUCache:
+    """
+    Tests for LRUCache.
+    """
+
+    def test_lru_cache_constructor(self):
+        cache = LRUCache(10)
+        assert cache.max_size == 10
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize(
+        "invalid, msg",
+        [
+            ("10", "max_size should be int."),
+            (0, "max_size should be positive number."),
+            (-1, "max_size should be positive number."),
+        ],
+    )
+    def test_lru_cache_constructor_with_invalid_args(self, invalid, msg):
+        with pytest.raises(ValueError) as err:
+            LRUCache(invalid)
+            pytest.fail("LRUCache() should fail.")
+        assert msg in str(err.value)
+
+    def test_lru_cache_put_and_get(self):
+        cache = LRUCache(10)
+        cache.put("a", 1, time.time() + 10)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_lru_cache_put_expired(self):
+        cache = LRUCache(10)
+        cache.put("a", 1, time.time() - 1)
+        assert len(cache) == 0
+        assert cache.get("a") is None
+
+    def test_lru_cache_get_expired(self):
+        evicted = []
+        cache = LRUCache(10, on_evict=evicted.append)
+        cache.put("a", 1, time.time() + 0.01)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+        assert evicted == [1]
+
+    @pytest.mark.parametrize("access", ["get", "put", "purge"])
+    def test_lru_cache_purge_expired_without_lookup(self, monkeypatch, access):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        evicted = []
+        cache = LRUCache(10, on_evict=evicted.append)
+        cache.put("a", 1, now[0] + 10)
+        cache.put("b", 2, now[0] + 20)
+        now[0] += 15
+        if access == "get":
+            assert cache.get("b") == 2
+        elif access == "put":
+            cache.put("c", 3, now[0] + 10)
+        else:
+            cache.purge()
+        # "a" is removed without being looked up.
+        assert evicted == [1]
+        assert "a" not in cache._entries
+
+    def test_lru_cache_purge_with_overwritten_entries(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        evicted = []
+        cache = LRUCache(2, on_evict=evicted.append)
+        for i in range(10):
+            cache.put("a", i, now[0] + 10 + i)
+        assert evicted == list(range(9))
+        assert len(cache._expiry) <= 4
+        now[0] += 15
+        cache.purge()
+        # The entry is kept until its own expiration time.
+        assert cache.get("a") == 9
+        now[0] += 5
+        cache.purge()
+        assert len(cache) == 0
+        assert evicted == list(range(10))
+
+    def test_lru_cache_evict_least_recently_used(self):
+        evicted = []
+        cache = LRUCache(2, on_evict=evicted.append)
+        cache.put("a", 1, time.time() + 10)
+        cache.put("b", 2, time.time() + 10)
+        assert cache.get("a") == 1
+        cache.put("c", 3, time.time() + 10)
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert evicted == [2]
+
+    def test_lru_cache_put_overwrite(self):
+        evicted = []
+        cache = LRUCache(2, on_evict=evicted.append)
+        cache.put("a", 1, time.time() + 10)
+        cache.put("a", 2, time.time() + 10)
+        assert cache.get("a") == 2
+        assert evicted == [1]
+
+    def test_lru_cache_clear(self):
+        evicted = []
+        cache = LRUCache(2, on_evict=evicted.append)
+        cache.put("a", 1, time.time() + 10)
+        cache.put("b", 2, time.time() + 10)
+        cache.clear()
+        assert len(cache) == 0
+        assert evicted == [1, 2]
@@ -0,0 +1,152 @@
+"""
+Tests for CBORProfile.
+"""
+import cbor2
+import pytest
+from cbor2 import CBORTag
+
+from cwt import CBORProfile, DecodeError, DecodeLimitError
+
+
+class TestCBORProfile:
+    """
+    Tests for CBORProfile.
+    """
+
+    def test_cbor_profile_constructor(self):
+        profile = CBORProfile.new()
+        assert isinstance(profile, CBORProfile)
+        assert profile.max_bytes is None
+        assert profile.max_depth is None
+        assert profile.max_items is None
+        assert profile.max_bstr_length is None
+
+    def test_cbor_profile_constructor_with_limits(self):
+        profile = CBORProfile.new(
+            max_bytes=1024, max_depth=4, max_items=32, max_bstr_length=256
+        )
+        assert profile.max_bytes == 1024
+        assert profile.max_depth == 4
+        assert profile.max_items == 32
+        assert profile.max_bstr_length == 256
+
+    @pytest.mark.parametrize(
+        "params, msg",
+        [
+            ({"max_bytes": "1"}, "max_bytes should be int."),
+            ({"max_bytes": -1}, "max_bytes should not be negative number."),
+            ({"max_depth": 1.0}, "max_depth should be int."),
+            ({"max_depth": -1}, "max_depth should not be negative number."),
+            ({"max_items": True}, "max_items should be int."),
+            ({"max_items": -1}, "max_items should not be negative number."),
+            ({"max_bstr_length": "1"}, "max_bstr_length should be int."),
+            ({"max_bstr_length": -1}, "max_bstr_length should not be negative number."),
+        ],
+    )
+    def test_cbor_profile_constructor_with_invalid_args(self, params, msg):
+        with pytest.raises(ValueError) as err:
+            CBORProfile.new(**params)
+            pytest.fail("CBORProfile.new() should fail.")
+        assert msg in str(err.value)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            1,
+            -1,
+            "text",
+            b"\x00" * 16,
+            [1, [2, [3]]],
+            {1: b"x", 2: {3: [4, 5]}},
+            CBORTag(18, [b"", {}, b"payload", b"sig"]),
+            [True, None, 1.5],
+        ],
+    )
+    def test_cbor_profile_check(self, data):
+        profile = CBORProfile.new(
+            max_bytes=64, max_depth=3, max_items=16, max_bstr_length=16
+        )
+        profile.check(cbor2.dumps(data))
+
+    def test_cbor_profile_check_with_indefinite_length_items(self):
+        profile = CBORProfile.new(max_depth=1, max_items=4, max_bstr_length=4)
+        # [_ 1, (_ h'0102', h'03')]
+        profile.check(bytes.fromhex("9f 01 5f 42 0102 41 03 ff ff"))
+        with pytest.raises(DecodeLimitError) as err:
+            # (_ h'0102', h'030405')
+            profile.check(bytes.fromhex("5f 42 0102 43 030405 ff"))
+            pytest.fail("check() should fail.")
+        assert "The length of byte string exceeds the limit." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "params, data, msg",
+        [
+            (
+                {"max_bytes": 8},
+                b"\x00" * 8,
+                "The size of CBOR data exceeds the limit.",
+            ),
+            (
+                {"max_depth": 2},
+                [[[1]]],
+                "The nesting depth of CBOR data exceeds the limit.",
+            ),
+            (
+                {"max_depth": 1},
+                CBORTag(18, [1]),
+                "The nesting depth of CBOR data exceeds the limit.",
+            ),
+            (
+                {"max_items": 4},
+                [1, 2, 3, 4],
+                "The number of CBOR data items exceeds the limit.",
+            ),
+            (
+                {"max_items": 4},
+                {1: 2, 3: 4},
+                "The number of CBOR data items exceeds the limit.",
+            ),
+            (
+                {"max_bstr_length": 4},
+                [b"\x00" * 5],
+                "The length of byte string exceeds the limit.",
+            ),
+        ],
+    )
+    def test_cbor_profile_check_with_exceeded_limits(self, params, data, msg):
+        profile = CBORProfile.new(**params)
+        with pytest.raises(DecodeLimitError) as err:
+            profile.check(cbor2.dumps(data))
+            pytest.fail("check() should fail.")
+        assert msg in str(err.value)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            # An array which declares 2^64-1 items.
+            bytes.fromhex("9bffffffffffffffff"),
+            # A map which declares 2^32-1 pairs.
+            bytes.fromhex("bbffffffff") + b"\x01\x02",
+            # A byte string which declares 2^64-1 bytes.
+            bytes.fromhex("5bffffffffffffffff"),
+            # A truncated array.
+            bytes.fromhex("830102"),
+            # A break outside of indefinite-length items.
+            bytes.fromhex("81ff"),
+            # An indefinite-length byte string with a text string chunk.
+            bytes.fromhex("5f6161ff"),
+        ],
+    )
+    def test_cbor_profile_check_with_malformed_data(self, data):
+        profile = CBORProfile.new()
+        with pytest.raises(DecodeError) as err:
+            profile.check(data)
+            pytest.fail("check() should fail.")
+        assert "Failed to decode." in str(err.value)
+
+    def test_cbor_profile_check_with_deep_nesting_without_max_depth(self):
+        profile = CBORProfile.new()
+        with pytest.raises(DecodeError) as err:
+            profile.check(b"\x81" * 1000 + b"\x01")
+            pytest.fail("check() should fail.")
+        assert "Failed to decode." in str(err.value)
@@ -9,15 +9,35 @@ Tests for COSE.
 
 import base64
 import datetime
+import gc
+import io
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from secrets import token_bytes
 
 import cbor2
 import pytest
 from cbor2 import CBORTag
+from cryptography.exceptions import InvalidSignature
 
 import cwt
-from cwt import COSE, COSEKey, DecodeError, EncodeError, Recipient, VerifyError
+from cwt import (
+    COSE,
+    CBORProfile,
+    COSEKey,
+    COSEKeyRing,
+    DecodeError,
+    DecodeLimitError,
+    EncodeError,
+    Recipient,
+    SignaturePolicy,
+    VerifyError,
+    cose_key_ring,
+)
+from cwt.recipient_algs.direct_hkdf import DirectHKDF
 from cwt.recipient_interface import RecipientInterface
+from cwt.recipients import Recipients
 from cwt.signer import Signer
 from cwt.utils import base64url_decode
 
@@ -1084,6 +1104,75 @@ class TestCOSE:
             pytest.fail("decode() should fail.")
         assert "Failed to compare digest." in str(err.value)
 
+    def test_cose_decode_mac0_with_different_multiple_keys_without_exceptions(
+        self, ctx
+    ):
+        key1 = COSEKey.from_symmetric_key(alg="HS256")
+        keys = [COSEKey.from_symmetric_key(alg="HS256") for _ in range(3)]
+        encoded = ctx.encode_and_mac(b"Hello world!", key1)
+        verified = []
+
+        def counting_verification_error(k):
+            verification_error = k.verification_error
+
+            def f(msg, sig):
+                verified.append(k)
+                return verification_error(msg, sig)
+
+            return f
+
+        for k in keys:
+            k.verification_error = counting_verification_error(k)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(encoded, keys)
+            pytest.fail("decode() should fail.")
+        assert "Failed to compare digest." in str(err.value)
+        # Each key is tried only once and no verification is repeated to raise
+        # the exception.
+        assert verified == keys
+
+    def test_cose_decode_sign1_and_encrypt0_with_invalid_key_tried_once(self, ctx):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            signer = COSEKey.from_pem(key_file.read())
+        encoded = ctx.encode_and_sign(b"Hello world!", signer)
+        with open(key_path("public_key_es256.pem")) as key_file:
+            key = COSEKey.from_pem(key_file.read())
+        encoded = cbor2.loads(encoded)
+        encoded.value[3] = bytes(64)
+        verified = []
+        verification_error = key.verification_error
+
+        def counting_verification_error(msg, sig):
+            verified.append(msg)
+            return verification_error(msg, sig)
+
+        key.verification_error = counting_verification_error
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(encoded, key)
+            pytest.fail("decode() should fail.")
+        assert "Failed to verify." in str(err.value)
+        # The cause of the failure is kept.
+        assert isinstance(err.value.__cause__, InvalidSignature)
+        assert len(verified) == 1
+
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key)
+        other = COSEKey.from_symmetric_key(alg="A128GCM")
+        decrypted = []
+        try_decrypt = other.try_decrypt
+
+        def counting_try_decrypt(msg, nonce, aad):
+            decrypted.append(msg)
+            return try_decrypt(msg, nonce, aad)
+
+        other.try_decrypt = counting_try_decrypt
+        other.decrypt = None
+        with pytest.raises(DecodeError) as err:
+            ctx.decode(encoded, other)
+            pytest.fail("decode() should fail.")
+        assert "Failed to decrypt." in str(err.value)
+        assert len(decrypted) == 1
+
     def test_cose_decode_mac0_with_different_multiple_keys_2(self):
         ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
         key1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
@@ -1570,3 +1659,1578 @@ class TestCOSE:
             ctx.decode(encoded, private_key)
             pytest.fail("decode should fail.")
         assert "context should be set." in str(err.value)
+
+    def test_cose_decode_batch(self, ctx):
+        mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        enc_key = COSEKey.from_symmetric_key(alg="ChaCha20/Poly1305", kid="02")
+        encoded = [
+            ctx.encode_and_mac(b"Hello world!", mac_key, unprotected={4: b"01"}),
+            ctx.encode_and_encrypt(b"Hello world!", enc_key, unprotected={4: b"02"}),
+            b"invalid",
+            ctx.encode_and_mac(
+                b"Hello world!", mac_key, unprotected={4: b"01"}, out="cbor2/CBORTag"
+            ),
+        ]
+        res = ctx.decode_batch(encoded, [mac_key, enc_key], max_workers=2)
+        assert len(res) == 4
+        assert res[0] == b"Hello world!"
+        assert res[1] == b"Hello world!"
+        assert isinstance(res[2], DecodeError)
+        assert res[3] == b"Hello world!"
+
+    def test_cose_decode_batch_with_shared_key_ring(self, ctx, monkeypatch):
+        keys = [
+            COSEKey.from_symmetric_key(alg="HS256", kid=f"{i:03}") for i in range(100)
+        ]
+        encoded = [
+            ctx.encode_and_mac(b"Hello world!", keys[42], unprotected={4: b"042"})
+            for _ in range(5)
+        ]
+        narrowed = []
+        narrow_by_alg = cose_key_ring._narrow_by_alg
+
+        def counting_narrow_by_alg(keys, alg):
+            narrowed.append(alg)
+            return narrow_by_alg(keys, alg)
+
+        monkeypatch.setattr(cose_key_ring, "_narrow_by_alg", counting_narrow_by_alg)
+        res = ctx.decode_batch(encoded, keys, max_workers=1)
+        assert res == [b"Hello world!"] * 5
+        # The candidate keys are resolved once for all of the COSE data.
+        assert len(narrowed) == 1
+
+    def test_cose_decode_batch_with_invalid_data(self, ctx):
+        mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        other_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        encoded = ctx.encode_and_mac(b"Hello world!", mac_key, unprotected={4: b"01"})
+        res = ctx.decode_batch(
+            [cbor2.dumps(b"Hello world!"), encoded, cbor2.dumps(CBORTag(99, []))],
+            other_key,
+        )
+        assert isinstance(res[0], ValueError)
+        assert "Invalid COSE format." in str(res[0])
+        assert isinstance(res[1], VerifyError)
+        assert isinstance(res[2], ValueError)
+        assert "Unsupported or unknown CBOR tag(99)." in str(res[2])
+
+    def test_cose_decode_batch_with_invalid_key(self, ctx):
+        with pytest.raises(ValueError) as err:
+            ctx.decode_batch([b""], [b"invalid"])
+            pytest.fail("decode_batch should fail.")
+        assert "key in keys should have COSEKeyInterface." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "items",
+        [
+            ["Signature1", b"", b"", b""],
+            ["Signature1", b"\xa1\x01\x26", b"", b"a" * 23],
+            ["MAC0", b"\xa1\x01\x05", b"aad", b"a" * 24],
+            ["Signature", b"", b"\xa1\x01\x26", b"", b"a" * 255],
+            ["Encrypt0", b"a" * 256, b"a" * 65535],
+            ["Encrypt", bytearray(b"a" * 65536), memoryview(b"a" * 10)],
+            ["MAC", b"", b"", None],
+            ["Signature1", b"", "aad", b""],
+        ],
+    )
+    def test_cose_dumps_structure(self, ctx, items):
+        expected = cbor2.dumps(
+            [bytes(v) if isinstance(v, memoryview) else v for v in items]
+        )
+        assert ctx._dumps_structure(items) == expected
+
+    def test_cose_inspect_mac0(self):
+        ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+        mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        encoded = ctx.encode_and_mac(b"Hello world!", mac_key)
+        info = ctx.inspect(encoded)
+        assert info.data is encoded
+        assert info.tag == 17
+        assert info.protected == {1: 5}
+        assert info.unprotected == {4: b"01"}
+        assert info.alg == 5
+        assert info.kid == b"01"
+        s, e = info.payload_range
+        assert encoded[s:e] == b"Hello world!"
+        assert isinstance(info.payload, memoryview)
+        assert info.payload == b"Hello world!"
+        assert info.signature == cbor2.loads(encoded).value[3]
+        assert ctx.decode(info, mac_key) == b"Hello world!"
+
+    def test_cose_inspect_encrypt(self):
+        ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+        enc_key = COSEKey.from_symmetric_key(alg="ChaCha20/Poly1305", kid="02")
+        rec = Recipient.from_jwk({"alg": "direct", "kid": "02"})
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[rec])
+        info = ctx.inspect(encoded)
+        assert info.tag == 96
+        assert info.payload == cbor2.loads(encoded).value[2]
+        assert info.signature_range is None
+        assert info.signature is None
+        assert ctx.decode(info, enc_key) == b"Hello world!"
+
+    def test_cose_inspect_signature(self):
+        signer = Signer.from_jwk(
+            {
+                "kty": "EC",
+                "kid": "11",
+                "crv": "P-256",
+                "x": "usWxHK2PmfnHKwXPS54m0kTcGJ90UiglWiGahtagnv8",
+                "y": "IBOL-C3BttVivg-lSreASjpkttcsz-1rb7btKLv8EX4",
+                "d": "V8kgd2ZBRuh2dgyVINBUqpPDr7BOMGcF22CQMIUHtNM",
+            }
+        )
+        ctx = COSE.new()
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=[signer])
+        info = ctx.inspect(encoded)
+        assert info.tag == 98
+        assert info.protected == {}
+        assert info.alg == 0
+        assert info.kid == b""
+        assert cbor2.loads(info.signature) == cbor2.loads(encoded).value[3]
+        assert ctx.decode(info, signer.cose_key) == b"Hello world!"
+
+    def test_cose_inspect_with_detached_payload(self, ctx):
+        mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        encoded = ctx.encode_and_mac(b"Hello world!", mac_key, out="cbor2/CBORTag")
+        encoded.value[2] = None
+        info = ctx.inspect(cbor2.dumps(encoded))
+        assert info.payload_range is None
+        assert info.payload is None
+
+    @pytest.mark.parametrize(
+        "invalid, msg",
+        [
+            (cbor2.dumps(b"Hello world!"), "Invalid COSE format."),
+            (cbor2.dumps(CBORTag(99, [])), "Unsupported or unknown CBOR tag(99)."),
+            (cbor2.dumps(CBORTag(17, [b"", {}, b""])), "Invalid MAC0 format."),
+            (cbor2.dumps(CBORTag(18, {})), "Invalid Signature1 format."),
+            (cbor2.dumps(CBORTag(16, [{}, {}, b""])), "Invalid Encrypt0 format."),
+            (
+                cbor2.dumps(CBORTag(16, [cbor2.dumps([]), {}, b""])),
+                "protected header should be dict.",
+            ),
+            (
+                cbor2.dumps(CBORTag(16, [b"", [], b""])),
+                "unprotected header should be dict.",
+            ),
+        ],
+    )
+    def test_cose_inspect_with_invalid_format(self, ctx, invalid, msg):
+        with pytest.raises(ValueError) as err:
+            ctx.inspect(invalid)
+            pytest.fail("inspect() should fail.")
+        assert msg in str(err.value)
+
+    @pytest.mark.parametrize(
+        "invalid",
+        [
+            b"",
+            bytes.fromhex("d1"),
+            bytes.fromhex("d184"),
+            bytes.fromhex("d18443a101"),
+            bytes.fromhex("d18443a10105a0"),
+            bytes.fromhex("d18443a10105a04cff"),
+            bytes.fromhex("d18443a10105a05f41614161"),
+            bytes.fromhex("d18443a10105a0ff"),
+            bytes.fromhex("d18443a10105a01c"),
+        ],
+    )
+    def test_cose_inspect_with_broken_data(self, ctx, invalid):
+        with pytest.raises(DecodeError) as err:
+            ctx.inspect(invalid)
+            pytest.fail("inspect() should fail.")
+        assert "Failed to decode." in str(err.value)
+
+    def test_cose_inspect_with_indefinite_length_payload(self, ctx):
+        info = ctx.inspect(bytes.fromhex("d18443a10105a05f41614162ff40"))
+        assert info.payload_range is None
+        assert info.signature == b""
+        assert info.to_cbor_tag().value == [b"\xa1\x01\x05", {}, b"ab", b""]
+
+    @pytest.mark.parametrize(
+        "private_key_path, public_key_path",
+        [
+            ("private_key_es256.pem", "public_key_es256.pem"),
+            ("private_key_ed25519.pem", "public_key_ed25519.pem"),
+            ("private_key_rsa.pem", "public_key_rsa.pem"),
+        ],
+    )
+    def test_cose_decode_signature1_with_bytes_like_object(
+        self, private_key_path, public_key_path
+    ):
+        ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+        alg = "PS256" if "rsa" in private_key_path else ""
+        with open(key_path(private_key_path)) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), alg=alg, kid="01")
+        with open(key_path(public_key_path)) as key_file:
+            public_key = COSEKey.from_pem(key_file.read(), alg=alg, kid="01")
+        encoded = ctx.encode_and_sign(b"Hello world!", private_key)
+        buf = bytearray(b"\x00" * 8 + encoded)
+        view = memoryview(buf)[8:]
+        assert ctx.decode(bytearray(encoded), public_key) == b"Hello world!"
+        assert ctx.decode(view, public_key) == b"Hello world!"
+        res = ctx.decode(view, public_key, out="memoryview")
+        assert isinstance(res, memoryview)
+        assert res.obj is buf
+        assert res == b"Hello world!"
+
+    def test_cose_decode_mac_with_bytes_like_object(self, ctx):
+        mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        rec = Recipient.from_jwk({"alg": "direct", "kid": "01"})
+        encoded = ctx.encode_and_mac(b"Hello world!", mac_key, recipients=[rec])
+        res = ctx.decode(memoryview(encoded), mac_key, out="memoryview")
+        assert res.obj is encoded
+        assert res == b"Hello world!"
+        assert ctx.decode(ctx.inspect(encoded), mac_key) == b"Hello world!"
+
+    @pytest.mark.parametrize(
+        "alg",
+        ["A128GCM", "AES-CCM-16-64-128", "ChaCha20/Poly1305"],
+    )
+    def test_cose_decode_encrypt0_with_bytes_like_object(self, ctx, alg):
+        enc_key = COSEKey.from_symmetric_key(alg=alg, kid="01")
+        encoded = ctx.encode_and_encrypt(
+            b"Hello world!", enc_key, nonce=enc_key.generate_nonce()
+        )
+        assert ctx.decode(memoryview(encoded), enc_key) == b"Hello world!"
+        res = ctx.decode(memoryview(encoded), enc_key, out="memoryview")
+        assert isinstance(res, memoryview)
+        assert res == b"Hello world!"
+        assert ctx.decode(
+            cbor2.loads(encoded), enc_key, out="memoryview"
+        ) == memoryview(b"Hello world!")
+
+    @pytest.mark.parametrize(
+        "protected, unprotected",
+        [
+            (None, None),
+            ({}, {}),
+            ({"alg": "HS256"}, {"kid": "01"}),
+            (b"", {"kid": "01"}),
+            (cbor2.dumps({1: 5}), {}),
+        ],
+    )
+    def test_cose_compile_encoder_mac0(self, protected, unprotected):
+        ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+        mac_key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        encoder = ctx.compile_encoder(mac_key, protected, unprotected)
+        assert encoder.key is mac_key
+        assert encoder.tag == 17
+        for payload, aad in [(b"Hello world!", b""), (b"a" * 1000, b"aad")]:
+            encoded = encoder.encode(payload, external_aad=aad)
+            assert encoded == ctx.encode_and_mac(
+                payload, mac_key, protected, unprotected, external_aad=aad
+            )
+            assert ctx.decode(encoded, mac_key, external_aad=aad) == payload
+
+    @pytest.mark.parametrize(
+        "protected, unprotected",
+        [
+            (None, None),
+            ({}, {}),
+            ({"alg": "EdDSA"}, {"kid": "01"}),
+        ],
+    )
+    def test_cose_compile_encoder_signature1(self, protected, unprotected):
+        ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+        with open(key_path("private_key_ed25519.pem")) as key_file:
+            sig_key = COSEKey.from_pem(key_file.read(), kid="01")
+        encoder = ctx.compile_encoder(sig_key, protected, unprotected)
+        assert encoder.tag == 18
+        assert cbor2.loads(encoder.protected) == {1: -8}
+        assert encoder.unprotected == {4: b"01"}
+        for payload, aad in [(b"Hello world!", b""), (b"a" * 70000, b"aad")]:
+            encoded = encoder.encode(payload, external_aad=aad)
+            assert encoded == ctx.encode_and_sign(
+                payload, sig_key, protected, unprotected, external_aad=aad
+            )
+            assert ctx.decode(encoded, sig_key, external_aad=aad) == payload
+
+    def test_cose_compile_encoder_with_invalid_key(self, ctx):
+        with open(key_path("public_key_ed25519.pem")) as key_file:
+            public_key = COSEKey.from_pem(key_file.read(), kid="01")
+        with pytest.raises(ValueError) as err:
+            ctx.compile_encoder(public_key)
+            pytest.fail("compile_encoder() should fail.")
+        assert "The key operation could not be specified." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "private_key_path, public_key_path, alg",
+        [
+            ("private_key_es256.pem", "public_key_es256.pem", "ES256"),
+            ("private_key_es384.pem", "public_key_es384.pem", "ES384"),
+            ("private_key_es512.pem", "public_key_es512.pem", "ES512"),
+            ("private_key_rsa.pem", "public_key_rsa.pem", "PS256"),
+            ("private_key_rsa.pem", "public_key_rsa.pem", "RS512"),
+        ],
+    )
+    def test_cose_sign_detached_and_verify_detached(
+        self, private_key_path, public_key_path, alg
+    ):
+        ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+        with open(key_path(private_key_path)) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), alg=alg, kid="01")
+        with open(key_path(public_key_path)) as key_file:
+            public_key = COSEKey.from_pem(key_file.read(), alg=alg, kid="01")
+        payload = token_bytes(70000)
+        signer = ctx.sign_detached(private_key, len(payload), external_aad=b"aad")
+        assert signer.payload_length == 70000
+        for i in range(0, len(payload), 4096):
+            signer.update(payload[i : i + 4096])
+        encoded = signer.finalize()
+        msg = cbor2.loads(encoded)
+        assert msg.tag == 18
+        assert msg.value[2] is None
+
+        verifier = ctx.verify_detached(encoded, public_key, len(payload), b"aad")
+        for i in range(0, len(payload), 1000):
+            verifier.update(payload[i : i + 1000])
+        verifier.finalize()
+
+        # The same signature can be verified with the attached payload.
+        msg.value[2] = payload
+        assert ctx.decode(msg, public_key, external_aad=b"aad") == payload
+
+    def test_cose_sign_detached_with_cbor_tag(self, ctx):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), kid="01")
+        signer = ctx.sign_detached(private_key, 0)
+        encoded = signer.finalize(out="cbor2/CBORTag")
+        assert isinstance(encoded, CBORTag)
+        verifier = ctx.verify_detached(encoded, private_key, 0)
+        verifier.finalize()
+
+    def test_cose_sign_detached_with_eddsa(self, ctx):
+        with open(key_path("private_key_ed25519.pem")) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), kid="01")
+        with pytest.raises(ValueError) as err:
+            ctx.sign_detached(private_key, 10)
+            pytest.fail("sign_detached() should fail.")
+        assert "Prehashed signatures are not supported for the alg: -8." in str(
+            err.value
+        )
+
+    def test_cose_verify_detached_with_eddsa(self, ctx):
+        with open(key_path("private_key_ed25519.pem")) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), kid="01")
+        encoded = cbor2.loads(ctx.encode_and_sign(b"", private_key))
+        encoded.value[2] = None
+        with pytest.raises(ValueError) as err:
+            ctx.verify_detached(encoded, private_key, 0)
+            pytest.fail("verify_detached() should fail.")
+        assert "Prehashed signatures are not supported for the alg: -8." in str(
+            err.value
+        )
+
+    @pytest.mark.parametrize(
+        "length, chunks, msg",
+        [
+            (-1, [], "payload_length should not be negative number."),
+            (3, [b"abcd"], "The payload exceeds payload_length."),
+            (3, [b"ab", b"cd"], "The payload exceeds payload_length."),
+            (3, [b"ab"], "The length of the payload differs from payload_length."),
+        ],
+    )
+    def test_cose_sign_detached_with_invalid_length(self, ctx, length, chunks, msg):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), kid="01")
+        with pytest.raises(ValueError) as err:
+            signer = ctx.sign_detached(private_key, length)
+            for c in chunks:
+                signer.update(c)
+            signer.finalize()
+            pytest.fail("sign_detached() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_verify_detached_with_different_payload(self, ctx):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), kid="01")
+        signer = ctx.sign_detached(private_key, 5)
+        signer.update(b"hello")
+        encoded = signer.finalize()
+        verifier = ctx.verify_detached(encoded, private_key, 5)
+        verifier.update(b"hellO")
+        with pytest.raises(VerifyError) as err:
+            verifier.finalize()
+            pytest.fail("finalize() should fail.")
+        assert "Failed to verify." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "data, msg",
+        [
+            (CBORTag(17, [b"", {}, None, b""]), "Unsupported or unknown CBOR tag(17)."),
+            (CBORTag(18, [b"", {}, None]), "Invalid Signature1 format."),
+            (
+                CBORTag(18, [b"", {}, b"a", b""]),
+                "The payload should be detached (nil).",
+            ),
+            (CBORTag(18, [b"", [], None, b""]), "unprotected header should be dict."),
+            (cbor2.dumps([b"", {}, None, b""]), "Invalid COSE format."),
+            (CBORTag(18, [b"", {4: b"02"}, None, b""]), "key is not found."),
+        ],
+    )
+    def test_cose_verify_detached_with_invalid_args(self, ctx, data, msg):
+        with open(key_path("public_key_es256.pem")) as key_file:
+            public_key = COSEKey.from_pem(key_file.read(), kid="01")
+        with pytest.raises(ValueError) as err:
+            ctx.verify_detached(data, public_key, 0)
+            pytest.fail("verify_detached() should fail.")
+        assert msg in str(err.value)
+
+    @pytest.mark.parametrize(
+        "alg, payload_length, external_aad",
+        [
+            ("A128GCM", 0, b""),
+            ("A192GCM", 23, b""),
+            ("A256GCM", 70000, b"aad"),
+        ],
+    )
+    def test_cose_encrypt_stream_and_decrypt_stream(
+        self, alg, payload_length, external_aad
+    ):
+        ctx = COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+        enc_key = COSEKey.from_symmetric_key(alg=alg, kid="01")
+        payload = token_bytes(payload_length)
+        nonce = enc_key.generate_nonce()
+        sink = io.BytesIO()
+        encoder = ctx.encrypt_stream(
+            enc_key, payload_length, sink, nonce=nonce, external_aad=external_aad
+        )
+        assert encoder.payload_length == payload_length
+        for i in range(0, payload_length, 4096):
+            encoder.update(payload[i : i + 4096])
+        encoder.finalize()
+        encoded = sink.getvalue()
+        assert encoded == ctx.encode_and_encrypt(
+            payload, enc_key, nonce=nonce, external_aad=external_aad
+        )
+
+        plaintext = io.BytesIO()
+        n = ctx.decrypt_stream(
+            io.BytesIO(encoded), enc_key, plaintext, external_aad, chunk_size=1000
+        )
+        assert n == payload_length
+        assert plaintext.getvalue() == payload
+
+    def test_cose_encrypt_stream_with_chacha20(self, ctx):
+        enc_key = COSEKey.from_symmetric_key(alg="ChaCha20/Poly1305", kid="01")
+        with pytest.raises(ValueError) as err:
+            ctx.encrypt_stream(enc_key, 10, io.BytesIO())
+            pytest.fail("encrypt_stream() should fail.")
+        assert "Streaming encryption is not supported for the alg: 24." in str(
+            err.value
+        )
+
+    def test_cose_decrypt_stream_with_chacha20(self, ctx):
+        enc_key = COSEKey.from_symmetric_key(alg="ChaCha20/Poly1305", kid="01")
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key)
+        with pytest.raises(ValueError) as err:
+            ctx.decrypt_stream(io.BytesIO(encoded), enc_key, io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert "Streaming decryption is not supported for the alg: 24." in str(
+            err.value
+        )
+
+    @pytest.mark.parametrize(
+        "length, chunks, msg",
+        [
+            (-1, [], "payload_length should not be negative number."),
+            (3, [b"abcd"], "The payload exceeds payload_length."),
+            (3, [b"ab"], "The length of the payload differs from payload_length."),
+        ],
+    )
+    def test_cose_encrypt_stream_with_invalid_length(self, ctx, length, chunks, msg):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        with pytest.raises(ValueError) as err:
+            encoder = ctx.encrypt_stream(enc_key, length, io.BytesIO())
+            for c in chunks:
+                encoder.update(c)
+            encoder.finalize()
+            pytest.fail("encrypt_stream() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_decrypt_stream_with_tampered_ciphertext(self, ctx):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        encoded = bytearray(ctx.encode_and_encrypt(b"Hello world!", enc_key))
+        encoded[-20] ^= 1
+        with pytest.raises(DecodeError) as err:
+            ctx.decrypt_stream(io.BytesIO(encoded), enc_key, io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert "Failed to decrypt." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "data, msg",
+        [
+            (cbor2.dumps(CBORTag(17, [b"", {}, b""])), "Invalid COSE_Encrypt0 format."),
+            (cbor2.dumps(CBORTag(16, [b"", {}])), "Invalid COSE_Encrypt0 format."),
+            (cbor2.dumps(CBORTag(16, [{}, {}, b""])), "Invalid COSE_Encrypt0 format."),
+            (
+                cbor2.dumps(CBORTag(16, [b"", {}, b"a"])),
+                "Invalid COSE_Encrypt0 format.",
+            ),
+            (
+                cbor2.dumps(CBORTag(16, [b"\x80", {}, b""])),
+                "protected header should be dict.",
+            ),
+            (
+                cbor2.dumps(CBORTag(16, [b"", [], b""])),
+                "unprotected header should be dict.",
+            ),
+            (
+                cbor2.dumps(CBORTag(16, [b"", {4: b"02"}, b"a" * 16])),
+                "key is not found.",
+            ),
+        ],
+    )
+    def test_cose_decrypt_stream_with_invalid_data(self, ctx, data, msg):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        with pytest.raises(ValueError) as err:
+            ctx.decrypt_stream(io.BytesIO(data), enc_key, io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_decrypt_stream_with_disallowed_tag(self):
+        ctx = COSE.new(alg_auto_inclusion=True, allowed_tags=[18])
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key)
+        with pytest.raises(ValueError) as err:
+            ctx.decrypt_stream(io.BytesIO(encoded), enc_key, io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert "CBOR tag(16) is not allowed." in str(err.value)
+
+    def test_cose_decrypt_stream_with_disallowed_alg(self):
+        ctx = COSE.new(alg_auto_inclusion=True, allowed_algs=["A256GCM"])
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key)
+        sink = io.BytesIO()
+        with pytest.raises(VerifyError) as err:
+            ctx.decrypt_stream(io.BytesIO(encoded), enc_key, sink)
+            pytest.fail("decrypt_stream() should fail.")
+        assert "alg(1) is not allowed." in str(err.value)
+        assert sink.getvalue() == b""
+
+    def test_cose_decrypt_stream_with_invalid_nonce_length(self, ctx):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        encoded = ctx.encode_and_encrypt(
+            b"Hello world!", enc_key, nonce=token_bytes(12), out="cbor2/CBORTag"
+        )
+        encoded.value[1][5] = token_bytes(13)
+        sink = io.BytesIO()
+        with pytest.raises(DecodeError) as err:
+            ctx.decrypt_stream(io.BytesIO(cbor2.dumps(encoded)), enc_key, sink)
+            pytest.fail("decrypt_stream() should fail.")
+        assert "The length of nonce should be 12 bytes." in str(err.value)
+        assert sink.getvalue() == b""
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            # A protected header declared as a 2**36-byte string.
+            bytes.fromhex("d0835b0000001000000000a0"),
+            # A byte string of 2**36 bytes in the unprotected header.
+            bytes.fromhex("d08340a1055b0000001000000000"),
+            # A ciphertext declared as a 2**36-byte string.
+            bytes.fromhex("d08340a1054c" + "00" * 12 + "5b0000001000000000"),
+        ],
+    )
+    def test_cose_decrypt_stream_with_hostile_length(self, data):
+        class BoundedSource(io.BytesIO):
+            def read(self, n=-1):
+                assert 0 <= n <= 65536
+                return super().read(n)
+
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        ctx = COSE.new()
+        with pytest.raises(DecodeError) as err:
+            ctx.decrypt_stream(BoundedSource(data), enc_key, io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert "Failed to decode." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "data, msg",
+        [
+            (
+                bytes.fromhex("d0835b0000001000000000a0"),
+                "The length of byte string exceeds the limit.",
+            ),
+            (
+                bytes.fromhex("d08340a1055b0000001000000000"),
+                "The size of CBOR data exceeds the limit.",
+            ),
+            (
+                cbor2.dumps(CBORTag(16, [b"", {5: b"x" * 100}, b"x" * 16])),
+                "The length of byte string exceeds the limit.",
+            ),
+        ],
+    )
+    def test_cose_decrypt_stream_with_cbor_profile(self, data, msg):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        ctx = COSE.new(cbor_profile=CBORProfile.new(max_bytes=1024, max_bstr_length=64))
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decrypt_stream(io.BytesIO(data), enc_key, io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_decrypt_stream_with_multiple_candidates(self, ctx):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        other = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        payload = token_bytes(100)
+        encoded = ctx.encode_and_encrypt(payload, enc_key)
+        sink = io.BytesIO()
+        sink.write(b"head")
+        length = ctx.decrypt_stream(
+            io.BytesIO(encoded), [other, enc_key], sink, chunk_size=16
+        )
+        assert length == len(payload)
+        assert sink.getvalue() == b"head" + payload
+
+    def test_cose_decrypt_stream_with_multiple_candidates_and_max_key_trials(self):
+        ctx = COSE.new(alg_auto_inclusion=True, max_key_trials=1)
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        other = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decrypt_stream(io.BytesIO(encoded), [other, enc_key], io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert "The number of key trials exceeds the limit." in str(err.value)
+
+    def test_cose_decrypt_stream_with_unseekable_source(self, ctx):
+        class UnseekableSource(io.BytesIO):
+            def seekable(self):
+                return False
+
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        other = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key)
+        with pytest.raises(DecodeError) as err:
+            ctx.decrypt_stream(
+                UnseekableSource(encoded), [other, enc_key], io.BytesIO()
+            )
+            pytest.fail("decrypt_stream() should fail.")
+        assert "Failed to decrypt." in str(err.value)
+        sink = io.BytesIO()
+        ctx.decrypt_stream(UnseekableSource(encoded), [enc_key, other], sink)
+        assert sink.getvalue() == b"Hello world!"
+
+    def test_cose_decrypt_stream_with_truncated_data(self, ctx):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key)
+        with pytest.raises(DecodeError) as err:
+            ctx.decrypt_stream(io.BytesIO(encoded[:-1]), enc_key, io.BytesIO())
+            pytest.fail("decrypt_stream() should fail.")
+        assert "Failed to decode." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "executor_class", [None, ThreadPoolExecutor, ProcessPoolExecutor]
+    )
+    def test_cose_encode_and_sign_with_executor(self, ctx, executor_class):
+        signers = []
+        for i, (name, alg) in enumerate(
+            [
+                ("private_key_es256.pem", "ES256"),
+                ("private_key_es384.pem", "ES384"),
+                ("private_key_es512.pem", "ES512"),
+                ("private_key_rsa.pem", "PS256"),
+                ("private_key_ed25519.pem", "EdDSA"),
+            ]
+        ):
+            with open(key_path(name)) as key_file:
+                signers.append(Signer.from_pem(key_file.read(), alg=alg, kid=f"{i:02}"))
+        if executor_class is None:
+            encoded = ctx.encode_and_sign(b"Hello world!", signers=signers)
+        else:
+            with executor_class(max_workers=2) as executor:
+                encoded = ctx.encode_and_sign(
+                    b"Hello world!", signers=signers, executor=executor
+                )
+        sigs = cbor2.loads(encoded).value[3]
+        assert [sig[1][4] for sig in sigs] == [b"00", b"01", b"02", b"03", b"04"]
+        for i, s in enumerate(signers):
+            assert sigs[i][2] == s.signature
+            assert s.elapsed_time > 0.0
+            assert ctx.decode(encoded, s.cose_key) == b"Hello world!"
+
+    def test_cose_encode_and_sign_with_executor_and_public_key(self, ctx):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            signer1 = Signer.from_pem(key_file.read(), kid="01")
+        with open(key_path("public_key_es256.pem")) as key_file:
+            signer2 = Signer.from_pem(key_file.read(), kid="02")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with pytest.raises(ValueError) as err:
+                ctx.encode_and_sign(
+                    b"Hello world!", signers=[signer1, signer2], executor=executor
+                )
+                pytest.fail("encode_and_sign() should fail.")
+        assert "Public key cannot be used for signing." in str(err.value)
+
+
+@pytest.fixture(scope="module")
+def signers_and_public_keys():
+    signers = []
+    public_keys = []
+    for kid, name in [
+        ("01", "es256"),
+        ("02", "es384"),
+        ("03", "es512"),
+        ("04", "ed25519"),
+    ]:
+        with open(key_path(f"private_key_{name}.pem")) as key_file:
+            signers.append(Signer.from_pem(key_file.read(), kid=kid))
+        with open(key_path(f"public_key_{name}.pem")) as key_file:
+            public_keys.append(COSEKey.from_pem(key_file.read(), kid=kid))
+    return signers, public_keys
+
+
+class TestCOSEDecodeWithSigners:
+    """
+    Tests for COSE.decode_with_signers().
+    """
+
+    @pytest.mark.parametrize(
+        "policy, n_keys, min_passed",
+        [
+            (None, 4, 1),
+            (SignaturePolicy.new("any"), 1, 1),
+            (SignaturePolicy.new("all"), 4, 4),
+            (SignaturePolicy.new(3), 3, 3),
+            (SignaturePolicy.new(1, required_kids=["03"]), 4, 1),
+        ],
+    )
+    def test_cose_decode_with_signers(
+        self, ctx, signers_and_public_keys, policy, n_keys, min_passed
+    ):
+        signers, public_keys = signers_and_public_keys
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=signers)
+        payload, passed = ctx.decode_with_signers(
+            encoded, public_keys[:n_keys], policy, max_workers=2
+        )
+        assert payload == b"Hello world!"
+        assert len(passed) >= min_passed
+        kids = [s.unprotected[4] for s in passed]
+        assert kids == sorted(kids)
+        if policy and policy.required_kids:
+            assert b"03" in kids
+        for s in passed:
+            assert s.cose_key.kid == s.unprotected[4]
+            assert s.signature in [sig.signature for sig in signers]
+
+    def test_cose_decode_with_signers_with_cose_message_info(
+        self, ctx, signers_and_public_keys
+    ):
+        signers, public_keys = signers_and_public_keys
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=signers)
+        payload, passed = ctx.decode_with_signers(
+            ctx.inspect(encoded), public_keys, SignaturePolicy.new("all")
+        )
+        assert payload == b"Hello world!"
+        assert [s.unprotected[4] for s in passed] == [b"01", b"02", b"03", b"04"]
+
+    @pytest.mark.parametrize(
+        "policy, n_keys",
+        [
+            (SignaturePolicy.new("all"), 3),
+            (SignaturePolicy.new(2), 1),
+            (SignaturePolicy.new(5), 4),
+            (SignaturePolicy.new(1, required_kids=["04"]), 3),
+            (SignaturePolicy.new(1, required_kids=["05"]), 4),
+        ],
+    )
+    def test_cose_decode_with_signers_without_meeting_policy(
+        self, ctx, signers_and_public_keys, policy, n_keys
+    ):
+        signers, public_keys = signers_and_public_keys
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=signers)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode_with_signers(encoded, public_keys[:n_keys], policy)
+            pytest.fail("decode_with_signers() should fail.")
+        assert "Failed to meet the verification policy." in str(err.value)
+
+    def test_cose_decode_with_signers_with_invalid_signature(
+        self, ctx, signers_and_public_keys
+    ):
+        signers, public_keys = signers_and_public_keys
+        encoded = ctx.encode_and_sign(
+            b"Hello world!", signers=signers, out="cbor2/CBORTag"
+        )
+        encoded.value[3][1][2] = b"x" * len(encoded.value[3][1][2])
+        with pytest.raises(VerifyError) as err:
+            ctx.decode_with_signers(encoded, public_keys, SignaturePolicy.new("all"))
+            pytest.fail("decode_with_signers() should fail.")
+        assert "Failed to meet the verification policy." in str(err.value)
+        _, passed = ctx.decode_with_signers(
+            encoded, public_keys, SignaturePolicy.new(3)
+        )
+        assert [s.unprotected[4] for s in passed] == [b"01", b"03", b"04"]
+
+    @pytest.mark.parametrize(
+        "policy",
+        [
+            SignaturePolicy.new("all"),
+            SignaturePolicy.new(2),
+            SignaturePolicy.new(3),
+        ],
+    )
+    def test_cose_decode_with_signers_with_duplicated_signatures(
+        self, ctx, signers_and_public_keys, policy
+    ):
+        signers, public_keys = signers_and_public_keys
+        encoded = ctx.encode_and_sign(
+            b"Hello world!", signers=signers[:1], out="cbor2/CBORTag"
+        )
+        encoded.value[3] = encoded.value[3] * 3
+        with pytest.raises(VerifyError) as err:
+            ctx.decode_with_signers(encoded, public_keys[:1], policy)
+            pytest.fail("decode_with_signers() should fail.")
+        assert "Failed to meet the verification policy." in str(err.value)
+        # The same key material with another kid is the same signer.
+        other = COSEKey.new({**public_keys[0].to_dict(), 2: b"99"})
+        encoded.value[3][1] = [
+            encoded.value[3][1][0],
+            {**encoded.value[3][1][1], 4: b"99"},
+            encoded.value[3][1][2],
+        ]
+        with pytest.raises(VerifyError):
+            ctx.decode_with_signers(encoded, [public_keys[0], other], policy)
+        _, passed = ctx.decode_with_signers(
+            encoded, public_keys[:1], SignaturePolicy.new(1)
+        )
+        assert len(passed) == 1
+
+    @pytest.mark.parametrize(
+        "data, msg",
+        [
+            (cbor2.dumps([b"", {}, b"", []]), "Invalid COSE format."),
+            (CBORTag(18, [b"", {}, b"", b""]), "Unsupported or unknown CBOR tag(18)."),
+            (CBORTag(98, [b"", {}, b""]), "Invalid Signature format."),
+            (CBORTag(98, [b"", [], b"", []]), "unprotected header should be dict."),
+            (CBORTag(98, [b"", {}, b"", []]), "Invalid Signature format."),
+            (CBORTag(98, [b"", {}, b"", [[b"", {}]]]), "Invalid Signature format."),
+            (
+                CBORTag(98, [b"", {}, b"", [[b"", [], b""]]]),
+                "unprotected header in signature structure should be dict.",
+            ),
+        ],
+    )
+    def test_cose_decode_with_signers_with_invalid_data(
+        self, ctx, signers_and_public_keys, data, msg
+    ):
+        _, public_keys = signers_and_public_keys
+        with pytest.raises(ValueError) as err:
+            ctx.decode_with_signers(data, public_keys)
+            pytest.fail("decode_with_signers() should fail.")
+        assert msg in str(err.value)
+
+
+class TestCOSEDecodeLimits:
+    """
+    Tests for the decoding limits of COSE.
+    """
+
+    def test_cose_decode_limits(self):
+        ctx = COSE.new(
+            max_signatures=1, max_recipients=2, max_key_trials=3, decode_timeout=0.5
+        )
+        assert ctx.max_signatures == 1
+        assert ctx.max_recipients == 2
+        assert ctx.max_key_trials == 3
+        assert ctx.decode_timeout == 0.5
+        ctx.max_signatures = None
+        ctx.max_recipients = 4
+        ctx.max_key_trials = 5
+        ctx.decode_timeout = 1
+        assert ctx.max_signatures is None
+        assert ctx.max_recipients == 4
+        assert ctx.max_key_trials == 5
+        assert ctx.decode_timeout == 1
+
+    @pytest.mark.parametrize(
+        "params, msg",
+        [
+            ({"max_signatures": "1"}, "max_signatures should be int."),
+            ({"max_signatures": True}, "max_signatures should be int."),
+            ({"max_signatures": 0}, "max_signatures should be positive number."),
+            ({"max_recipients": 1.5}, "max_recipients should be int."),
+            ({"max_recipients": -1}, "max_recipients should be positive number."),
+            ({"max_key_trials": "1"}, "max_key_trials should be int."),
+            ({"max_key_trials": 0}, "max_key_trials should be positive number."),
+            ({"decode_timeout": "1"}, "decode_timeout should be int or float."),
+            ({"decode_timeout": 0}, "decode_timeout should be positive number."),
+        ],
+    )
+    def test_cose_decode_limits_with_invalid_args(self, params, msg):
+        with pytest.raises(ValueError) as err:
+            COSE.new(**params)
+            pytest.fail("COSE() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_decode_with_max_key_trials(self):
+        ctx = COSE.new(alg_auto_inclusion=True, max_key_trials=3)
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        keys = [COSEKey.from_symmetric_key(alg="HS256") for _ in range(3)]
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        assert ctx.decode(encoded, keys[:2] + [key]) == b"Hello world!"
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(encoded, keys + [key])
+            pytest.fail("decode() should fail.")
+        assert "The number of key trials exceeds the limit." in str(err.value)
+
+    def test_cose_decode_with_max_key_trials_for_recipients(self):
+        ctx = COSE.new(alg_auto_inclusion=True, max_key_trials=2)
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        jwk = {
+            "kty": "oct",
+            "alg": "A128KW",
+            "kid": "01",
+            "k": "hJtXIZ2uSN5kbQfbtTNWbg",
+        }
+        r = Recipient.from_jwk(jwk)
+        r.apply(enc_key)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        keys = [
+            COSEKey.from_symmetric_key(alg="A128KW", kid="01") for _ in range(2)
+        ] + [COSEKey.from_jwk(jwk)]
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(encoded, keys)
+            pytest.fail("decode() should fail.")
+        assert "The number of key trials exceeds the limit." in str(err.value)
+        ctx.max_key_trials = 4
+        assert ctx.decode(encoded, keys) == b"Hello world!"
+
+    def test_cose_decode_with_max_signatures(self, signers_and_public_keys):
+        signers, public_keys = signers_and_public_keys
+        ctx = COSE.new(max_signatures=3)
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=signers)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(encoded, public_keys)
+            pytest.fail("decode() should fail.")
+        assert "The number of signatures exceeds the limit." in str(err.value)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode_with_signers(encoded, public_keys)
+            pytest.fail("decode_with_signers() should fail.")
+        assert "The number of signatures exceeds the limit." in str(err.value)
+        ctx.max_signatures = 4
+        assert ctx.decode(encoded, public_keys) == b"Hello world!"
+
+    def test_cose_decode_with_signers_with_max_key_trials(
+        self, signers_and_public_keys
+    ):
+        signers, public_keys = signers_and_public_keys
+        ctx = COSE.new(max_key_trials=1)
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=signers)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode_with_signers(encoded, public_keys, SignaturePolicy.new("all"))
+            pytest.fail("decode_with_signers() should fail.")
+        assert "The number of key trials exceeds the limit." in str(err.value)
+
+    def test_cose_decode_with_max_recipients(self):
+        ctx = COSE.new(alg_auto_inclusion=True, max_recipients=2)
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        rs = []
+        for i in range(3):
+            r = Recipient.from_jwk({"kty": "oct", "alg": "A128KW", "kid": str(i)})
+            r.apply(enc_key)
+            rs.append(r)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=rs)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(encoded, enc_key)
+            pytest.fail("decode() should fail.")
+        assert "The number of recipients exceeds the limit." in str(err.value)
+
+    def test_cose_decode_with_decode_timeout(self):
+        ctx = COSE.new(alg_auto_inclusion=True, decode_timeout=0.01)
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        keys = [COSEKey.from_symmetric_key(alg="HS256") for _ in range(2)]
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        verification_error = keys[0].verification_error
+
+        def slow_verification_error(msg, sig):
+            time.sleep(0.02)
+            return verification_error(msg, sig)
+
+        keys[0].verification_error = slow_verification_error
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(encoded, keys + [key])
+            pytest.fail("decode() should fail.")
+        assert "The decoding deadline has passed." in str(err.value)
+
+    @pytest.mark.parametrize("out", ["", "memoryview"])
+    def test_cose_decode_with_cbor_profile(self, out):
+        ctx = COSE.new(
+            alg_auto_inclusion=True, cbor_profile=CBORProfile.new(max_bytes=64)
+        )
+        assert ctx.cbor_profile.max_bytes == 64
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        assert ctx.decode(encoded, key, out=out) == b"Hello world!"
+        encoded = ctx.encode_and_mac(b"x" * 64, key)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(encoded, key, out=out)
+            pytest.fail("decode() should fail.")
+        assert "The size of CBOR data exceeds the limit." in str(err.value)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.inspect(encoded)
+            pytest.fail("inspect() should fail.")
+        assert "The size of CBOR data exceeds the limit." in str(err.value)
+        ctx.cbor_profile = None
+        assert ctx.decode(encoded, key, out=out) == b"x" * 64
+
+    def test_cose_decode_with_cbor_profile_for_recipients(self):
+        ctx = COSE.new(
+            alg_auto_inclusion=True, cbor_profile=CBORProfile.new(max_items=4)
+        )
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        jwk = {
+            "kty": "oct",
+            "alg": "A128KW",
+            "kid": "01",
+            "k": "hJtXIZ2uSN5kbQfbtTNWbg",
+        }
+        r = Recipient.from_jwk(jwk)
+        r.apply(enc_key)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        data = cbor2.loads(encoded)
+        # A protected header of a recipient with too many items.
+        data.value[3][0][0] = cbor2.dumps({1: -3, 2: 0, 3: 0})
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(data, COSEKey.from_jwk(jwk))
+            pytest.fail("decode() should fail.")
+        assert "The number of CBOR data items exceeds the limit." in str(err.value)
+
+
+class TestCOSEPreValidation:
+    """
+    Tests for the pre-validation of COSE.decode().
+    """
+
+    def test_cose_allowed_tags_and_algs(self):
+        ctx = COSE.new(allowed_tags=[18, 98], allowed_algs=["ES256", -8])
+        assert ctx.allowed_tags == [18, 98]
+        assert ctx.allowed_algs == [-8, -7]
+        ctx.allowed_tags = None
+        ctx.allowed_algs = None
+        assert ctx.allowed_tags is None
+        assert ctx.allowed_algs is None
+
+    @pytest.mark.parametrize(
+        "params, msg",
+        [
+            ({"allowed_tags": 18}, "allowed_tags should be list."),
+            ({"allowed_tags": [18, 61]}, "Unsupported or unknown CBOR tag(61)."),
+            ({"allowed_algs": "ES256"}, "allowed_algs should be list."),
+            ({"allowed_algs": ["ES256", "XX"]}, "Unsupported or unknown alg: XX."),
+            ({"allowed_algs": [-7, 9999]}, "Unsupported or unknown alg: 9999."),
+        ],
+    )
+    def test_cose_allowed_tags_and_algs_with_invalid_args(self, params, msg):
+        with pytest.raises(ValueError) as err:
+            COSE.new(**params)
+            pytest.fail("COSE() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_decode_with_not_allowed_tag(self):
+        ctx = COSE.new(alg_auto_inclusion=True, allowed_tags=[18])
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        with pytest.raises(ValueError) as err:
+            ctx.decode(encoded, key)
+            pytest.fail("decode() should fail.")
+        assert "CBOR tag(17) is not allowed." in str(err.value)
+
+    def test_cose_decode_with_not_allowed_alg(self):
+        ctx = COSE.new(alg_auto_inclusion=True, allowed_algs=["HS384"])
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(encoded, key)
+            pytest.fail("decode() should fail.")
+        assert "alg(5) is not allowed." in str(err.value)
+        ctx.allowed_algs = ["HS256", "HS384"]
+        assert ctx.decode(encoded, key) == b"Hello world!"
+
+    def test_cose_decode_without_alg_with_allowed_algs(self):
+        ctx = COSE.new(allowed_algs=["HS256"])
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(encoded, key)
+            pytest.fail("decode() should fail.")
+        assert "alg should be specified in the protected header." in str(err.value)
+
+    def test_cose_decode_sign_with_not_allowed_alg(self, signers_and_public_keys):
+        signers, public_keys = signers_and_public_keys
+        ctx = COSE.new(allowed_algs=["ES256", "ES384", "ES512"])
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=signers)
+        # The signature with the disallowed alg is skipped.
+        assert ctx.decode(encoded, public_keys) == b"Hello world!"
+        _, passed = ctx.decode_with_signers(
+            encoded, public_keys, SignaturePolicy.new(3)
+        )
+        assert [s.unprotected[4] for s in passed] == [b"01", b"02", b"03"]
+        with pytest.raises(VerifyError) as err:
+            ctx.decode_with_signers(encoded, public_keys, SignaturePolicy.new("all"))
+            pytest.fail("decode_with_signers() should fail.")
+        assert isinstance(err.value.__cause__, VerifyError)
+        assert "alg(-8) is not allowed." in str(err.value.__cause__)
+        encoded = ctx.encode_and_sign(b"Hello world!", signers=signers[3:])
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(encoded, public_keys)
+            pytest.fail("decode() should fail.")
+        assert "alg(-8) is not allowed." in str(err.value)
+
+    def test_cose_decode_sign_with_invalid_signature_length(
+        self, signers_and_public_keys
+    ):
+        signers, public_keys = signers_and_public_keys
+        ctx = COSE.new()
+        encoded = ctx.encode_and_sign(
+            b"Hello world!", signers=signers[:2], out="cbor2/CBORTag"
+        )
+        sig = encoded.value[3][0]
+        encoded.value[3][0] = [sig[0], sig[1], sig[2][:10]]
+        # The malformed signature is skipped in favor of the other signature.
+        assert ctx.decode(encoded, public_keys) == b"Hello world!"
+        encoded.value[3] = encoded.value[3][:1]
+        with pytest.raises(DecodeError) as err:
+            ctx.decode(encoded, public_keys)
+            pytest.fail("decode() should fail.")
+        assert "Invalid signature length." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "alg, length",
+        [
+            ("ES256", 63),
+            ("HS256", 16),
+        ],
+    )
+    def test_cose_decode_with_invalid_signature_length(self, alg, length):
+        ctx = COSE.new(alg_auto_inclusion=True)
+        if alg == "HS256":
+            key = COSEKey.from_symmetric_key(alg=alg)
+            encoded = ctx.encode_and_mac(b"Hello world!", key, out="cbor2/CBORTag")
+        else:
+            with open(key_path("private_key_es256.pem")) as key_file:
+                key = COSEKey.from_pem(key_file.read(), alg=alg)
+            encoded = ctx.encode_and_sign(b"Hello world!", key, out="cbor2/CBORTag")
+        encoded.value[3] = encoded.value[3][:length]
+        tried = []
+        key.verification_error = lambda msg, sig: tried.append(msg)
+        with pytest.raises(DecodeError) as err:
+            ctx.decode(encoded, key)
+            pytest.fail("decode() should fail.")
+        assert "Invalid signature length." in str(err.value)
+        assert tried == []
+
+    @pytest.mark.parametrize("typ", [bytes, bytearray, memoryview])
+    def test_cose_check_signature_and_nonce_with_bytes_like(self, typ):
+        with pytest.raises(DecodeError) as err:
+            COSE._check_signature(-7, typ(b"x" * 63))
+            pytest.fail("_check_signature() should fail.")
+        assert "Invalid signature length." in str(err.value)
+        with pytest.raises(DecodeError) as err:
+            COSE._check_nonce(1, typ(b"x" * 13))
+            pytest.fail("_check_nonce() should fail.")
+        assert "The length of nonce should be 12 bytes." in str(err.value)
+
+    def test_cose_decode_with_invalid_nonce_length(self):
+        ctx = COSE.new(alg_auto_inclusion=True)
+        key = COSEKey.from_symmetric_key(alg="A128GCM")
+        encoded = ctx.encode_and_encrypt(
+            b"Hello world!", key, nonce=token_bytes(12), out="cbor2/CBORTag"
+        )
+        encoded.value[1][5] = token_bytes(13)
+        with pytest.raises(DecodeError) as err:
+            ctx.decode(encoded, key)
+            pytest.fail("decode() should fail.")
+        assert "The length of nonce should be 12 bytes." in str(err.value)
+
+
+class TestCOSEFailedCache:
+    """
+    Tests for the cache of the failed COSE messages.
+    """
+
+    @pytest.mark.parametrize(
+        "params, msg",
+        [
+            ({"failed_cache_size": "1"}, "failed_cache_size should be int."),
+            (
+                {"failed_cache_size": -1},
+                "failed_cache_size should not be negative number.",
+            ),
+            ({"failed_cache_ttl": "1"}, "failed_cache_ttl should be int."),
+            ({"failed_cache_ttl": 0}, "failed_cache_ttl should be positive number."),
+        ],
+    )
+    def test_cose_failed_cache_with_invalid_args(self, params, msg):
+        with pytest.raises(ValueError) as err:
+            COSE.new(**params)
+            pytest.fail("COSE() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_decode_with_failed_cache(self):
+        ctx = COSE.new(alg_auto_inclusion=True, failed_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        keys = [COSEKey.from_symmetric_key(alg="HS256") for _ in range(2)]
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        verified = []
+
+        def counting_verification_error(k):
+            verification_error = k.verification_error
+
+            def f(msg, sig):
+                verified.append(msg)
+                return verification_error(msg, sig)
+
+            return f
+
+        for k in keys:
+            k.verification_error = counting_verification_error(k)
+        for _ in range(3):
+            with pytest.raises(VerifyError) as err:
+                ctx.decode(encoded, keys)
+                pytest.fail("decode() should fail.")
+            assert "Failed to compare digest." in str(err.value)
+        # Two trials on the first decoding only.
+        assert len(verified) == 2
+        # Other external_aad and other key sets are not regarded as the same.
+        with pytest.raises(VerifyError):
+            ctx.decode(encoded, keys, external_aad=b"xxx")
+        assert len(verified) == 4
+        assert ctx.decode(encoded, keys + [key]) == b"Hello world!"
+
+    def test_cose_decode_with_failed_cache_does_not_hold_keys(self):
+        ctx = COSE.new(alg_auto_inclusion=True, failed_cache_size=10)
+        encoded = ctx.encode_and_mac(
+            b"Hello world!", COSEKey.from_symmetric_key(alg="HS256")
+        )
+        keys = [COSEKey.from_symmetric_key(alg="HS256") for _ in range(100)]
+        ref = weakref.ref(keys[0])
+        with pytest.raises(VerifyError):
+            ctx.decode(encoded, keys)
+        # The same keys in another list are regarded as the same key set, so
+        # that no key is tried again.
+        keys[0].verification_error = None
+        with pytest.raises(VerifyError):
+            ctx.decode(encoded, list(keys))
+        ck = list(ctx._failed_cache._entries)[0]
+        assert ck[2] == (ck[2][0],)
+        assert len(ck[2][0]) == 32
+        del keys
+        gc.collect()
+        assert ref() is None
+
+    def test_cose_decode_with_failed_cache_and_key_ring(self):
+        ctx = COSE.new(alg_auto_inclusion=True, failed_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        ring = COSEKeyRing.new([COSEKey.from_symmetric_key(alg="HS256")])
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        for _ in range(2):
+            with pytest.raises(VerifyError) as err:
+                ctx.decode(encoded, ring)
+                pytest.fail("decode() should fail.")
+            assert "Failed to compare digest." in str(err.value)
+        # The cache is invalidated when the key ring is changed.
+        ring.add(key)
+        assert ctx.decode(encoded, ring) == b"Hello world!"
+
+    def test_cose_decode_with_failed_cache_and_decode_limit(self):
+        ctx = COSE.new(alg_auto_inclusion=True, failed_cache_size=10, max_key_trials=1)
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        keys = [COSEKey.from_symmetric_key(alg="HS256"), key]
+        encoded = ctx.encode_and_mac(b"Hello world!", key)
+        with pytest.raises(DecodeLimitError):
+            ctx.decode(encoded, keys)
+        ctx.max_key_trials = None
+        assert ctx.decode(encoded, keys) == b"Hello world!"
+
+
+class TestCOSECEKCache:
+    """
+    Tests for the cache of the unwrapped content keys.
+    """
+
+    @pytest.mark.parametrize(
+        "params, msg",
+        [
+            ({"cek_cache_size": "1"}, "cek_cache_size should be int."),
+            ({"cek_cache_size": -1}, "cek_cache_size should not be negative number."),
+            ({"cek_cache_ttl": "1"}, "cek_cache_ttl should be int."),
+            ({"cek_cache_ttl": 0}, "cek_cache_ttl should be positive number."),
+            ({"cek_cache_lifetime": 1}, "cek_cache_lifetime should be callable."),
+        ],
+    )
+    def test_cose_cek_cache_with_invalid_args(self, params, msg):
+        with pytest.raises(ValueError) as err:
+            COSE.new(**params)
+            pytest.fail("COSE() should fail.")
+        assert msg in str(err.value)
+
+    def test_cose_decode_with_cek_cache_and_aes_key_wrap(self):
+        ctx = COSE.new(alg_auto_inclusion=True, cek_cache_size=10)
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        jwk = {
+            "kty": "oct",
+            "alg": "A128KW",
+            "kid": "01",
+            "k": "hJtXIZ2uSN5kbQfbtTNWbg",
+        }
+        r = Recipient.from_jwk(jwk)
+        r.apply(enc_key)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        other_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        other_r = Recipient.from_jwk(jwk)
+        other_r.apply(other_key)
+        other = ctx.encode_and_encrypt(b"Hello world!", other_key, recipients=[other_r])
+        key = COSEKey.from_jwk(jwk)
+        unwrapped = []
+        unwrap_key = key.unwrap_key
+
+        def counting_unwrap_key(wrapped):
+            unwrapped.append(wrapped)
+            return unwrap_key(wrapped)
+
+        key.unwrap_key = counting_unwrap_key
+        for _ in range(3):
+            assert ctx.decode(encoded, key) == b"Hello world!"
+        assert len(unwrapped) == 1
+        # Other wrapped keys are unwrapped.
+        assert ctx.decode(other, key) == b"Hello world!"
+        assert len(unwrapped) == 2
+        # Other keys are not regarded as the same key.
+        with pytest.raises(DecodeError):
+            ctx.decode(encoded, COSEKey.from_symmetric_key(alg="A128KW", kid="01"))
+
+    @pytest.mark.parametrize(
+        "lifetime, expected",
+        [
+            (None, 1),
+            (10, 1),
+            (0, 3),
+            (-1, 3),
+        ],
+    )
+    def test_cose_decode_with_cek_cache_lifetime(self, lifetime, expected):
+        called = []
+
+        def cek_cache_lifetime(key, recipient):
+            called.append((key, recipient.kid))
+            return lifetime
+
+        ctx = COSE.new(
+            alg_auto_inclusion=True,
+            cek_cache_size=10,
+            cek_cache_lifetime=cek_cache_lifetime,
+        )
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        jwk = {
+            "kty": "oct",
+            "alg": "A128KW",
+            "kid": "01",
+            "k": "hJtXIZ2uSN5kbQfbtTNWbg",
+        }
+        r = Recipient.from_jwk(jwk)
+        r.apply(enc_key)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        key = COSEKey.from_jwk(jwk)
+        unwrapped = []
+        unwrap_key = key.unwrap_key
+
+        def counting_unwrap_key(wrapped):
+            unwrapped.append(wrapped)
+            return unwrap_key(wrapped)
+
+        key.unwrap_key = counting_unwrap_key
+        for _ in range(3):
+            assert ctx.decode(encoded, key) == b"Hello world!"
+        assert len(unwrapped) == expected
+        assert called[0] == (key, b"01")
+
+    def test_cose_decode_with_cek_cache_lifetime_limited_by_ttl(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        ctx = COSE.new(
+            alg_auto_inclusion=True,
+            cek_cache_size=10,
+            cek_cache_ttl=60,
+            cek_cache_lifetime=lambda key, recipient: 3600,
+        )
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        jwk = {
+            "kty": "oct",
+            "alg": "A128KW",
+            "kid": "01",
+            "k": "hJtXIZ2uSN5kbQfbtTNWbg",
+        }
+        r = Recipient.from_jwk(jwk)
+        r.apply(enc_key)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        key = COSEKey.from_jwk(jwk)
+        unwrapped = []
+        unwrap_key = key.unwrap_key
+
+        def counting_unwrap_key(wrapped):
+            unwrapped.append(wrapped)
+            return unwrap_key(wrapped)
+
+        key.unwrap_key = counting_unwrap_key
+        assert ctx.decode(encoded, key) == b"Hello world!"
+        now[0] += 59
+        assert ctx.decode(encoded, key) == b"Hello world!"
+        assert len(unwrapped) == 1
+        now[0] += 2
+        assert ctx.decode(encoded, key) == b"Hello world!"
+        assert len(unwrapped) == 2
+
+    def test_cose_decode_with_cek_cache_and_ecdh_aes_key_wrap(self):
+        jwk = {
+            "kty": "EC",
+            "crv": "P-256",
+            "kid": "meriadoc.brandybuck@buckland.example",
+            "x": "Ze2loSV3wrroKUN_4zhwGhCqo3Xhu1td4QjeQ5wIVR0",
+            "y": "HlLtdXARY_f55A3fnzQbPcm6hgr34Mp8p-nuzQCE0Zw",
+        }
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        r = Recipient.from_jwk({"kty": "EC", "crv": "P-256", "alg": "ECDH-ES+A128KW"})
+        r.apply(
+            enc_key, recipient_key=COSEKey.from_jwk(jwk), context={"alg": "A128GCM"}
+        )
+        ctx = COSE.new(alg_auto_inclusion=True, cek_cache_size=10)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        private_key = COSEKey.from_jwk(
+            dict(
+                jwk,
+                alg="ECDH-ES+A128KW",
+                d="r_kHyZ-a06rmxM3yESK84r1otSg-aQcVStkRhA-iCM8",
+            )
+        )
+        derived = []
+        derive_key = private_key.derive_key
+
+        def counting_derive_key(*args, **kwargs):
+            derived.append(args)
+            return derive_key(*args, **kwargs)
+
+        private_key.derive_key = counting_derive_key
+        for _ in range(3):
+            res = ctx.decode(encoded, private_key, context={"alg": "A128GCM"})
+            assert res == b"Hello world!"
+        assert len(derived) == 1
+        # Other contexts are not regarded as the same.
+        with pytest.raises(DecodeError):
+            ctx.decode(encoded, private_key, context={"alg": "A256GCM"})
+        assert len(derived) == 2
+
+    def test_cose_decode_with_cek_cache_and_direct_hkdf(self, monkeypatch):
+        shared_key = COSEKey.from_symmetric_key(token_bytes(32), kid="01")
+        r = Recipient.from_jwk({"kty": "oct", "alg": "direct+HKDF-SHA-256"})
+        context = {"alg": "A128GCM", "apu": {"id": "sender-01"}}
+        enc_key = r.apply(shared_key, context=context)
+        ctx = COSE.new(alg_auto_inclusion=True, cek_cache_size=10)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        derived = []
+        extract = DirectHKDF.extract
+
+        def counting_extract(self, key, alg=None, context=None):
+            derived.append(key)
+            return extract(self, key, alg, context)
+
+        monkeypatch.setattr(DirectHKDF, "extract", counting_extract)
+        assert ctx.decode(encoded, shared_key, context=context) == b"Hello world!"
+        # The equivalent contexts are regarded as the same.
+        context = {"apu": {"id": "sender-01"}, "alg": "A128GCM"}
+        assert ctx.decode(encoded, shared_key, context=context) == b"Hello world!"
+        assert len(derived) == 1
+        # Other salts are not regarded as the same.
+        r = Recipient.from_jwk({"kty": "oct", "alg": "direct+HKDF-SHA-256"})
+        enc_key = r.apply(shared_key, context=context)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[r])
+        assert ctx.decode(encoded, shared_key, context=context) == b"Hello world!"
+        assert len(derived) == 2
+
+    def test_cose_decode_with_cek_cache_and_ecdh_ss_hkdf(self):
+        rec = Recipient.from_jwk(
+            {
+                "kty": "EC",
+                "alg": "ECDH-SS+HKDF-256",
+                "d": "kwibx3gas6Kz1V2fyQHKSnr-ybflddSjN0eOnbmLmyo",
+                "crv": "P-256",
+                "kid": "01",
+                "x": "-eZXC6nV-xgthy8zZMCN8pcYSeE2XfWWqckA2fsxHPc",
+                "y": "BGU5soLgsu_y7GN2I3EPUXS9EZ7Sw0qif-V70JtInFI",
+            }
+        )
+        with open(key_path("public_key_es256.pem")) as key_file:
+            pub_key = COSEKey.from_pem(key_file.read(), kid="01")
+        enc_key = rec.apply(
+            recipient_key=pub_key, salt=token_bytes(32), context={"alg": "A128GCM"}
+        )
+        ctx = COSE.new(alg_auto_inclusion=True, cek_cache_size=10)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=[rec])
+        with open(key_path("private_key_es256.pem")) as key_file:
+            priv_key = COSEKey.from_pem(
+                key_file.read(), kid="01", alg="ECDH-SS+HKDF-256"
+            )
+        derived = []
+        derive_key = priv_key.derive_key
+
+        def counting_derive_key(*args, **kwargs):
+            derived.append(args)
+            return derive_key(*args, **kwargs)
+
+        priv_key.derive_key = counting_derive_key
+        for _ in range(3):
+            res = ctx.decode(encoded, priv_key, context={"alg": "A128GCM"})
+            assert res == b"Hello world!"
+        assert len(derived) == 1
+
+    def test_cose_cek_cache_zeroizes_expired_entries(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        cache = Recipients.new_cache(10)
+        jwk = {
+            "kty": "oct",
+            "alg": "A128KW",
+            "kid": "01",
+            "k": "hJtXIZ2uSN5kbQfbtTNWbg",
+        }
+        key = COSEKey.from_jwk(jwk)
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        r = Recipient.from_jwk(jwk)
+        r.apply(enc_key)
+        Recipients([r]).extract([key], alg=1, cache=cache, cache_ttl=10)
+        entry = list(cache._entries.values())[0][0]
+        now[0] += 5
+        other_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        other = Recipient.from_jwk(jwk)
+        other.apply(other_key)
+        Recipients([other]).extract([key], alg=1, cache=cache, cache_ttl=60)
+        assert entry._material is not None
+        # The expired entry is zeroized without being looked up again.
+        now[0] += 6
+        res = Recipients([other]).extract([key], alg=1, cache=cache, cache_ttl=60)
+        assert res.key == other_key.key
+        assert entry._material is None
+        assert len(cache) == 1
+
+    def test_cose_cek_cache_zeroizes_evicted_entries(self):
+        cache = Recipients.new_cache(1)
+        jwk = {
+            "kty": "oct",
+            "alg": "A128KW",
+            "kid": "01",
+            "k": "hJtXIZ2uSN5kbQfbtTNWbg",
+        }
+        key = COSEKey.from_jwk(jwk)
+        entries = []
+        for _ in range(2):
+            enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+            r = Recipient.from_jwk(jwk)
+            r.apply(enc_key)
+            rs = Recipients([r])
+            assert rs.extract([key], alg=1, cache=cache).key == enc_key.key
+            assert len(cache) == 1
+            entries.append(list(cache._entries.values())[0][0])
+            assert entries[-1].to_key().key == enc_key.key
+        assert entries[0]._material is None
+        assert entries[0].to_key() is None
+        assert entries[1]._material is not None
@@ -8,10 +8,11 @@ Tests for COSEKey.
 """
 import json
 
+import cbor2
 import pytest
 
 import cwt
-from cwt import Claims, COSEKey
+from cwt import CBORProfile, Claims, COSEKey, DecodeLimitError
 from cwt.cose_key_interface import COSEKeyInterface
 
 from .utils import key_path
@@ -641,3 +642,13 @@ class TestCOSEKey:
             COSEKey.from_jwk(invalid)
             pytest.fail("from_jwk should fail.")
         assert msg in str(err.value)
+
+    def test_key_builder_from_bytes_with_cbor_profile(self):
+        key = COSEKey.from_symmetric_key(alg="HS256")
+        data = cbor2.dumps(key.to_dict())
+        profile = CBORProfile.new(max_bytes=len(data))
+        assert COSEKey.from_bytes(data, cbor_profile=profile).key == key.key
+        with pytest.raises(DecodeLimitError) as err:
+            COSEKey.from_bytes(data, cbor_profile=CBORProfile.new(max_bstr_length=16))
+            pytest.fail("from_bytes() should fail.")
+        assert "The length of byte string exceeds the limit." in str(err.value)
@@ -0,0 +1,208 @@
+"""
+Tests for COSEKeyRing.
+"""
+import pytest
+
+import cwt
+from cwt import COSE, COSEKey, COSEKeyRing, VerifyError
+from cwt.cose_key_ring import _KeyList
+
+from .utils import key_path
+
+
+@pytest.fixture(scope="session", autouse=True)
+def ctx():
+    return COSE.new(alg_auto_inclusion=True, kid_auto_inclusion=True)
+
+
+class TestCOSEKeyRing:
+    """
+    Tests for COSEKeyRing.
+    """
+
+    def test_cose_key_ring_constructor(self):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        k2 = COSEKey.from_symmetric_key(alg="A128GCM", kid="02")
+        ring = COSEKeyRing.new([k1, k2])
+        assert isinstance(ring, COSEKeyRing)
+        assert len(ring) == 2
+        assert ring.keys == [k1, k2]
+        assert list(ring) == [k1, k2]
+        assert ring.get(b"01") == [k1]
+        assert ring.get(b"03") == []
+
+    def test_cose_key_ring_constructor_with_invalid_key(self):
+        with pytest.raises(ValueError) as err:
+            COSEKeyRing.new([b"01"])
+            pytest.fail("COSEKeyRing.new() should fail.")
+        assert "key in keys should have COSEKeyInterface." in str(err.value)
+
+    def test_cose_key_ring_add_and_remove(self):
+        ring = COSEKeyRing.new()
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        ring.add(k1)
+        v = ring.version
+        assert ring.candidates(10, b"01") == (k1,)
+        ring.remove(k1)
+        assert ring.version == v + 1
+        assert len(ring) == 0
+        assert ring.candidates(10, b"01") == ()
+
+    def test_cose_key_ring_remove_with_unknown_key(self):
+        ring = COSEKeyRing.new()
+        with pytest.raises(ValueError) as err:
+            ring.remove(COSEKey.from_symmetric_key(alg="HS256", kid="01"))
+            pytest.fail("remove() should fail.")
+        assert "key is not found." in str(err.value)
+
+    def test_cose_key_ring_candidates(self):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        k2 = COSEKey.from_symmetric_key(alg="HS384", kid="01")
+        k3 = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        ring = COSEKeyRing.new([k1, k2, k3])
+        assert ring.candidates(10, b"01") == (k1, k2)
+        assert ring.candidates(10, b"01", 6) == (k2,)
+        assert ring.candidates(4, b"01") == (k3,)
+        assert ring.candidates(4) == (k3,)
+        assert ring.candidates(10, b"02") == ()
+        # Same object is returned for the same condition.
+        assert ring.candidates(10, b"01", 5) is ring.candidates(10, b"01", 5)
+
+    def test_cose_key_ring_candidates_with_alg_and_kty(self):
+        k1 = COSEKey.from_symmetric_key(alg="HS256")
+        with open(key_path("public_key_es256.pem")) as key_file:
+            k2 = COSEKey.from_pem(key_file.read(), alg="ES256")
+        with open(key_path("public_key_ed25519.pem")) as key_file:
+            k3 = COSEKey.from_pem(key_file.read())
+        with open(key_path("public_key_rsa.pem")) as key_file:
+            k4 = COSEKey.from_pem(key_file.read(), alg="PS256")
+        # An EC2 key without alg.
+        k5 = COSEKey.from_jwk(
+            {
+                "kty": "EC",
+                "crv": "P-256",
+                "x": "usWxHK2PmfnHKwXPS54m0kTcGJ90UiglWiGahtagnv8",
+                "y": "IBOL-C3BttVivg-lSreASjpkttcsz-1rb7btKLv8EX4",
+            }
+        )
+        ring = COSEKeyRing.new([k1, k2, k3, k4, k5])
+        assert ring.candidates(2, alg=-7) == (k2, k5)
+        assert ring.candidates(2, alg=-8) == (k3,)
+        assert ring.candidates(2, alg=-37) == (k4,)
+        assert ring.candidates(2, alg=-35) == (k5,)
+        assert ring.candidates(10, alg=5) == (k1,)
+        assert ring.candidates(10, alg=6) == ()
+        # Unknown algs match only the keys without alg.
+        assert ring.candidates(2, alg=-999) == (k3, k5)
+        ring.remove(k5)
+        assert ring.candidates(2, alg=-7) == (k2,)
+        assert ring.candidates(2, alg=-35) == ()
+
+    def test_cose_key_ring_candidates_after_add_and_remove(self):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        k2 = COSEKey.from_symmetric_key(alg="HS384", kid="02")
+        ring = COSEKeyRing.new([k1, k2])
+        c1 = ring.candidates(10, b"01", 5)
+        c2 = ring.candidates(10, b"", 6)
+        assert c1 == (k1,)
+        assert c2 == (k2,)
+        k3 = COSEKey.from_symmetric_key(alg="HS256", kid="03")
+        ring.add(k3)
+        # The candidates which the new key cannot be one of are kept.
+        assert ring.candidates(10, b"01", 5) is c1
+        assert ring.candidates(10, b"", 6) is c2
+        assert ring.candidates(10, b"", 5) == (k1, k3)
+        assert ring.candidates(10, b"03", 5) == (k3,)
+        k4 = COSEKey.from_symmetric_key(alg="HS384", kid="01")
+        ring.add(k4)
+        assert ring.candidates(10, b"01") == (k1, k4)
+        assert ring.candidates(10, b"", 6) == (k2, k4)
+        ring.remove(k1)
+        assert ring.candidates(10, b"01", 5) == (k4,)
+        assert ring.candidates(10, b"", 5) == (k3,)
+        # A key with a new key operation affects the candidates for it.
+        k5 = COSEKey.from_symmetric_key(alg="A128GCM", kid="05")
+        assert ring.candidates(4) == (k2, k3, k4)
+        ring.add(k5)
+        assert ring.candidates(4) == (k5,)
+        ring.remove(k5)
+        assert ring.candidates(4) == (k2, k3, k4)
+
+    def test_cose_key_ring_candidates_with_kid_and_mismatched_alg(self):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        k2 = COSEKey.from_symmetric_key(alg="HS384", kid="02")
+        ring = COSEKeyRing.new([k1, k2])
+        # The key bound to the kid is used to report the verification failure.
+        assert ring.candidates(10, b"01", 6) == (k1,)
+        assert ring.candidates(10, b"", 6) == (k2,)
+        assert ring.candidates(10, b"", 7) == ()
+
+    def test_cose_key_ring_candidates_of_key_list(self):
+        with open(key_path("public_key_es256.pem")) as key_file:
+            k1 = COSEKey.from_pem(key_file.read(), alg="ES256", kid="01")
+        keys = [
+            k1,
+            COSEKey.from_symmetric_key(alg="HS256", kid="01"),
+            COSEKey.from_symmetric_key(alg="HS384", kid="02"),
+            COSEKey.from_symmetric_key(alg="A128GCM", kid="02"),
+            COSEKey.from_symmetric_key(alg="HS256"),
+        ]
+        ring = COSEKeyRing.new(keys)
+        assert ring.version == 1
+        # The keys given as a list are filtered in the same manner.
+        key_list = _KeyList(keys)
+        for op in [2, 4, 10]:
+            for kid in [b"", b"01", b"02", b"03"]:
+                for alg in [0, -7, 1, 5, 6, -999]:
+                    expected = ring.candidates(op, kid, alg)
+                    assert key_list.candidates(op, kid, alg) == expected
+
+    def test_cose_key_ring_candidates_without_matched_key_ops(self):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        ring = COSEKeyRing.new([k1])
+        assert ring.candidates(2, b"01") == (k1,)
+
+    def test_cose_key_ring_decode(self, ctx):
+        keys = [COSEKey.from_symmetric_key(alg="HS256", kid=str(i)) for i in range(100)]
+        ring = COSEKeyRing.new(keys)
+        for k in keys[::10]:
+            encoded = ctx.encode_and_mac(b"Hello world!", k)
+            assert b"Hello world!" == ctx.decode(encoded, ring)
+
+    def test_cose_key_ring_decode_with_invalid_key(self, ctx):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        k2 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        encoded = ctx.encode_and_mac(b"Hello world!", k1)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(encoded, COSEKeyRing.new([k2]))
+            pytest.fail("decode() should fail.")
+        assert "Failed to compare digest." in str(err.value)
+
+    def test_cose_key_ring_decode_with_unknown_kid(self, ctx):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        k2 = COSEKey.from_symmetric_key(alg="HS256", kid="02")
+        encoded = ctx.encode_and_mac(b"Hello world!", k1)
+        with pytest.raises(ValueError) as err:
+            ctx.decode(encoded, COSEKeyRing.new([k2]))
+            pytest.fail("decode() should fail.")
+        assert "key is not found." in str(err.value)
+
+    def test_cose_key_ring_decode_after_add(self, ctx):
+        k1 = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        ring = COSEKeyRing.new()
+        encoded = ctx.encode_and_mac(b"Hello world!", k1)
+        with pytest.raises(ValueError):
+            ctx.decode(encoded, ring)
+        ring.add(k1)
+        assert b"Hello world!" == ctx.decode(encoded, ring)
+
+    def test_cose_key_ring_cwt_decode(self):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), kid="01")
+        with open(key_path("public_key_es256.pem")) as key_file:
+            public_key = COSEKey.from_pem(key_file.read(), kid="01")
+        with open(key_path("public_key_ed25519.pem")) as key_file:
+            other_key = COSEKey.from_pem(key_file.read(), kid="02")
+        token = cwt.encode({"iss": "coaps://as.example"}, private_key)
+        decoded = cwt.decode(token, COSEKeyRing.new([other_key, public_key]))
+        assert decoded[1] == "coaps://as.example"
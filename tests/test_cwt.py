@@ -6,13 +6,24 @@
 """
 Tests for CWT.
 """
+import io
+import mmap
 from secrets import token_bytes
 
 import cbor2
 import pytest
 from cbor2 import CBORTag
 
-from cwt import CWT, Claims, COSEKey, DecodeError, VerifyError
+from cwt import (
+    CWT,
+    CBORProfile,
+    Claims,
+    COSEKey,
+    COSEKeyRing,
+    DecodeError,
+    DecodeLimitError,
+    VerifyError,
+)
 from cwt.cose_key_interface import COSEKeyInterface
 from cwt.recipient_interface import RecipientInterface
 from cwt.signer import Signer
@@ -74,6 +85,23 @@ class TestCWT:
             pytest.fail("CWT.new() should fail.")
         assert "should be" in str(err.value)
 
+    def test_cwt_constructor_with_verified_cache_size(self):
+        c = CWT.new(verified_cache_size=100)
+        assert c.verified_cache_size == 100
+
+    @pytest.mark.parametrize(
+        "invalid, msg",
+        [
+            ("100", "verified_cache_size should be int."),
+            (-1, "verified_cache_size should not be negative number."),
+        ],
+    )
+    def test_cwt_constructor_with_invalid_verified_cache_size(self, invalid, msg):
+        with pytest.raises(ValueError) as err:
+            CWT.new(verified_cache_size=invalid)
+            pytest.fail("CWT.new() should fail.")
+        assert msg in str(err.value)
+
     def test_cwt_expires_in(self):
         ctx = CWT.new()
         ctx.expires_in = 7600
@@ -606,6 +634,383 @@ class TestCWT:
             pytest.fail("decode should fail.")
         assert "Unsupported or unknown CBOR tag(62)." in str(err.value)
 
+    def test_cwt_decode_batch(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        expired = ctx.encode({1: "coaps://as.example", 4: now() - 100}, key)
+        res = ctx.decode_batch([token, b"invalid", expired, token], key, max_workers=2)
+        assert len(res) == 4
+        assert res[0][1] == "coaps://as.example"
+        assert isinstance(res[1], DecodeError)
+        assert isinstance(res[2], VerifyError)
+        assert "The token has expired." in str(res[2])
+        assert res[3][1] == "coaps://as.example"
+
+    def test_cwt_decode_batch_with_no_verify(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        expired = ctx.encode({1: "coaps://as.example", 4: now() - 100}, key)
+        res = ctx.decode_batch([expired], [key], no_verify=True)
+        assert res[0][1] == "coaps://as.example"
+
+    def test_cwt_decode_stream(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        sink = io.BytesIO()
+        claims = ({"iss": "coaps://as.example", "sub": str(i)} for i in range(5))
+        assert ctx.encode_stream(claims, key, sink) == 5
+        res = list(ctx.decode_stream(sink.getvalue(), key))
+        assert [c[2] for c in res] == ["0", "1", "2", "3", "4"]
+        sink.seek(0)
+        res = list(ctx.decode_stream(sink, [key], max_workers=2, prefetch=2))
+        assert [c[2] for c in res] == ["0", "1", "2", "3", "4"]
+
+    def test_cwt_decode_stream_with_mmap(self, ctx, tmp_path):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        path = tmp_path / "cwts.cbor"
+        with open(path, "wb") as f:
+            claims = [{"iss": "coaps://as.example"}] * 3
+            assert ctx.encode_stream(claims, key, f, tagged=True, max_workers=2) == 3
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                res = list(ctx.decode_stream(m, key, max_workers=2))
+        assert len(res) == 3
+        assert all(c[1] == "coaps://as.example" for c in res)
+
+    @pytest.mark.parametrize("max_workers", [None, 2])
+    def test_cwt_decode_stream_with_mmap_and_invalid_key(
+        self, ctx, tmp_path, max_workers
+    ):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        other = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        path = tmp_path / "cwts.cbor"
+        with open(path, "wb") as f:
+            claims = [{"iss": "coaps://as.example"}] * 3
+            assert ctx.encode_stream(claims, key, f) == 3
+        with open(path, "rb") as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            res = list(ctx.decode_stream(m, other, max_workers=max_workers))
+            # The failed items do not keep the mmap from being closed.
+            m.close()
+        assert len(res) == 3
+        assert all(isinstance(err, VerifyError) for err in res)
+
+    def test_cwt_encode_stream_with_encryption_key(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        sink = io.BytesIO()
+        assert ctx.encode_stream([{"iss": "a"}, {"iss": "b"}], key, sink) == 2
+        sink.seek(0)
+        assert [c[1] for c in ctx.decode_stream(sink, key)] == ["a", "b"]
+
+    def test_cwt_decode_stream_with_invalid_tokens(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        expired = ctx.encode({1: "coaps://as.example", 4: now() - 100}, key)
+        data = token + cbor2.dumps(b"invalid") + expired
+        for source in [data, io.BytesIO(data)]:
+            res = list(ctx.decode_stream(source, key))
+            assert len(res) == 3
+            assert res[0][1] == "coaps://as.example"
+            assert isinstance(res[1], DecodeError)
+            assert isinstance(res[2], VerifyError)
+            assert "The token has expired." in str(res[2])
+
+    @pytest.mark.parametrize("source", [bytes, io.BytesIO])
+    def test_cwt_decode_stream_with_truncated_data(self, ctx, source):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        res = ctx.decode_stream(source(token + token[:-1]), key)
+        assert next(res)[1] == "coaps://as.example"
+        with pytest.raises(DecodeError) as err:
+            next(res)
+            pytest.fail("decode_stream() should fail.")
+        assert "Failed to decode." in str(err.value)
+
+    def test_cwt_decode_stream_with_cbor_profile(self):
+        ctx = CWT.new(cbor_profile=CBORProfile.new(max_bytes=128))
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        large = ctx.encode({"iss": "coaps://as.example", "sub": "x" * 64}, key)
+        res = ctx.decode_stream(io.BytesIO(token + large), key)
+        assert next(res)[1] == "coaps://as.example"
+        with pytest.raises(DecodeLimitError) as err:
+            next(res)
+            pytest.fail("decode_stream() should fail.")
+        assert "The size of CBOR data exceeds the limit." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "prefetch, msg",
+        [
+            ("64", "prefetch should be int."),
+            (0, "prefetch should be positive number."),
+        ],
+    )
+    def test_cwt_stream_with_invalid_prefetch(self, ctx, prefetch, msg):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        with pytest.raises(ValueError) as err:
+            ctx.decode_stream(b"", key, prefetch=prefetch)
+            pytest.fail("decode_stream() should fail.")
+        assert msg in str(err.value)
+        with pytest.raises(ValueError) as err:
+            ctx.encode_stream([], key, io.BytesIO(), prefetch=prefetch)
+            pytest.fail("encode_stream() should fail.")
+        assert msg in str(err.value)
+
+    def test_cwt_decode_with_verified_cache(self):
+        ctx = CWT.new(verified_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        verified = []
+        verification_error = key.verification_error
+
+        def counting_verification_error(msg, sig):
+            verified.append(msg)
+            return verification_error(msg, sig)
+
+        key.verification_error = counting_verification_error
+        decoded = ctx.decode(token, key)
+        decoded[1] = "modified"
+        assert ctx.decode(token, key)[1] == "coaps://as.example"
+        assert len(verified) == 1
+        # Other keys are not regarded as the same key set.
+        other = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        with pytest.raises(VerifyError):
+            ctx.decode(token, other)
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"verified_cache_size": 10},
+            {"failed_cache_size": 10},
+        ],
+    )
+    @pytest.mark.parametrize("data", ["abc", 123, None, [1]])
+    def test_cwt_decode_with_invalid_data_type(self, params, data):
+        ctx = CWT.new(**params)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        with pytest.raises(DecodeError) as err:
+            ctx.decode(data, key)
+            pytest.fail("decode() should fail.")
+        assert "Failed to decode." in str(err.value)
+
+    def test_cwt_decode_with_verified_cache_and_nested_claims(self):
+        ctx = CWT.new(verified_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode(
+            {1: "coaps://as.example", 8: {3: b"01"}, -70000: [1, 2]}, key
+        )
+        decoded = ctx.decode(token, key)
+        decoded[8][3] = b"evil"
+        decoded[-70000].append(3)
+        decoded = ctx.decode(token, key)
+        decoded[8][3] = b"evil"
+        decoded[-70000].append(3)
+        decoded = ctx.decode(token, key)
+        assert decoded[8] == {3: b"01"}
+        assert decoded[-70000] == [1, 2]
+
+    def test_cwt_decode_with_cbor_profile(self):
+        ctx = CWT.new(cbor_profile=CBORProfile.new(max_items=12))
+        assert ctx.cbor_profile.max_items == 12
+        assert ctx.cose.cbor_profile.max_items == 12
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        assert ctx.decode(token, key)[1] == "coaps://as.example"
+        assert ctx.decode(ctx.inspect(token), key)[1] == "coaps://as.example"
+        # The claims (not the COSE message) exceed the limit.
+        token = ctx.encode({"iss": "coaps://as.example", "cnf": {"kid": "01"}}, key)
+        with pytest.raises(DecodeLimitError) as err:
+            ctx.decode(token, key)
+            pytest.fail("decode() should fail.")
+        assert "The number of CBOR data items exceeds the limit." in str(err.value)
+
+    def test_cwt_decode_with_allowed_algs(self):
+        ctx = CWT.new()
+        ctx.cose.allowed_algs = ["ES256"]
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(token, key)
+            pytest.fail("decode() should fail.")
+        assert "alg(5) is not allowed." in str(err.value)
+
+    def test_cwt_expiry_first(self):
+        ctx = CWT.new(expiry_first=True)
+        assert ctx.expiry_first is True
+        ctx.expiry_first = False
+        assert ctx.expiry_first is False
+        assert ctx.metrics == {"early_rejected": 0, "rejected": 0}
+
+    def test_cwt_constructor_with_invalid_expiry_first(self):
+        with pytest.raises(ValueError) as err:
+            CWT.new(expiry_first="yes")
+            pytest.fail("CWT.new() should fail.")
+        assert "expiry_first should be bool." in str(err.value)
+
+    @pytest.mark.parametrize(
+        "claims, msg",
+        [
+            ({4: now() - 100}, "The token has expired."),
+            ({5: now() + 100}, "The token is not yet valid."),
+        ],
+    )
+    def test_cwt_decode_with_expiry_first(self, claims, msg):
+        ctx = CWT.new(expiry_first=True)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({1: "coaps://as.example", **claims}, key)
+        verified = []
+        verification_error = key.verification_error
+
+        def counting_verification_error(msg, sig):
+            verified.append(msg)
+            return verification_error(msg, sig)
+
+        key.verification_error = counting_verification_error
+        for t in [token, ctx.inspect(token)]:
+            with pytest.raises(VerifyError) as err:
+                ctx.decode(t, key)
+                pytest.fail("decode() should fail.")
+            assert msg in str(err.value)
+        res = ctx.decode_batch([token], key)
+        assert isinstance(res[0], VerifyError)
+        assert verified == []
+        assert ctx.metrics == {"early_rejected": 3, "rejected": 0}
+
+        ctx.expiry_first = False
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(token, key)
+            pytest.fail("decode() should fail.")
+        assert msg in str(err.value)
+        assert len(verified) == 1
+        assert ctx.metrics == {"early_rejected": 3, "rejected": 1}
+
+    def test_cwt_decode_with_expiry_first_and_invalid_signature(self):
+        ctx = CWT.new(expiry_first=True)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        # A valid exp does not let the token skip the verification.
+        other = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(token, other)
+            pytest.fail("decode() should fail.")
+        assert "Failed to compare digest." in str(err.value)
+        assert ctx.decode(token, key)[1] == "coaps://as.example"
+        assert ctx.metrics == {"early_rejected": 0, "rejected": 0}
+
+    def test_cwt_decode_with_expiry_first_and_encrypted_cwt(self):
+        ctx = CWT.new(expiry_first=True)
+        key = COSEKey.from_symmetric_key(alg="A128GCM", kid="01")
+        token = ctx.encode({1: "coaps://as.example", 4: now() - 100}, key)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(token, key)
+            pytest.fail("decode() should fail.")
+        assert "The token has expired." in str(err.value)
+        assert ctx.metrics == {"early_rejected": 0, "rejected": 1}
+
+    @pytest.mark.parametrize(
+        "params, msg",
+        [
+            ({"failed_cache_size": "1"}, "failed_cache_size should be int."),
+            (
+                {"failed_cache_size": -1},
+                "failed_cache_size should not be negative number.",
+            ),
+            ({"failed_cache_ttl": 1.5}, "failed_cache_ttl should be int."),
+            ({"failed_cache_ttl": 0}, "failed_cache_ttl should be positive number."),
+        ],
+    )
+    def test_cwt_constructor_with_invalid_failed_cache(self, params, msg):
+        with pytest.raises(ValueError) as err:
+            CWT.new(**params)
+            pytest.fail("CWT.new() should fail.")
+        assert msg in str(err.value)
+
+    def test_cwt_decode_with_failed_cache(self):
+        ctx = CWT.new(failed_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        other = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        verified = []
+        verification_error = other.verification_error
+
+        def counting_verification_error(msg, sig):
+            verified.append(msg)
+            return verification_error(msg, sig)
+
+        other.verification_error = counting_verification_error
+        for _ in range(3):
+            with pytest.raises(VerifyError) as err:
+                ctx.decode(token, other)
+                pytest.fail("decode() should fail.")
+            assert "Failed to compare digest." in str(err.value)
+        # One trial on the first decoding only.
+        assert len(verified) == 1
+        assert ctx.decode(token, key)[1] == "coaps://as.example"
+
+    def test_cwt_decode_with_failed_cache_and_expired_token(self):
+        ctx = CWT.new(failed_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({1: "coaps://as.example", 5: now() + 100}, key)
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(token, key)
+            pytest.fail("decode() should fail.")
+        assert "The token is not yet valid." in str(err.value)
+        # The failures on exp and nbf are not cached.
+        ctx.leeway = 200
+        assert ctx.decode(token, key)[1] == "coaps://as.example"
+
+    def test_cwt_decode_with_failed_cache_and_key_ring(self):
+        ctx = CWT.new(failed_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        ring = COSEKeyRing.new([COSEKey.from_symmetric_key(alg="HS256", kid="02")])
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        for _ in range(2):
+            with pytest.raises(ValueError) as err:
+                ctx.decode(token, ring)
+                pytest.fail("decode() should fail.")
+            assert "key is not found." in str(err.value)
+        # The cache is invalidated when the key ring is changed.
+        ring.add(key)
+        assert ctx.decode(token, ring)[1] == "coaps://as.example"
+
+    def test_cwt_decode_with_verified_cache_and_key_ring(self):
+        ctx = CWT.new(verified_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        ring = COSEKeyRing.new([key])
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        assert ctx.decode(token, ring)[1] == "coaps://as.example"
+        ring.remove(key)
+        with pytest.raises(ValueError) as err:
+            ctx.decode(token, ring)
+            pytest.fail("decode should fail.")
+        assert "key is not found." in str(err.value)
+
+    def test_cwt_decode_with_verified_cache_and_expired_token(self):
+        ctx = CWT.new(verified_cache_size=10, leeway=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({1: "coaps://as.example", 4: now() + 5}, key)
+        assert ctx.decode(token, key)[1] == "coaps://as.example"
+        assert len(ctx._verified_cache) == 0
+        token = ctx.encode({1: "coaps://as.example", 4: now() - 100}, key)
+        for i in range(2):
+            with pytest.raises(VerifyError) as err:
+                ctx.decode(token, key)
+                pytest.fail("decode should fail.")
+            assert "The token has expired." in str(err.value)
+        assert ctx.decode(token, key, no_verify=True)[1] == "coaps://as.example"
+        assert len(ctx._verified_cache) == 0
+
+    def test_cwt_decode_with_verified_cache_revalidates_nbf(self):
+        ctx = CWT.new(verified_cache_size=10)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({1: "coaps://as.example", 5: now() + 30}, key)
+        assert ctx.decode(token, key)[1] == "coaps://as.example"
+        assert len(ctx._verified_cache) == 1
+        ctx.leeway = 1
+        with pytest.raises(VerifyError) as err:
+            ctx.decode(token, key)
+            pytest.fail("decode should fail.")
+        assert "The token is not yet valid." in str(err.value)
+
     @pytest.mark.parametrize(
         "claims",
         [
@@ -637,3 +1042,64 @@ class TestCWT:
             ctx._verify(invalid)
             pytest.fail("_verify should fail.")
         assert msg in str(err.value)
+
+    def test_cwt_inspect(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        for tagged in [False, True]:
+            token = ctx.encode({"iss": "coaps://as.example"}, key, tagged=tagged)
+            info = ctx.inspect(token)
+            assert info.tag == 17
+            assert info.kid == b"01"
+            assert info.alg == 5
+            assert cbor2.loads(info.payload)[1] == "coaps://as.example"
+            decoded = ctx.decode(info, key)
+            assert decoded[1] == "coaps://as.example"
+
+    def test_cwt_inspect_with_verified_cache(self):
+        ctx = CWT.new(verified_cache_size=2)
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        assert ctx.decode(ctx.inspect(token), key)[1] == "coaps://as.example"
+        assert ctx.decode(ctx.inspect(token), key)[1] == "coaps://as.example"
+        assert len(ctx._verified_cache) == 1
+
+    def test_cwt_decode_with_bytes_like_object(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = ctx.encode({"iss": "coaps://as.example"}, key)
+        buf = bytearray(b"\x00" * 4 + token)
+        assert ctx.decode(bytearray(token), key)[1] == "coaps://as.example"
+        assert ctx.decode(memoryview(buf)[4:], key)[1] == "coaps://as.example"
+        assert ctx.decode(ctx.inspect(memoryview(buf)[4:]), key)[1] == (
+            "coaps://as.example"
+        )
+
+    def test_cwt_issuer(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        issuer = ctx.issuer(key)
+        assert issuer.encoder.key is key
+        claims = {1: "coaps://as.example", 4: now() + 100, 5: now(), 6: now()}
+        assert issuer.encode(claims) == ctx.encode(claims, key)
+        decoded = ctx.decode(issuer.encode({"iss": "coaps://as.example"}), key)
+        assert decoded[1] == "coaps://as.example"
+        assert 4 in decoded and 5 in decoded and 6 in decoded
+        decoded = ctx.decode(issuer.encode(Claims.new({1: "coaps://as.example"})), key)
+        assert decoded[1] == "coaps://as.example"
+        decoded = ctx.decode(issuer.encode('{"iss": "coaps://as.example"}'), key)
+        assert decoded[1] == "coaps://as.example"
+
+    def test_cwt_issuer_with_signing_key(self, ctx):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            private_key = COSEKey.from_pem(key_file.read(), kid="01")
+        with open(key_path("public_key_es256.pem")) as key_file:
+            public_key = COSEKey.from_pem(key_file.read(), kid="01")
+        issuer = ctx.issuer(private_key, tagged=True)
+        token = issuer.encode({"iss": "coaps://as.example"})
+        assert cbor2.loads(token).tag == CWT.CBOR_TAG
+        assert ctx.decode(token, public_key)[1] == "coaps://as.example"
+
+    def test_cwt_issuer_with_invalid_claims(self, ctx):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        with pytest.raises(ValueError) as err:
+            ctx.issuer(key).encode({1: 123})
+            pytest.fail("encode() should fail.")
+        assert "iss(1) should be str." in str(err.value)
@@ -33,3 +33,13 @@ class TestEncryptedCOSEKey:
             "Nonce generation is not supported for the key. Set a nonce explicitly."
             in str(err.value)
         )
+
+    def test_encrypted_cose_key_to_cose_key_with_bytes_like_object(self):
+        enc_key = COSEKey.from_symmetric_key(alg="ChaCha20/Poly1305")
+        pop_key = COSEKey.from_symmetric_key(alg="HMAC 256/256", kid="01")
+        res = EncryptedCOSEKey.from_cose_key(pop_key, enc_key)
+        encoded = cbor2.dumps(cbor2.CBORTag(16, res))
+        for data in [encoded, bytearray(encoded), memoryview(b"xx" + encoded)[2:]]:
+            decoded = EncryptedCOSEKey.to_cose_key(data, enc_key)
+            assert decoded.kid == b"01"
+            assert decoded.key == pop_key.key
@@ -0,0 +1,85 @@
+"""
+Tests for ProcessPoolVerifier.
+"""
+import pytest
+
+import cwt
+from cwt import COSEKey, COSEKeyRing, DecodeError, ProcessPoolVerifier, VerifyError
+
+from .utils import key_path
+
+
+@pytest.fixture(scope="module")
+def keys():
+    with open(key_path("private_key_es256.pem")) as key_file:
+        private_key = COSEKey.from_pem(key_file.read(), kid="01")
+    with open(key_path("public_key_es256.pem")) as key_file:
+        public_key = COSEKey.from_pem(key_file.read(), kid="01")
+    with open(key_path("public_key_rsa.pem")) as key_file:
+        other_key = COSEKey.from_pem(key_file.read(), alg="PS256", kid="02")
+    return private_key, [other_key, public_key]
+
+
+@pytest.fixture(scope="module")
+def verifier(keys):
+    v = ProcessPoolVerifier.new(keys[1], max_workers=2)
+    yield v
+    v.shutdown()
+
+
+class TestProcessPoolVerifier:
+    """
+    Tests for ProcessPoolVerifier.
+    """
+
+    def test_process_pool_verifier_constructor_with_invalid_key(self):
+        with pytest.raises(ValueError) as err:
+            ProcessPoolVerifier.new([b"01"])
+            pytest.fail("ProcessPoolVerifier.new() should fail.")
+        assert "key in keys should have COSEKeyInterface." in str(err.value)
+
+    def test_process_pool_verifier_constructor_with_invalid_leeway(self):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        with pytest.raises(ValueError) as err:
+            ProcessPoolVerifier.new(key, leeway=-1)
+            pytest.fail("ProcessPoolVerifier.new() should fail.")
+        assert "leeway should be positive number." in str(err.value)
+
+    def test_process_pool_verifier_decode(self, keys, verifier):
+        token = cwt.encode({"iss": "coaps://as.example"}, keys[0])
+        decoded = verifier.decode(token)
+        assert decoded[1] == "coaps://as.example"
+        assert verifier.submit(token).result() == decoded
+
+    def test_process_pool_verifier_decode_with_invalid_signature(self, keys, verifier):
+        token = bytearray(cwt.encode({"iss": "coaps://as.example"}, keys[0]))
+        token[-1] ^= 0x01
+        with pytest.raises(VerifyError) as err:
+            verifier.decode(bytes(token))
+            pytest.fail("decode() should fail.")
+        assert "Failed to verify." in str(err.value)
+
+    def test_process_pool_verifier_decode_batch(self, keys, verifier):
+        tokens = [
+            cwt.encode({"iss": "coaps://as.example", "sub": str(i)}, keys[0])
+            for i in range(10)
+        ]
+        tokens.insert(3, b"invalid")
+        decoded = verifier.decode_batch(tokens, chunk_size=4)
+        assert len(decoded) == 11
+        assert isinstance(decoded[3], DecodeError)
+        assert [d[2] for i, d in enumerate(decoded) if i != 3] == [
+            str(i) for i in range(10)
+        ]
+
+    def test_process_pool_verifier_decode_batch_with_invalid_chunk_size(self, verifier):
+        with pytest.raises(ValueError) as err:
+            verifier.decode_batch([], chunk_size=0)
+            pytest.fail("decode_batch() should fail.")
+        assert "chunk_size should be positive number." in str(err.value)
+
+    def test_process_pool_verifier_with_key_ring(self):
+        key = COSEKey.from_symmetric_key(alg="HS256", kid="01")
+        token = cwt.encode({"iss": "coaps://as.example"}, key)
+        with ProcessPoolVerifier.new(COSEKeyRing.new([key]), max_workers=1) as v:
+            assert v.decode(token)[1] == "coaps://as.example"
@@ -9,7 +9,15 @@ Tests for Recipient.
 import cbor2
 import pytest
 
-from cwt import COSEKey, Recipient
+from cwt import (
+    COSE,
+    CBORProfile,
+    COSEKey,
+    COSEKeyRing,
+    DecodeLimitError,
+    Recipient,
+)
+from cwt.cose_key_ring import _KeyList
 from cwt.recipient_interface import RecipientInterface
 from cwt.recipients import Recipients
 
@@ -407,6 +415,65 @@ class TestRecipient:
             pytest.fail("Recipient() should fail.")
         assert msg in str(err.value)
 
+    def test_recipient_apply_batch_with_aes_key_wrap(self):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        keks = [
+            COSEKey.from_symmetric_key(alg="A128KW", kid=f"{i:02}") for i in range(20)
+        ]
+        rs = [Recipient.new(unprotected={1: -3, 4: k.kid}, sender_key=k) for k in keks]
+        res = Recipient.apply_batch(rs, enc_key, max_workers=4)
+        assert res == [enc_key] * 20
+        ctx = COSE.new(alg_auto_inclusion=True)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=rs)
+        assert len(cbor2.loads(encoded).value[3]) == 20
+        for k in keks:
+            assert ctx.decode(encoded, k) == b"Hello world!"
+
+    def test_recipient_apply_batch_with_ecdh_aes_key_wrap(self):
+        jwk = {
+            "kty": "EC",
+            "alg": "ECDH-ES+A128KW",
+            "kid": "01",
+            "crv": "P-256",
+            "x": "Ze2loSV3wrroKUN_4zhwGhCqo3Xhu1td4QjeQ5wIVR0",
+            "y": "HlLtdXARY_f55A3fnzQbPcm6hgr34Mp8p-nuzQCE0Zw",
+        }
+        public_key = COSEKey.from_jwk(jwk)
+        jwk["d"] = "r_kHyZ-a06rmxM3yESK84r1otSg-aQcVStkRhA-iCM8"
+        private_key = COSEKey.from_jwk(jwk)
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        rs = [
+            Recipient.from_jwk({"kty": "EC", "crv": "P-256", "alg": "ECDH-ES+A128KW"})
+            for _ in range(5)
+        ]
+        Recipient.apply_batch(
+            rs, enc_key, [public_key] * 5, context={"alg": "A128GCM"}, max_workers=2
+        )
+        assert all(r.unprotected[4] == b"01" for r in rs)
+        ctx = COSE.new(alg_auto_inclusion=True)
+        encoded = ctx.encode_and_encrypt(b"Hello world!", enc_key, recipients=rs)
+        assert (
+            ctx.decode(encoded, private_key, context={"alg": "A128GCM"})
+            == b"Hello world!"
+        )
+
+    def test_recipient_apply_batch_with_invalid_recipient_keys(self):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        rs = [Recipient.from_jwk({"kty": "oct", "alg": "A128KW"}) for _ in range(2)]
+        with pytest.raises(ValueError) as err:
+            Recipient.apply_batch(rs, enc_key, [enc_key])
+            pytest.fail("apply_batch() should fail.")
+        assert "The length of recipient_keys should be the same as recipients." in str(
+            err.value
+        )
+
+    def test_recipient_apply_batch_with_failure(self):
+        rs = [Recipient.from_jwk({"kty": "oct", "alg": "A128KW"}) for _ in range(2)]
+        with pytest.raises(ValueError) as err:
+            Recipient.apply_batch(rs)
+            pytest.fail("apply_batch() should fail.")
+        assert "key should be set." in str(err.value)
+
 
 class TestRecipients:
     """
@@ -590,3 +657,100 @@ class TestRecipients:
             Recipients.from_list(invalid)
             pytest.fail("extract() should fail.")
         assert msg in str(err.value)
+
+    def test_recipients_from_list_with_cbor_profile(self):
+        profile = CBORProfile.new(max_depth=1)
+        rs = Recipients.from_list(
+            [[cbor2.dumps({1: -10}), {}, b"", [[b"", {1: -6}, b""]]]],
+            cbor_profile=profile,
+        )
+        assert len(rs._recipients) == 1
+        with pytest.raises(DecodeLimitError) as err:
+            Recipients.from_list(
+                [[b"", {}, b"", [[cbor2.dumps({1: [[-6]]}), {}, b""]]]],
+                cbor_profile=profile,
+            )
+            pytest.fail("from_list() should fail.")
+        assert "The nesting depth of CBOR data exceeds the limit." in str(err.value)
+
+    def test_recipients_extract_with_kid_index(self):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        keks = [
+            COSEKey.from_symmetric_key(alg="A128KW", kid=f"{i:03}") for i in range(100)
+        ]
+        rs = [Recipient.new(unprotected={1: -3, 4: k.kid}, sender_key=k) for k in keks]
+        Recipient.apply_batch(rs, enc_key)
+        called = []
+        for r in rs:
+            extract = r.extract
+
+            def counted(key, alg=None, context=None, extract=extract):
+                called.append(key.kid)
+                return extract(key, alg, context)
+
+            r.extract = counted
+        rs = Recipients(rs)
+        key = rs.extract(list(reversed(keks))[:1] + keks[:10], alg=1)
+        assert key.key == enc_key.key
+        # Only the key with the matching kid is tried.
+        assert called == [b"000"]
+        called.clear()
+        key = rs.extract(keks[99:], alg=1)
+        assert key.key == enc_key.key
+        assert called == [b"099"]
+
+    def test_recipients_extract_with_key_ring(self):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        keks = [
+            COSEKey.from_symmetric_key(alg="A128KW", kid=f"{i:03}") for i in range(100)
+        ]
+        r = Recipient.new(unprotected={1: -3, 4: b"042"}, sender_key=keks[42])
+        r.apply(enc_key)
+        ring = COSEKeyRing.new(keks)
+        looked_up = []
+        candidates = ring.candidates
+
+        def counted(op, kid=b"", alg=0):
+            looked_up.append((op, kid))
+            return candidates(op, kid, alg)
+
+        ring.candidates = counted
+        key = Recipients([r]).extract(ring, alg=1, op=4)
+        assert key.key == enc_key.key
+        # The keys are looked up with the index of the key ring.
+        assert looked_up == [(4, b"042")]
+
+    def test_recipients_extract_with_key_list_indexed_once(self, monkeypatch):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        keks = [
+            COSEKey.from_symmetric_key(alg="A128KW", kid=f"{i:03}") for i in range(100)
+        ]
+        rs = []
+        for i in range(10):
+            r = Recipient.new(unprotected={1: -3, 4: b"9%02d" % i}, sender_key=keks[i])
+            r.apply(enc_key)
+            rs.append(r)
+        r = Recipient.new(unprotected={1: -3, 4: b"042"}, sender_key=keks[42])
+        r.apply(enc_key)
+        rs.append(r)
+        scanned = []
+        candidates = _KeyList.candidates
+
+        def counted(self, op, kid=b"", alg=0):
+            scanned.append((op, kid))
+            return candidates(self, op, kid, alg)
+
+        monkeypatch.setattr(_KeyList, "candidates", counted)
+        key = Recipients(rs).extract(keks, alg=1, op=4)
+        assert key.key == enc_key.key
+        # The keys are scanned only once for all of the recipients.
+        assert scanned == [(4, b"")]
+
+    def test_recipients_extract_without_kid_in_recipient(self):
+        enc_key = COSEKey.from_symmetric_key(alg="A128GCM")
+        kek = COSEKey.from_symmetric_key(alg="A128KW", kid="02")
+        r = Recipient.new(unprotected={1: -3}, sender_key=kek)
+        r.apply(enc_key)
+        other = COSEKey.from_symmetric_key(alg="A128KW", kid="01")
+        key = Recipients([r]).extract([other, kek], alg=1)
+        assert key.key == enc_key.key
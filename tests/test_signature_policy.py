@@ -0,0 +1,74 @@
+"""
+Tests for SignaturePolicy.
+"""
+import pytest
+
+from cwt import SignaturePolicy
+
+
+class TestSignaturePolicy:
+    """
+    Tests for SignaturePolicy.
+    """
+
+    def test_signature_policy_constructor(self):
+        policy = SignaturePolicy.new()
+        assert isinstance(policy, SignaturePolicy)
+        assert policy.threshold == 1
+        assert policy.required_kids == []
+
+    @pytest.mark.parametrize(
+        "threshold, expected",
+        [
+            ("any", 1),
+            ("all", "all"),
+            (3, 3),
+        ],
+    )
+    def test_signature_policy_threshold(self, threshold, expected):
+        policy = SignaturePolicy.new(threshold, required_kids=["01", b"02"])
+        assert policy.threshold == expected
+        assert policy.required_kids == [b"01", b"02"]
+
+    @pytest.mark.parametrize(
+        "threshold, required_kids, msg",
+        [
+            (0, [], "threshold should be positive number."),
+            (-1, [], "threshold should be positive number."),
+            ("xxx", [], 'threshold should be int, "any" or "all".'),
+            (True, [], 'threshold should be int, "any" or "all".'),
+            (1, [1], "required_kids should be a list of bytes or str."),
+        ],
+    )
+    def test_signature_policy_with_invalid_args(self, threshold, required_kids, msg):
+        with pytest.raises(ValueError) as err:
+            SignaturePolicy.new(threshold, required_kids)
+            pytest.fail("SignaturePolicy.new() should fail.")
+        assert msg in str(err.value)
+
+    @pytest.mark.parametrize(
+        "threshold, required_kids, passed, failed, is_met, can_be_met",
+        [
+            ("any", [], [], [], False, True),
+            ("any", [], [2], [], True, True),
+            ("any", [], [], [0, 1, 2], False, False),
+            ("all", [], [0, 1], [], False, True),
+            ("all", [], [0, 1, 2], [], True, True),
+            ("all", [], [0], [1], False, False),
+            (2, [], [0], [1], False, True),
+            (2, [], [0], [1, 2], False, False),
+            (1, [b"02"], [0], [], False, True),
+            (1, [b"02"], [0], [1], False, False),
+            (1, [b"02"], [1], [], True, True),
+            (1, [b"01"], [2], [], True, True),
+            (1, [b"01"], [], [0], False, True),
+            (1, [b"99"], [], [], False, False),
+        ],
+    )
+    def test_signature_policy_is_met_and_can_be_met(
+        self, threshold, required_kids, passed, failed, is_met, can_be_met
+    ):
+        policy = SignaturePolicy.new(threshold, required_kids)
+        kids = [b"01", b"02", b"01"]
+        assert policy.is_met(kids, passed) is is_met
+        assert policy.can_be_met(kids, failed) is can_be_met
@@ -222,3 +222,10 @@ class TestSigner:
             signer.verify(b"Hello world!")
         except Exception:
             pytest.fail("signer.sign and verify should not fail.")
+
+    def test_signer_elapsed_time(self):
+        with open(key_path("private_key_es256.pem")) as key_file:
+            signer = Signer.from_pem(key_file.read(), kid="01")
+        assert signer.elapsed_time == 0.0
+        signer.sign(b"Hello world!")
+        assert signer.elapsed_time > 0.0